@@ -1,699 +1,126 @@
 import os
+import math
 import time
 import json
-import string
-import pandas as pd
+import uuid
+from datetime import datetime, timedelta
 import streamlit as st
-from collections import Counter
-from utils.gemini_client import ask_gemini
+from utils.gemini_client import get_client, existing_client
+from utils.usage_log import get_usage_writer, make_record, usage_backend
+from utils.usage_metrics import get_usage_metrics
+from utils.tracing import tracer
+from utils.ui_assets import style_tag, response_header_html
+from utils.session_results import SessionResults, result_key, session_results_db
+from utils.background import BackgroundResults
+from utils.response_index import response_index
 
 # --- Config ---
 st.set_page_config(page_title="Startup AI Command Center", layout="wide", initial_sidebar_state="collapsed")
 
-# Modern professional dark theme via CSS injection
-st.markdown(
-    """
-    <style>
-    /* Import modern fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&family=JetBrains+Mono:wght@400;500;600&display=swap');
-    
-    /* Global modern dark theme */
-    .reportview-container, .main, .block-container {
-        background: #000000;
-        color: #ffffff;
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-        line-height: 1.6;
-    }
-    
-    /* Hide sidebar completely */
-    .sidebar {
-        display: none !important;
-    }
-    
-    /* Main content area */
-    .main .block-container {
-        max-width: 1200px;
-        margin: 0 auto;
-        padding: 2rem;
-        background: #000000;
-    }
-    
-    /* Modern headings */
-    h1, h2, h3, h4 {
-        color: #ffffff;
-        font-family: 'Inter', sans-serif;
-        font-weight: 700;
-        letter-spacing: -0.025em;
-        margin-bottom: 1rem;
-    }
-    
-    h1 {
-        font-size: 3rem;
-        font-weight: 800;
-        background: linear-gradient(135deg, #ffffff 0%, #a1a1aa 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        text-align: center;
-        margin-bottom: 3rem;
-        letter-spacing: -0.05em;
-    }
-    
-    h2 {
-        font-size: 1.875rem;
-        font-weight: 700;
-        color: #ffffff;
-        border-bottom: 2px solid #27272a;
-        padding-bottom: 0.5rem;
-        margin-top: 2rem;
-    }
-    
-    h3 {
-        font-size: 1.5rem;
-        font-weight: 600;
-        color: #a1a1aa;
-    }
-    
-    /* Modern navigation tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 0;
-        background: #18181b;
-        border-radius: 12px;
-        padding: 4px;
-        margin-bottom: 2rem;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background: transparent;
-        border-radius: 8px;
-        color: #71717a;
-        font-weight: 500;
-        padding: 12px 24px;
-        border: none;
-        transition: all 0.2s ease;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: #27272a;
-        color: #ffffff;
-        font-weight: 600;
-    }
-    
-    /* Modern buttons */
-    .stButton>button {
-        background: #27272a;
-        color: #ffffff;
-        border: 1px solid #3f3f46;
-        border-radius: 8px;
-        font-family: 'Inter', sans-serif;
-        font-weight: 500;
-        font-size: 0.875rem;
-        padding: 10px 20px;
-        transition: all 0.2s ease;
-        cursor: pointer;
-        display: inline-flex;
-        align-items: center;
-        justify-content: center;
-        min-height: 40px;
-    }
-    
-    .stButton>button:hover {
-        background: #3f3f46;
-        border-color: #52525b;
-        transform: translateY(-1px);
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3);
-    }
-    
-    .stButton>button:active {
-        transform: translateY(0);
-    }
-    
-    /* Modern input fields */
-    textarea, input, .stTextInput>div>input, .stSelectbox>div>div>div {
-        background: #18181b;
-        color: #ffffff;
-        border: 1px solid #3f3f46;
-        border-radius: 8px;
-        font-family: 'Inter', sans-serif;
-        font-size: 0.875rem;
-        padding: 12px 16px;
-        transition: all 0.2s ease;
-        outline: none;
-    }
-    
-    textarea:focus, input:focus, .stTextInput>div>input:focus, .stSelectbox>div>div>div:focus {
-        border-color: #6366f1;
-        box-shadow: 0 0 0 3px rgba(99, 102, 241, 0.1);
-        background: #1f1f23;
-    }
-    
-    /* Placeholder styling */
-    textarea::placeholder, input::placeholder {
-        color: #71717a;
-    }
-    
-    /* Selectbox styling */
-    .stSelectbox>div>div>div {
-        background: #18181b;
-        color: #ffffff;
-    }
-    
-    /* Number input styling */
-    .stNumberInput>div>div>input {
-        background: #18181b;
-        color: #ffffff;
-        border: 1px solid #3f3f46;
-        border-radius: 8px;
-        font-family: 'Inter', sans-serif;
-        font-weight: 500;
-        text-align: center;
-    }
-    
-    /* Slider styling */
-    .stSlider>div>div>div>div {
-        background: #6366f1;
-    }
-    
-    .stSlider>div>div>div>div>div {
-        background: #ffffff;
-        border: 2px solid #6366f1;
-    }
-    
-    /* Modern tables */
-    .stDataFrame table { 
-        color: #ffffff;
-        background: #18181b;
-        border: 1px solid #3f3f46;
-        border-radius: 8px;
-        overflow: hidden;
-        font-family: 'Inter', sans-serif;
-    }
-    
-    .stDataFrame th {
-        background: #27272a;
-        color: #ffffff;
-        font-weight: 600;
-        font-size: 0.875rem;
-        padding: 12px 16px;
-        border-bottom: 1px solid #3f3f46;
-    }
-    
-    .stDataFrame td {
-        background: #18181b;
-        color: #ffffff;
-        border-bottom: 1px solid #27272a;
-        padding: 12px 16px;
-        font-size: 0.875rem;
-    }
-    
-    /* Code blocks */
-    .stCode {
-        background: #18181b;
-        border: 1px solid #3f3f46;
-        border-radius: 8px;
-        color: #ffffff;
-        font-family: 'JetBrains Mono', monospace;
-        font-size: 0.875rem;
-        padding: 16px;
-        line-height: 1.5;
-    }
-    
-    /* Metrics styling */
-    .metric-container {
-        background: #18181b;
-        border: 1px solid #3f3f46;
-        border-radius: 8px;
-        padding: 16px;
-        margin: 8px 0;
-    }
-    
-    .metric-label {
-        color: #71717a;
-        font-size: 0.75rem;
-        font-weight: 500;
-        text-transform: uppercase;
-        letter-spacing: 0.05em;
-    }
-    
-    .metric-value {
-        color: #ffffff;
-        font-size: 1.5rem;
-        font-weight: 700;
-        margin-top: 4px;
-    }
-    
-    /* Charts */
-    .stChart {
-        background: #18181b;
-        border: 1px solid #3f3f46;
-        border-radius: 8px;
-        padding: 16px;
-    }
-    
-    /* Download button */
-    .stDownloadButton>button { 
-        background: #27272a;
-        color: #ffffff;
-        border: 1px solid #3f3f46;
-        border-radius: 8px;
-        font-family: 'Inter', sans-serif;
-        font-weight: 500;
-        font-size: 0.875rem;
-        padding: 10px 20px;
-        transition: all 0.2s ease;
-    }
-    
-    .stDownloadButton>button:hover {
-        background: #3f3f46;
-        border-color: #52525b;
-        transform: translateY(-1px);
-    }
-    
-    /* Checkbox styling */
-    .st-ck { 
-        color: #ffffff; 
-        font-family: 'Inter', sans-serif;
-        font-size: 0.875rem;
-    }
-    
-    /* Custom scrollbar */
-    ::-webkit-scrollbar {
-        width: 8px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: #18181b;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: #3f3f46;
-        border-radius: 4px;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: #52525b;
-    }
-    
-    /* Remove Streamlit footer */
-    footer {visibility: hidden;}
-    
-    /* Card-like containers */
-    .stMarkdown {
-        background: #18181b;
-        border: 1px solid #3f3f46;
-        border-radius: 12px;
-        padding: 24px;
-        margin: 16px 0;
-    }
-    
-    /* AI Response content styling */
-    .stMarkdown:has(p) {
-        background: #000000;
-        border: 1px solid #333333;
-        border-radius: 8px;
-        padding: 16px;
-        margin: 0 0 20px 0;
-        font-family: 'Inter', sans-serif;
-        font-size: 1rem;
-        line-height: 1.6;
-        color: #ffffff;
-    }
-    
-    /* Status indicators */
-    .status-indicator {
-        display: inline-block;
-        width: 8px;
-        height: 8px;
-        border-radius: 50%;
-        background: #22c55e;
-        margin-right: 8px;
-    }
-    
-    /* Divider styling */
-    hr {
-        border: none;
-        height: 1px;
-        background: #3f3f46;
-        margin: 2rem 0;
-    }
-    
-    /* Link styling */
-    a {
-        color: #6366f1;
-        text-decoration: none;
-        transition: color 0.2s ease;
-    }
-    
-    a:hover {
-        color: #818cf8;
-    }
-    
-    /* Ultra Enhanced AI response styling */
-    .ai-response-container {
-        background: linear-gradient(135deg, #0a0a0a 0%, #1a1a1a 25%, #0f0f0f 50%, #1a1a1a 75%, #0a0a0a 100%);
-        border: 2px solid transparent;
-        border-radius: 20px;
-        padding: 28px;
-        margin: 24px 0;
-        box-shadow: 
-            0 12px 40px rgba(99, 102, 241, 0.3),
-            0 0 0 1px rgba(99, 102, 241, 0.1),
-            inset 0 1px 0 rgba(255, 255, 255, 0.1);
-        position: relative;
-        overflow: hidden;
-        backdrop-filter: blur(10px);
-        animation: containerGlow 3s ease-in-out infinite alternate;
-    }
-    
-    .ai-response-container::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: linear-gradient(45deg, 
-            rgba(99, 102, 241, 0.1) 0%, 
-            rgba(139, 92, 246, 0.05) 25%, 
-            rgba(99, 102, 241, 0.1) 50%, 
-            rgba(139, 92, 246, 0.05) 75%, 
-            rgba(99, 102, 241, 0.1) 100%);
-        border-radius: 20px;
-        z-index: -1;
-        animation: backgroundShift 4s ease-in-out infinite;
-    }
-    
-    .ai-response-header {
-        display: flex;
-        align-items: center;
-        margin-bottom: 20px;
-        gap: 16px;
-        position: relative;
-        z-index: 2;
-    }
-    
-    .ai-status-indicator {
-        width: 14px;
-        height: 14px;
-        background: linear-gradient(45deg, #22c55e, #16a34a);
-        border-radius: 50%;
-        animation: pulse 2s infinite, statusGlow 3s ease-in-out infinite;
-        box-shadow: 0 0 10px rgba(34, 197, 94, 0.5);
-        position: relative;
-    }
-    
-    .ai-status-indicator::after {
-        content: '';
-        position: absolute;
-        top: -2px;
-        left: -2px;
-        right: -2px;
-        bottom: -2px;
-        background: linear-gradient(45deg, #22c55e, #16a34a, #22c55e);
-        border-radius: 50%;
-        z-index: -1;
-        animation: statusRing 2s linear infinite;
-    }
-    
-    .ai-response-title {
-        margin: 0;
-        color: #ffffff;
-        font-family: 'Inter', sans-serif;
-        font-weight: 700;
-        font-size: 1.4rem;
-        background: linear-gradient(135deg, #ffffff 0%, #6366f1 50%, #ffffff 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        text-shadow: 0 0 20px rgba(99, 102, 241, 0.3);
-        animation: titleGlow 4s ease-in-out infinite alternate;
-    }
-    
-    .ai-response-timer {
-        margin-left: auto;
-        font-size: 0.9rem;
-        color: #a1a1aa;
-        font-family: 'Inter', sans-serif;
-        font-weight: 500;
-        background: rgba(99, 102, 241, 0.1);
-        padding: 6px 12px;
-        border-radius: 20px;
-        border: 1px solid rgba(99, 102, 241, 0.2);
-        backdrop-filter: blur(5px);
-    }
-    
-    .ai-response-content {
-        background: linear-gradient(135deg, #000000 0%, #0a0a0a 100%);
-        border: 1px solid #27272a;
-        border-radius: 16px;
-        padding: 24px;
-        font-family: 'Inter', sans-serif;
-        font-size: 1rem;
-        line-height: 1.8;
-        color: #ffffff;
-        white-space: pre-wrap;
-        overflow-x: auto;
-        position: relative;
-        z-index: 2;
-        box-shadow: 
-            inset 0 1px 0 rgba(255, 255, 255, 0.05),
-            0 4px 20px rgba(0, 0, 0, 0.3);
-    }
-    
-    .ai-response-content::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 1px;
-        background: linear-gradient(90deg, transparent, rgba(99, 102, 241, 0.3), transparent);
-        border-radius: 16px 16px 0 0;
-    }
-    
-    .shimmer-effect {
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 2px;
-        background: linear-gradient(90deg, #6366f1, #8b5cf6, #6366f1);
-        animation: shimmer 2s infinite;
-    }
-    
-    @keyframes shimmer {
-        0% { transform: translateX(-100%); }
-        100% { transform: translateX(100%); }
-    }
-    
-    @keyframes pulse {
-        0%, 100% { opacity: 1; transform: scale(1); }
-        50% { opacity: 0.7; transform: scale(1.1); }
-    }
-    
-    @keyframes containerGlow {
-        0% { box-shadow: 0 12px 40px rgba(99, 102, 241, 0.3), 0 0 0 1px rgba(99, 102, 241, 0.1), inset 0 1px 0 rgba(255, 255, 255, 0.1); }
-        100% { box-shadow: 0 12px 40px rgba(99, 102, 241, 0.5), 0 0 0 1px rgba(99, 102, 241, 0.2), inset 0 1px 0 rgba(255, 255, 255, 0.15); }
-    }
-    
-    @keyframes backgroundShift {
-        0%, 100% { opacity: 0.5; }
-        50% { opacity: 1; }
-    }
-    
-    @keyframes statusGlow {
-        0%, 100% { box-shadow: 0 0 10px rgba(34, 197, 94, 0.5); }
-        50% { box-shadow: 0 0 20px rgba(34, 197, 94, 0.8); }
-    }
-    
-    @keyframes statusRing {
-        0% { transform: rotate(0deg); opacity: 0.8; }
-        100% { transform: rotate(360deg); opacity: 0.2; }
-    }
-    
-    @keyframes titleGlow {
-        0% { text-shadow: 0 0 20px rgba(99, 102, 241, 0.3); }
-        100% { text-shadow: 0 0 30px rgba(99, 102, 241, 0.6); }
-    }
-    
-    /* Enhanced markdown styling for AI responses */
-    .ai-response-content h1, .ai-response-content h2, .ai-response-content h3 {
-        color: #ffffff;
-        border-bottom: 1px solid #27272a;
-        padding-bottom: 8px;
-        margin-top: 24px;
-        margin-bottom: 16px;
-    }
-    
-    .ai-response-content strong {
-        color: #6366f1;
-        font-weight: 600;
-    }
-    
-    .ai-response-content em {
-        color: #a1a1aa;
-        font-style: italic;
-    }
-    
-    .ai-response-content ul, .ai-response-content ol {
-        margin: 16px 0;
-        padding-left: 24px;
-    }
-    
-    .ai-response-content li {
-        margin: 8px 0;
-        color: #e5e5e5;
-    }
-    
-    .ai-response-content blockquote {
-        border-left: 4px solid #6366f1;
-        padding-left: 16px;
-        margin: 16px 0;
-        color: #a1a1aa;
-        font-style: italic;
-    }
-    
-    .ai-response-content code {
-        background: #1a1a1a;
-        color: #22c55e;
-        padding: 2px 6px;
-        border-radius: 4px;
-        font-family: 'JetBrains Mono', monospace;
-        font-size: 0.875rem;
-    }
-    
-    .ai-response-content pre {
-        background: #1a1a1a;
-        border: 1px solid #27272a;
-        border-radius: 8px;
-        padding: 16px;
-        overflow-x: auto;
-        margin: 16px 0;
-    }
-    
-    .ai-response-content pre code {
-        background: none;
-        padding: 0;
-        color: #ffffff;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# Modern professional dark theme; static/theme.css is read and minified once per process.
+# Inlined rather than linked: Streamlit's static file serving sends .css as text/plain with
+# nosniff, so browsers would refuse it as a stylesheet.
+st.markdown(style_tag("theme.css"), unsafe_allow_html=True)
 
 # --- Helper utilities ---
 DATA_DIR = os.path.join(os.getcwd(), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
-USAGE_LOG = os.path.join(DATA_DIR, "usage_logs.csv")
-
-STOPWORDS = {
-    "the","and","to","of","a","in","for","is","on","that","with","as","are","it","be","by","or","from",
-    "this","an","at","we","our","you","your","will","can","has","have"
-}
-
-def text_metrics(text: str):
-    words = [w.strip(string.punctuation).lower() for w in text.split() if w.strip(string.punctuation)]
-    words = [w for w in words if w]
-    word_count = len(words)
-    unique = len(set(words))
-    reading_time_min = round(word_count / 200, 2)  # ~200 wpm
-    # keyword frequencies (filter stopwords and single chars)
-    keywords = [w for w in words if w not in STOPWORDS and len(w) > 2]
-    top = Counter(keywords).most_common(10)
-    return {
-        "word_count": word_count,
-        "unique_words": unique,
-        "reading_time_min": reading_time_min,
-        "top_keywords": top
-    }
-
-def log_usage(module: str, prompt: str, response: str, latency_s: float):
-    row = {
-        "timestamp": pd.Timestamp.now().isoformat(),
-        "module": module,
-        "prompt": prompt,
-        "response_word_count": len(response.split()),
-        "latency_s": round(latency_s, 3)
-    }
-    # append to CSV (create if not exists)
-    df_row = pd.DataFrame([row])
-    if os.path.exists(USAGE_LOG):
-        df_row.to_csv(USAGE_LOG, mode="a", header=False, index=False)
-    else:
-        df_row.to_csv(USAGE_LOG, index=False)
+USAGE_LOG = os.path.join(DATA_DIR, "usage" if usage_backend() == "parquet" else "usage_logs.csv")
 
-def display_response_and_analytics(prompt: str, resp_text: str, start_time: float, module_name: str):
-    latency = time.time() - start_time
-    
-    # Create header container
-    st.markdown(f"""
-    <div style="
-        background: #000000;
-        border: 1px solid #333333;
-        border-radius: 12px;
-        padding: 16px;
-        margin: 20px 0 0 0;
-        font-family: 'Inter', sans-serif;
-    ">
-        <div style="
-            display: flex;
-            align-items: center;
-            gap: 12px;
-        ">
-            <div style="
-                width: 12px;
-                height: 12px;
-                background: #22c55e;
-                border-radius: 50%;
-            "></div>
-            <h3 style="
-                margin: 0;
-                color: #ffffff;
-                font-family: 'Inter', sans-serif;
-                font-weight: 600;
-                font-size: 1.2rem;
-            ">🤖 AI Response</h3>
-            <div style="
-                margin-left: auto;
-                font-size: 0.875rem;
-                color: #a1a1aa;
-                font-family: 'Inter', sans-serif;
-            ">Generated in {latency:.2f}s</div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Create content container with styling
-    st.markdown("""
-    <style>
-    .ai-response-box {
-        background: #000000;
-        border: 1px solid #333333;
-        border-radius: 8px;
-        padding: 16px;
-        margin: 0 0 20px 0;
-        font-family: 'Inter', sans-serif;
-        font-size: 1rem;
-        line-height: 1.6;
-        color: #ffffff;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+usage_writer = get_usage_writer(USAGE_LOG)
+
+@st.cache_resource(show_spinner=False)
+def ai_client():
+    """Gemini client shared by every session; built on the first request, not at app start."""
+    return get_client()
+
+def log_usage(module: str, prompt: str, response: str, latency_s: float, ttft_s: float = None,
+              model: str = None, error: str = None, attempts: list = None, prompt_tokens: int = None):
+    # hand off to the background writer; never blocks the request path
+    with tracer.span("usage.log", module=module):
+        usage_writer.write(make_record(module, prompt, response, latency_s, ttft_s, model, error, attempts,
+                                       prompt_tokens))
+        index = response_index() if not error else None
+        if index is not None:
+            index.submit(module, prompt, response)
+
+def display_streaming_response(prompt: str, stream, start_time: float, module_name: str) -> float:
+    """Render a GeminiStream progressively, then log latency and time-to-first-token; returns the latency."""
+    header = st.empty()
+    header.markdown(response_header_html("Generating…"), unsafe_allow_html=True)
+    body = st.empty()
+    for _ in stream:
+        body.markdown(stream.text + " ▌")
+    body.markdown(stream.response)
     
-    # Create a container div and render the content
-    st.markdown('<div class="ai-response-box">', unsafe_allow_html=True)
-    st.markdown(resp_text)
-    st.markdown('</div>', unsafe_allow_html=True)
+    latency = time.time() - start_time
+    ttft = stream.first_token_s
+    status = f"Generated in {latency:.2f}s"
+    if ttft is not None:
+        status += f" · first token {ttft:.2f}s"
+    if stream.similar_to is not None:
+        status += " · reused a similar request"
+    header.markdown(response_header_html(status), unsafe_allow_html=True)
     
     # Log usage (hidden from UI)
-    log_usage(module_name, prompt, resp_text, latency)
+    log_usage(module_name, prompt, stream.response, latency, ttft, stream.model_name, stream.error, stream.attempts,
+              stream.prompt_tokens)
+    return latency
+
+def display_saved_result(entry: dict, note: str = "restored from this session"):
+    """Render a stored result without calling the model again."""
+    status = f"Generated in {entry['latency_s']:.2f}s · {note}"
+    st.markdown(response_header_html(status), unsafe_allow_html=True)
+    if isinstance(entry["response"], list):  # Full Analysis: one report per module
+        for report in entry["response"]:
+            with st.expander(f"{report['module']} · {report['latency_s']:.2f}s", expanded=False):
+                st.markdown(report["response"])
+    else:
+        st.markdown(entry["response"])
+
+def ai_tab(module_name: str, task_type: str, prompt: str, inputs: dict, context: dict = None,
+           clicked: bool = False):
+    """
+    Run a tab's request when its button was clicked, otherwise show the tab's last result.
+
+    Identical inputs re-submitted in the same session are answered from the session store.
+    """
+    if clicked:
+        saved = session_results.touch(result_key(module_name, inputs))
+        if saved is None:
+            start = time.time()
+            stream = ai_client().ask_gemini_stream(prompt, task_type=task_type, context=context,
+                                                   session_id=SESSION_ID)
+            latency = display_streaming_response(prompt, stream, start, module_name)
+            if stream.error is None:
+                session_results.put(module_name, inputs, prompt, stream.response, model=stream.model_name,
+                                    latency_s=latency, ttft_s=stream.first_token_s)
+            return
+        display_saved_result(saved, "same inputs as an earlier run, not regenerated")
+        return
+    saved = session_results.latest(module_name)
+    if saved is not None:
+        display_saved_result(saved)
+
+# Each browser session keeps its own conversation history and results. With the disk
+# results tier the id also goes in the URL, so a reload picks the same session back up.
+results_db = session_results_db()
+if "session_id" not in st.session_state:
+    sid = st.query_params.get("sid", "") if results_db is not None else ""
+    st.session_state.session_id = sid if len(sid) == 32 and sid.isalnum() else uuid.uuid4().hex
+if results_db is not None:
+    st.query_params["sid"] = st.session_state.session_id
+SESSION_ID = st.session_state.session_id
+if "results" not in st.session_state:
+    st.session_state.results = SessionResults(SESSION_ID, disk=results_db)
+session_results = st.session_state.results
 
 # --- App UI ---
 st.title("Startup AI Command Center")
 st.markdown("A professional, minimalist AI workspace for founders and operators. Responses are returned raw and formatted for direct use.")
 
 # Main navigation using tabs
-tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10 = st.tabs([
     "Idea Generator",
     "Market Research", 
     "Business Model (BMC)",
@@ -701,116 +128,324 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
     "Financial Forecast",
     "SWOT & Risks",
     "Investor Q&A",
-    "Branding Kit"
+    "Branding Kit",
+    "Full Analysis",
+    "Performance"
 ])
 
 # Usage info
 st.markdown("---")
-st.markdown("**Usage logs will be stored locally at:** `data/usage_logs.csv`")
+st.markdown(f"**Usage logs will be stored locally at:** `{os.path.relpath(USAGE_LOG)}`")
 
 with tab1:
     st.header("AI Startup Idea Generator")
     keywords = st.text_input("Keywords (comma-separated):", placeholder="AI, logistics, Southeast Asia")
     tone = st.selectbox("Output tone", ["Professional", "Investor-ready", "Technical"], index=0)
-    if st.button("Generate"):
-        prompt = f"Keywords: {keywords}, Tone: {tone}"
-        start = time.time()
-        resp = ask_gemini(prompt, task_type="startup_idea", context={"tone": tone})
-        display_response_and_analytics(prompt, resp, start, "Idea Generator")
+    prompt = f"Keywords: {keywords}, Tone: {tone}"
+    ai_tab("Idea Generator", "startup_idea", prompt, {"keywords": keywords, "tone": tone},
+           context={"tone": tone}, clicked=st.button("Generate"))
 
 with tab2:
     st.header("Market Research Assistant")
     topic = st.text_input("Topic / Company / Market:")
     timeframe = st.text_input("Timeframe (e.g., 2020-2025) or leave blank:")
-    if st.button("Analyze"):
-        prompt = f"Topic: {topic}, Timeframe: {timeframe}"
-        start = time.time()
-        resp = ask_gemini(prompt, task_type="market_research", context={"timeframe": timeframe})
-        display_response_and_analytics(prompt, resp, start, "Market Research")
+    prompt = f"Topic: {topic}, Timeframe: {timeframe}"
+    ai_tab("Market Research", "market_research", prompt, {"topic": topic, "timeframe": timeframe},
+           context={"timeframe": timeframe}, clicked=st.button("Analyze"))
 
 with tab3:
     st.header("Business Model Canvas (AI-assisted)")
     name = st.text_input("Startup name:")
     description = st.text_area("One-line description / problem you solve:")
-    if st.button("Build Canvas"):
-        prompt = f"Startup: {name}, Description: {description}"
-        start = time.time()
-        resp = ask_gemini(prompt, task_type="business_model", context={"startup_name": name})
-        display_response_and_analytics(prompt, resp, start, "Business Model Canvas")
+    prompt = f"Startup: {name}, Description: {description}"
+    ai_tab("Business Model Canvas", "business_model", prompt, {"name": name, "description": description},
+           context={"startup_name": name}, clicked=st.button("Build Canvas"))
 
 with tab4:
     st.header("Refine Pitch (Investor Format)")
     pitch = st.text_area("Paste your pitch (single paragraph or bullet points):")
-    if st.button("Refine Pitch"):
-        prompt = f"Pitch: {pitch}"
-        start = time.time()
-        resp = ask_gemini(prompt, task_type="pitch_refinement")
-        display_response_and_analytics(prompt, resp, start, "Pitch Refinement")
+    prompt = f"Pitch: {pitch}"
+    ai_tab("Pitch Refinement", "pitch_refinement", prompt, {"pitch": pitch}, clicked=st.button("Refine Pitch"))
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def revenue_bands(initial: float, growth: float, growth_sd: float, churn: float, churn_sd: float,
+                  months: int, paths: int):
+    """Seeded Monte Carlo percentile bands; identical inputs always give the same chart."""
+    from utils.financials import monte_carlo_forecast
+    workers = int(os.getenv("FORECAST_WORKERS", 1))
+    return monte_carlo_forecast(initial, growth, growth_sd, churn, churn_sd, months, paths, workers=workers)
+
+# Forecast commentary depends only on the numbers (the task never uses conversation
+# history), so it is shared across sessions and keyed by a coarse bucket of the inputs
+@st.cache_resource(show_spinner=False)
+def commentary_tasks():
+    return BackgroundResults(max_workers=4, thread_name_prefix="commentary")
+
+def _round_half_up(value: float, step: float) -> float:
+    # round() is round-half-even, which would bucket 10.25% to 10.0 but 10.75% to 11.0;
+    # the inner round drops float noise such as 20.499999999999996 steps
+    return math.floor(round(value / step, 9) + 0.5) * step
+
+def commentary_bucket(inputs: dict) -> tuple:
+    """Revenue to 2 significant figures, rates to 0.5 points, CAC to 0.25, months exact; halves round up."""
+    initial = float(f"{inputs['initial']:.2g}")
+    growth = _round_half_up(inputs["growth"] * 100, 0.5)
+    churn = _round_half_up(inputs.get("churn", 0.0) * 100, 0.5)
+    cac = _round_half_up(inputs.get("cac", 0.0), 0.25)
+    months = int(inputs["months"])
+    return initial, growth, churn, cac, months
+
+# Commentary requests record history under their own session, never the shared default one
+COMMENTARY_SESSION = "forecast-commentary"
+
+def fetch_commentary(client, bucket: tuple) -> dict:
+    """Worker-thread body: one financial_forecast request for the bucket's representative numbers."""
+    initial, growth, churn, cac, months = bucket
+    prompt = "Revenue projection analysis"
+    context = {"initial": initial, "growth": growth, "churn": churn, "cac": cac, "months": months}
+    result = client.ask_gemini_detailed(prompt, "financial_forecast", context, "medium",
+                                        session_id=COMMENTARY_SESSION)
+    log_usage("Financial Forecast", prompt, result["response"], result["latency_s"], model=result["model"],
+              error=result["error"], attempts=result["attempts"], prompt_tokens=result["prompt_tokens"])
+    if result["error"] is not None:
+        raise RuntimeError(result["error"])  # surfaces as the task's exception: "Commentary failed"
+    return result
+
+def forecast_commentary(bucket: tuple, inputs: dict):
+    """AI commentary for the projection; while its task runs, only this fragment reruns to poll it."""
+    future = commentary_tasks().get(bucket)
+    polling = future is not None and not future.done()
+    st.fragment(run_every=0.5 if polling else None)(_commentary_body)(bucket, inputs, polling)
+
+def _commentary_body(bucket: tuple, inputs: dict, polling: bool):
+    initial, growth, churn, cac, months = bucket
+    future = commentary_tasks().get(bucket)
+    if future is None:
+        saved = session_results.get(result_key("Financial Forecast", inputs))
+        if saved is not None:
+            display_saved_result(saved)
+        else:
+            st.caption("Click Project for AI commentary on these numbers.")
+        return
+    if not future.done():
+        st.markdown(response_header_html("Generating commentary…"), unsafe_allow_html=True)
+        return
+    if polling:
+        st.rerun()  # one full rerun redraws the tab with a fragment that no longer polls
+    if future.exception() is not None:
+        st.markdown(response_header_html("Commentary failed"), unsafe_allow_html=True)
+        st.write(f"{future.exception()} — click Project to retry.")
+        return
+    result = future.result()
+    note = f"for ~${initial:,.0f} MRR, {growth:g}% growth, {churn:g}% churn, {months} months"
+    st.markdown(response_header_html(f"Generated in {result['latency_s']:.2f}s · {note}"), unsafe_allow_html=True)
+    st.markdown(result["response"])
+    if session_results.get(result_key("Financial Forecast", inputs)) is None:
+        session_results.put("Financial Forecast", inputs, "Revenue projection analysis", result["response"],
+                            model=result["model"], latency_s=result["latency_s"])
 
 with tab5:
     st.header("Quick Financial Forecast")
     initial = st.number_input("Current monthly revenue ($):", value=1000.0)
     growth = st.number_input("Expected monthly growth rate (%):", value=10.0) / 100.0
+    churn = st.number_input("Monthly revenue churn (%):", value=0.0, min_value=0.0) / 100.0
+    cac = st.number_input("Acquisition cost per $1 of new monthly revenue ($):", value=0.0, min_value=0.0)
     months = st.slider("Months to project:", min_value=6, max_value=36, value=12)
-    if st.button("Project"):
-        # local simple projection
-        rows = []
-        rev = initial
-        for m in range(1, months + 1):
-            rows.append({"Month": m, "Projected Revenue": round(rev, 2)})
-            rev = rev * (1 + growth)
-        df = pd.DataFrame(rows)
+    with st.expander("Uncertainty (Monte Carlo)"):
+        growth_sd = st.number_input("Growth volatility, std. dev. per month (%):", value=5.0, min_value=0.0) / 100.0
+        churn_sd = st.number_input("Churn volatility, std. dev. per month (%):", value=1.0, min_value=0.0) / 100.0
+        mc_paths = st.select_slider("Simulated paths", [1_000, 10_000, 100_000, 1_000_000], value=100_000)
+    with st.expander("Scenario sweep"):
+        sweep_growth = st.slider("Growth range (%)", -20.0, 50.0, (0.0, 20.0), 0.5)
+        sweep_churn = st.slider("Churn range (%)", 0.0, 30.0, (0.0, 10.0), 0.5)
+        sweep_steps = st.slider("Steps per range", 2, 200, 25)
+    inputs = {"initial": initial, "growth": growth, "churn": churn, "cac": cac, "months": months}
+    clicked = st.button("Project")
+    if clicked:
+        st.session_state.forecast_inputs = inputs
+    saved = session_results.latest("Financial Forecast")
+    shown = st.session_state.get("forecast_inputs") or (saved["inputs"] if saved is not None else None)
+    if shown is not None:
+        # numpy loads with the first projection, not with the app
+        import numpy as np
+        from utils.financials import forecast_scenarios, scenario_grid
+        base = forecast_scenarios(shown["initial"], shown["growth"], shown.get("churn", 0.0),
+                                  shown.get("cac", 0.0), shown["months"])
+        df = base.frame()
         st.subheader("Projected revenue")
-        st.line_chart(df.set_index("Month"))
-        st.dataframe(df)
-        # AI summary for the projection
-        prompt = f"Revenue projection analysis"
-        start = time.time()
-        resp = ask_gemini(prompt, task_type="financial_forecast", context={
-            "initial": initial,
-            "growth": growth * 100,
-            "months": months
-        })
-        display_response_and_analytics(prompt, resp, start, "Financial Forecast")
+        st.line_chart(df.set_index("Month")[["Projected Revenue"]])
+        st.dataframe(df, hide_index=True)
+        # the prose is fetched in the background; the numbers below never wait for it
+        bucket = commentary_bucket(shown)
+        if clicked:
+            commentary_tasks().submit(bucket, fetch_commentary, ai_client(), bucket)
+        forecast_commentary(bucket, shown)
+        bands = revenue_bands(shown["initial"], shown["growth"], growth_sd, shown.get("churn", 0.0), churn_sd,
+                              shown["months"], mc_paths)
+        st.subheader(f"Revenue range over {mc_paths:,} simulated paths")
+        st.line_chart({"p10": bands["p10"], "p50": bands["p50"], "p90": bands["p90"]})
+        st.caption("p10 / p50 / p90 of monthly revenue with growth and churn drawn each month.")
+        # every growth x churn combination in the sweep, as one vectorized projection
+        grid = scenario_grid(growth_rate=np.linspace(*sweep_growth, sweep_steps) / 100.0,
+                             churn_rate=np.linspace(*sweep_churn, sweep_steps) / 100.0)
+        sweep = forecast_scenarios(shown["initial"], cac=shown.get("cac", 0.0), months=shown["months"], **grid)
+        final = sweep.summary()["final_revenue"].reshape(sweep_steps, sweep_steps)
+        st.subheader(f"Month-{shown['months']} revenue across {len(sweep):,} scenarios")
+        st.dataframe(
+            {"growth %": np.round(np.linspace(*sweep_growth, sweep_steps), 2),
+             **{f"churn {c:g}%": final[:, j].round(0)
+                for j, c in enumerate(np.round(np.linspace(*sweep_churn, sweep_steps), 2))}},
+            hide_index=True,
+        )
 
 with tab6:
     st.header("SWOT & Risk Assessment")
     summary = st.text_area("Provide a short summary of your startup or product:")
-    if st.button("Run SWOT"):
-        prompt = f"Startup summary: {summary}"
-        start = time.time()
-        resp = ask_gemini(prompt, task_type="swot_analysis")
-        display_response_and_analytics(prompt, resp, start, "SWOT & Risks")
+    prompt = f"Startup summary: {summary}"
+    ai_tab("SWOT & Risks", "swot_analysis", prompt, {"summary": summary}, clicked=st.button("Run SWOT"))
 
 with tab7:
     st.header("Investor Q&A Practice")
     pitch = st.text_area("Paste concise pitch / executive summary:")
     rounds = st.slider("Number of investor questions to simulate:", 3, 10, 5)
-    if st.button("Simulate Q&A"):
-        prompt = f"Pitch: {pitch}"
-        start = time.time()
-        resp = ask_gemini(prompt, task_type="investor_qa", context={"rounds": rounds})
-        display_response_and_analytics(prompt, resp, start, "Investor Q&A")
+    prompt = f"Pitch: {pitch}"
+    ai_tab("Investor Q&A", "investor_qa", prompt, {"pitch": pitch, "rounds": rounds},
+           context={"rounds": rounds}, clicked=st.button("Simulate Q&A"))
 
 with tab8:
     st.header("Branding Kit")
     desc = st.text_input("Describe your product in one line:")
     locale = st.selectbox("Preferred language / locale (for tone)", ["Global English", "India English", "US English"])
-    if st.button("Generate Branding Kit"):
-        prompt = f"Product: {desc}, Locale: {locale}"
+    prompt = f"Product: {desc}, Locale: {locale}"
+    ai_tab("Branding Kit", "branding_kit", prompt, {"desc": desc, "locale": locale},
+           context={"locale": locale}, clicked=st.button("Generate Branding Kit"))
+
+with tab9:
+    st.header("Full Startup Analysis")
+    st.markdown("Runs all eight reports concurrently; total time is close to the slowest single report.")
+    fa_name = st.text_input("Startup name:", key="fa_name")
+    fa_summary = st.text_area("Describe the startup, product and target market:", key="fa_summary")
+    fa_concurrency = st.slider("Parallel requests:", 1, 8, 4, key="fa_concurrency")
+    fa_inputs = {"name": fa_name, "summary": fa_summary}
+    fa_clicked = st.button("Run full analysis")
+    fa_saved = session_results.touch(result_key("Full Analysis", fa_inputs)) if fa_clicked else None
+    if fa_clicked and fa_saved is None:
+        jobs = [
+            ("startup_idea", f"Keywords: {fa_summary}, Tone: Professional", {"tone": "Professional"}, "Idea Generator"),
+            ("market_research", f"Topic: {fa_summary}, Timeframe: ", {"timeframe": ""}, "Market Research"),
+            ("business_model", f"Startup: {fa_name}, Description: {fa_summary}", {"startup_name": fa_name}, "Business Model Canvas"),
+            ("pitch_refinement", f"Pitch: {fa_summary}", {}, "Pitch Refinement"),
+            ("financial_forecast", "Revenue projection analysis", {"initial": 1000.0, "growth": 10.0, "months": 12}, "Financial Forecast"),
+            ("swot_analysis", f"Startup summary: {fa_summary}", {}, "SWOT & Risks"),
+            ("investor_qa", f"Pitch: {fa_summary}", {"rounds": 5}, "Investor Q&A"),
+            ("branding_kit", f"Product: {fa_summary}, Locale: Global English", {"locale": "Global English"}, "Branding Kit"),
+        ]
+        start = time.time()
+        with st.spinner("Running eight analyses in parallel..."):
+            results = ai_client().ask_gemini_batch([job[:3] for job in jobs], max_concurrency=fa_concurrency,
+                                       session_id=SESSION_ID)
+        wall = time.time() - start
+        serial = sum(r["latency_s"] for r in results)
+        st.caption(f"Finished in {wall:.2f}s (sum of individual calls: {serial:.2f}s)")
+        for (_, prompt, _, module_name), result in zip(jobs, results):
+            with st.expander(f"{module_name} · {result['latency_s']:.2f}s", expanded=False):
+                st.markdown(result["response"])
+            log_usage(module_name, prompt, result["response"], result["latency_s"],
+                      model=result["model"], error=result["error"], attempts=result["attempts"],
+                      prompt_tokens=result["prompt_tokens"])
+        if not any(result["error"] for result in results):
+            reports = [{"module": job[3], "response": result["response"], "latency_s": result["latency_s"]}
+                       for job, result in zip(jobs, results)]
+            session_results.put("Full Analysis", fa_inputs, fa_summary, reports, latency_s=wall)
+    elif fa_saved is not None:
+        display_saved_result(fa_saved, "same inputs as an earlier run, not regenerated")
+    elif session_results.latest("Full Analysis") is not None:
+        display_saved_result(session_results.latest("Full Analysis"))
+
+with tab10:
+    st.header("Performance")
+    windows = {"Last 24 hours": 24, "Last 7 days": 24 * 7, "Last 30 days": 24 * 30, "All time": None}
+    perf_window = st.selectbox("Window", list(windows), index=1)
+    perf_freq = st.selectbox("Time bucket", ["15min", "1h", "6h", "1D"], index=1)
+    # aggregates are kept up to date incrementally as the log grows; nothing here re-reads it
+    usage_writer.flush(timeout=0.5)
+    perf_metrics = get_usage_metrics(USAGE_LOG)
+    perf_metrics.refresh()
+    perf_hours = windows[perf_window]
+    report = perf_metrics.report(datetime.now() - timedelta(hours=perf_hours) if perf_hours else None, perf_freq)
+    if not report["calls"]:
+        st.write("No AI calls recorded in this window.")
+    else:
+        overall = report["overall"]
+        c1, c2, c3, c4, c5 = st.columns(5)
+        c1.metric("Calls", report["calls"])
+        c2.metric("p50 latency", f"{overall['p50_s']:.2f}s")
+        c3.metric("p90 latency", f"{overall['p90_s']:.2f}s")
+        c4.metric("p99 latency", f"{overall['p99_s']:.2f}s")
+        c5.metric("Error rate", f"{report['error_rate']:.1%}")
+        st.subheader("Latency over time")
+        st.line_chart(report["timeseries"], x="time")
+        st.subheader(f"Throughput per {perf_freq}")
+        st.bar_chart(report["throughput"], x="time")
+        st.subheader("By module")
+        st.dataframe(report["by_module"], hide_index=True)
+        st.subheader("By model")
+        st.dataframe(report["by_model"], hide_index=True)
+        st.subheader("Response size (words)")
+        st.bar_chart(report["sizes"], x="words")
+    # only once a request has built the client; reading stats must not build it at app start
+    perf_client = existing_client()
+    limiter_stats = perf_client.get_usage_stats()["rate_limiter"] if perf_client is not None else None
+    if limiter_stats:
+        st.subheader("Quota queue (this process)")
+        st.dataframe(limiter_stats, hide_index=True)
+
+# Everything generated in this session, newest first
+with st.expander(f"Session history ({len(session_results)})"):
+    history = session_results.history()
+    if history:
+        choice = st.selectbox(
+            "Result", range(len(history)), key="history_choice",
+            format_func=lambda i: f"{time.strftime('%H:%M:%S', time.localtime(history[i]['created']))} · "
+                                 f"{history[i]['tab']} · {history[i]['prompt'][:60]}",
+        )
+        display_saved_result(history[choice], "from session history")
+    else:
+        st.write("Nothing generated in this session yet.")
+
+# Every response generated here (any session), searchable by keyword so earlier work can be reused
+SEARCHABLE_MODULES = ["Idea Generator", "Market Research", "Business Model Canvas", "Pitch Refinement",
+                      "Financial Forecast", "SWOT & Risks", "Investor Q&A", "Branding Kit"]
+with st.expander("Search past outputs"):
+    sc1, sc2 = st.columns([3, 2])
+    search_query = sc1.text_input("Keywords", key="search_query", placeholder="e.g. logistics southeast asia")
+    search_modules = sc2.multiselect("Modules", SEARCHABLE_MODULES, key="search_modules")
+    index = response_index() if search_query.strip() else None
+    if index is not None:
         start = time.time()
-        resp = ask_gemini(prompt, task_type="branding_kit", context={"locale": locale})
-        display_response_and_analytics(prompt, resp, start, "Branding Kit")
+        hits = index.search(search_query, modules=search_modules or None)
+        st.caption(f"{len(hits)} match(es) in {(time.time() - start) * 1000:.1f} ms "
+                   f"across {len(index)} stored responses")
+        if hits:
+            choice = st.selectbox(
+                "Match", range(len(hits)), key="search_choice",
+                format_func=lambda i: f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(hits[i]['last_seen']))} · "
+                                     f"{hits[i]['module']} · {hits[i]['prompt'][:60]}",
+            )
+            st.markdown(response_header_html(f"Stored response · generated {hits[choice]['seen']}x"),
+                        unsafe_allow_html=True)
+            st.markdown(hits[choice]["response"])
 
 # Footer: show usage log quick summary
 st.markdown("---")
 st.subheader("Usage Metrics")
-if os.path.exists(USAGE_LOG):
-    logs = pd.read_csv(USAGE_LOG)
-    total = len(logs)
-    avg_latency = logs["latency_s"].mean()
-    st.write(f"Total AI calls recorded: {total}")
-    st.write(f"Average latency (s): {avg_latency:.2f}")
-    st.dataframe(logs.tail(10))
+usage_writer.flush(timeout=0.5)  # include calls made during this run
+usage_metrics = get_usage_metrics(USAGE_LOG)
+usage_metrics.refresh()
+summary = usage_metrics.summary()
+if summary["calls"]:
+    st.write(f"Total AI calls recorded: {summary['calls']}")
+    st.write(f"Average latency (s): {summary['mean_latency_s']:.2f} · p90: {summary['p90_latency_s']:.2f}")
+    st.dataframe(usage_metrics.tail(10))
 else:
     st.write("No usage logs yet.")
@@ -0,0 +1,23 @@
+import time
+import statistics
+from typing import Callable, Dict, Any
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, number: int = 1, warmup: int = 1) -> Dict[str, float]:
+    """Time `fn`, `number` calls per sample over `repeat` samples; reports per-call seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "mean_s": statistics.mean(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "samples": repeat,
+        "calls_per_sample": number,
+    }
@@ -0,0 +1,26 @@
+"""Revenue forecast generation: long single horizons, vectorized scenario sweeps and Monte Carlo bands."""
+import numpy as np
+
+from benchmarks._harness import measure
+from utils.financials import simple_forecast, forecast_scenarios, scenario_grid, monte_carlo_forecast
+
+
+def run(quick: bool = False):
+    horizons = [12, 120, 1200] if quick else [12, 120, 1200, 12000]
+    sweeps = [(10, 36), (100, 36)] if quick else [(10, 36), (100, 36), (100, 120), (300, 36)]
+    results = {"simple_forecast": {str(months): measure(lambda: simple_forecast(1000.0, 0.01, months), number=20)
+                                   for months in horizons}}
+    scenarios = {}
+    for steps, months in sweeps:
+        grid = scenario_grid(growth_rate=np.linspace(0.0, 0.2, steps), churn_rate=np.linspace(0.0, 0.1, steps))
+        timing = measure(lambda: forecast_scenarios(1000.0, cac=1.5, months=months, **grid), number=5)
+        timing["scenarios"] = steps * steps
+        scenarios[f"{steps * steps}x{months}"] = timing
+    results["forecast_scenarios"] = scenarios
+    paths = [10_000, 100_000] if quick else [10_000, 100_000, 1_000_000]
+    results["monte_carlo_36m"] = {
+        str(n): measure(lambda: monte_carlo_forecast(1000.0, 0.05, 0.05, 0.02, 0.01, months=36, paths=n),
+                        repeat=3)
+        for n in paths
+    }
+    return results
@@ -0,0 +1,76 @@
+"""
+Prompt size and build cost: raw conversation_history dicts vs. bounded, summarized session history.
+
+Run from the repository root:
+    python -m benchmarks.bench_history --turns 20 --response-words 1200
+
+Upstream latency scales with input tokens, so the token reduction reported here is
+the latency saving per request once history is in play.
+"""
+import argparse
+import json
+import random
+import time
+
+from utils.conversation import ConversationHistory
+from utils.tokens import estimate_tokens
+
+TASKS = ["startup_idea", "market_research", "business_model", "swot_analysis",
+         "pitch_refinement", "investor_qa", "branding_kit"]
+WORDS = ("market growth customer revenue platform logistics AI pricing channel segment risk "
+         "competitor strategy funding investor retention acquisition scalable margin").split()
+
+
+def _fake_response(rng: random.Random, words: int) -> str:
+    body = " ".join(rng.choice(WORDS) for _ in range(words))
+    return f"**📊 REPORT**\n\n**Summary:**\n{body}\n\n| A | B |\n|---|---|\n| x | y |"
+
+
+def run(turns: int = 20, response_words: int = 1200, seed: int = 7, quick: bool = False):
+    if quick:
+        turns = 8
+    rng = random.Random(seed)
+    legacy = []
+    bounded = ConversationHistory()
+    legacy_sizes, bounded_sizes = [], []
+    legacy_time = bounded_time = 0.0
+    for i in range(turns):
+        task = TASKS[i % len(TASKS)]
+        prompt = f"Topic: {' '.join(rng.choice(WORDS) for _ in range(6))}"
+
+        start = time.perf_counter()
+        legacy_prefix = f"Previous context: {legacy[-3:]}\n\n" if legacy else ""
+        legacy_time += time.perf_counter() - start
+        start = time.perf_counter()
+        bounded_prefix = bounded.context_block()
+        bounded_time += time.perf_counter() - start
+
+        legacy_sizes.append(estimate_tokens(legacy_prefix))
+        bounded_sizes.append(estimate_tokens(bounded_prefix))
+
+        response = _fake_response(rng, response_words)
+        legacy.append({"task_type": task, "prompt": prompt, "response": response, "timestamp": time.time()})
+        bounded.add(task, prompt, response)
+
+    steady = slice(3, None)  # after the legacy window has filled
+    legacy_steady = sum(legacy_sizes[steady]) / max(len(legacy_sizes[steady]), 1)
+    bounded_steady = sum(bounded_sizes[steady]) / max(len(bounded_sizes[steady]), 1)
+    return {
+        "turns": turns,
+        "response_words": response_words,
+        "legacy_context_tokens_per_request": round(legacy_steady, 1),
+        "bounded_context_tokens_per_request": round(bounded_steady, 1),
+        "token_reduction_pct": round(100 * (1 - bounded_steady / max(legacy_steady, 1)), 1),
+        "legacy_build_us_per_request": round(legacy_time / turns * 1e6, 2),
+        "bounded_build_us_per_request": round(bounded_time / turns * 1e6, 2),
+        "legacy_history_entries_retained": len(legacy),
+        "bounded_history_entries_retained": len(bounded),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--response-words", type=int, default=1200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.turns, args.response_words), indent=2))
@@ -0,0 +1,32 @@
+"""Response index: storing responses, keyword search latency, reopening and compaction."""
+import os
+import random
+import tempfile
+
+from benchmarks._harness import measure
+from benchmarks.bench_text import _document
+from utils.response_index import ResponseIndex
+
+MODULES = ["Idea Generator", "Market Research", "SWOT & Risks"]
+QUERIES = ["pricing", "market growth", "logistics platform retention", "doc77"]
+
+
+def run(quick: bool = False):
+    docs = 2_000 if quick else 10_000
+    rng = random.Random(5)
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "responses.sqlite")
+        index = ResponseIndex(path)
+        texts = [_document(2000, seed=i) + f" doc{i}" for i in range(docs)]
+        timing = measure(lambda: [index.add(rng.choice(MODULES), "prompt", text) for text in texts],
+                         repeat=1, warmup=0)
+        timing["adds_per_s"] = docs / timing["mean_s"]
+        results[f"add_{docs}"] = timing
+        for query in QUERIES:
+            results[f"search_{query.replace(' ', '_')}"] = measure(lambda: index.search(query, limit=20), repeat=20)
+        results["search_by_module"] = measure(lambda: index.search("pricing", modules=["SWOT & Risks"]), repeat=20)
+        results["reopen"] = measure(lambda: ResponseIndex(path), repeat=3)
+        results["compact"] = measure(lambda: index.compact(min_segments=1), repeat=1, warmup=0)
+        results["stats"] = index.stats()
+    return results
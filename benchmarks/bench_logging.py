@@ -0,0 +1,56 @@
+"""Usage-log write throughput and footer metrics cost as the log grows."""
+import os
+import tempfile
+import time
+
+from benchmarks._harness import measure
+from utils.usage_log import UsageLogWriter, CsvSink, make_record
+from utils.usage_metrics import UsageMetrics
+
+PROMPT = "Topic: AI logistics in Southeast Asia, Timeframe: 2020-2025, with \"quotes\", commas\nand newlines"
+
+
+def _records(n: int):
+    return [make_record("Market Research", PROMPT, "word " * 900, 7.5, 1.2, "gemini-2.0-flash") for _ in range(n)]
+
+
+def _write_log(path: str, rows: int) -> None:
+    sink = CsvSink(path)
+    records = _records(1000)
+    for start in range(0, rows, 1000):
+        sink.write(records[:min(1000, rows - start)])
+
+
+def run(quick: bool = False):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # enqueue cost on the request path, then end-to-end throughput to disk
+        count = 2000 if quick else 20000
+        writer = UsageLogWriter(os.path.join(tmp, "throughput.csv"))
+        records = _records(count)
+        start = time.perf_counter()
+        for record in records:
+            writer.write(record)
+        enqueue_s = time.perf_counter() - start
+        writer.flush(timeout=120)
+        total_s = time.perf_counter() - start
+        writer.close()
+        results["log_usage"] = {
+            "records": count,
+            "enqueue_us_per_record": enqueue_s / count * 1e6,
+            "records_per_s_to_disk": count / total_s,
+            "dropped": writer.dropped,
+        }
+
+        sizes = [1000, 10000] if quick else [1000, 10000, 100000]
+        footer = {}
+        for rows in sizes:
+            path = os.path.join(tmp, f"log_{rows}.csv")
+            _write_log(path, rows)
+            cold = measure(lambda: UsageMetrics(path).refresh(), repeat=3, warmup=0)
+            metrics = UsageMetrics(path)
+            metrics.refresh()
+            warm = measure(lambda: (metrics.refresh(), metrics.summary(), metrics.tail(10)), number=100)
+            footer[str(rows)] = {"cold_refresh": cold, "warm_render": warm}
+        results["footer_metrics"] = footer
+    return results
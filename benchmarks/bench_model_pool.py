@@ -0,0 +1,63 @@
+"""
+Per-request model setup overhead: a fresh GenerativeModel per call vs. the shared ModelPool.
+
+Run from the repository root:
+    python -m benchmarks.bench_model_pool --requests 2000 --threads 8
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import google.generativeai as genai
+except ImportError:  # the SDK is optional; everything else runs against the fake backend
+    genai = None
+
+from utils.backends import ModelPool
+from utils.gemini_client import MODELS
+
+
+def _timed(fn, n: int, threads: int):
+    names = list(MODELS)
+    samples = []
+
+    def one(i: int):
+        start = time.perf_counter()
+        fn(names[i % len(names)])
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(n)))
+    wall = time.perf_counter() - start
+    samples.sort()
+    return {
+        "requests": n,
+        "wall_s": round(wall, 4),
+        "mean_us": round(statistics.mean(samples) * 1e6, 2),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+        "p99_us": round(samples[int(len(samples) * 0.99) - 1] * 1e6, 2),
+    }
+
+
+def run(requests: int = 2000, threads: int = 8, quick: bool = False):
+    if genai is None:
+        return {"skipped": "missing dependency: google.generativeai"}
+    if quick:
+        requests = 200
+    pool = ModelPool(lambda name, config: genai.GenerativeModel(name))
+    return {
+        "per_request_construction": _timed(lambda name: genai.GenerativeModel(name), requests, threads),
+        "model_pool": _timed(lambda name: pool.get(name), requests, threads),
+        "models_created_by_pool": pool.created,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.threads), indent=2))
@@ -0,0 +1,55 @@
+"""
+Client-side cost of the request pipeline against a zero-latency fake backend.
+
+Everything measured here is overhead we add around the model call: prompt building,
+history, cache key hashing, tracing, retries/rate limiting bookkeeping and formatting.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._harness import measure
+from utils.backends import FakeBackend
+from utils.gemini_client import SmartGeminiClient
+from utils.rate_limiter import RateLimiter
+from utils.resilience import RetryPolicy
+from utils.response_cache import ResponseCache, MemoryCache
+from utils.singleflight import SingleFlight
+
+TASK_TYPES = ["startup_idea", "market_research", "business_model", "financial_forecast",
+              "swot_analysis", "pitch_refinement", "investor_qa", "branding_kit"]
+CONTEXT = {"initial": 1000.0, "growth": 10.0, "months": 12, "rounds": 5, "tone": "Professional"}
+
+
+def _client() -> SmartGeminiClient:
+    backend = FakeBackend(latency_median_s=0.0, latency_sigma=0.0, sleep=lambda s: None)
+    return SmartGeminiClient(backend=backend, retry_policy=RetryPolicy(), rate_limiter=RateLimiter())
+
+
+def run(quick: bool = False):
+    number = 50 if quick else 500
+    client = _client()
+    raw = FakeBackend().response_text("gemini-2.0-flash", "benchmark")
+    results = {}
+    for task_type in TASK_TYPES:
+        prompt = f"Topic: AI logistics in Southeast Asia ({task_type})"
+        results[task_type] = {
+            "ask_gemini": measure(lambda: client.ask_gemini(prompt, task_type, CONTEXT, use_cache=False,
+                                                            session_id="bench"), number=number),
+            "create_smart_prompt": measure(lambda: client._create_smart_prompt(task_type, prompt, CONTEXT),
+                                           number=number * 4),
+            "format_response": measure(lambda: client._format_response(task_type, raw, CONTEXT), number=number * 4),
+        }
+    results["thundering_herd"] = {mode: _herd(coalesce) for mode, coalesce in (("off", False), ("single_flight", True))}
+    return results
+
+
+def _herd(coalesce: bool, users: int = 32, latency_s: float = 0.2):
+    """`users` identical requests at once, as on a demo day: upstream calls made and wall time."""
+    backend = FakeBackend(latency_median_s=latency_s, latency_sigma=0.0)
+    client = SmartGeminiClient(cache=ResponseCache(MemoryCache()), backend=backend, retry_policy=RetryPolicy(),
+                               single_flight=SingleFlight() if coalesce else None)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(lambda _: client.ask_gemini("Topic: AI tutoring", "market_research", {"timeframe": ""}),
+                      range(users)))
+    return {"users": users, "upstream_calls": backend.calls, "wall_s": round(time.perf_counter() - start, 4)}
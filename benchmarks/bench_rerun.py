@@ -0,0 +1,82 @@
+"""
+Per-rerun cost of the Streamlit script: bytes of static markup sent and server render time.
+
+Run from the repository root:
+    python -m benchmarks.bench_rerun --reruns 20
+
+Static asset sizes are always reported; the script render timings need streamlit
+(they drive app.py through streamlit.testing's AppTest against the fake backend).
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from utils.ui_assets import STATIC_DIR, style_tag, response_header_html
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def asset_sizes():
+    with open(os.path.join(STATIC_DIR, "theme.css"), encoding="utf-8") as f:
+        source = f.read()
+    return {
+        "theme_css_source_bytes": len(source.encode("utf-8")),
+        "theme_style_tag_bytes": len(style_tag("theme.css").encode("utf-8")),
+        "response_header_bytes": len(response_header_html("Generated in 12.34s · first token 1.23s").encode("utf-8")),
+    }
+
+
+def _markdown_bytes(at) -> int:
+    return sum(len(element.value.encode("utf-8")) for element in at.markdown)
+
+
+def render_timings(reruns: int = 20):
+    from streamlit.testing.v1 import AppTest
+
+    os.environ.setdefault("GEMINI_BACKEND", "fake")
+    os.environ.setdefault("FAKE_BACKEND_LATENCY_S", "0")
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        at = AppTest.from_file("app.py", default_timeout=60)
+        start = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - start
+        samples = []
+        for _ in range(reruns):
+            start = time.perf_counter()
+            at.run()
+            samples.append(time.perf_counter() - start)
+        idle_bytes = _markdown_bytes(at)
+        start = time.perf_counter()
+        at.button[0].click().run()  # Idea Generator: one streamed response
+        response_run = time.perf_counter() - start
+        response_bytes = _markdown_bytes(at) - idle_bytes
+    finally:
+        os.chdir(cwd)
+    return {
+        "first_run_ms": round(first * 1000, 2),
+        "rerun_mean_ms": round(statistics.mean(samples) * 1000, 2),
+        "rerun_p50_ms": round(statistics.median(samples) * 1000, 2),
+        "rerun_markdown_bytes": idle_bytes,
+        "response_run_ms": round(response_run * 1000, 2),
+        "response_extra_markdown_bytes": response_bytes,
+    }
+
+
+def run(reruns: int = 20, quick: bool = False):
+    results = asset_sizes()
+    try:
+        results["render"] = render_timings(5 if quick else reruns)
+    except ImportError as e:
+        results["render"] = {"skipped": f"missing dependency: {e.name or e}"}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.reruns), indent=2))
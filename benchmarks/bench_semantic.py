@@ -0,0 +1,62 @@
+"""Semantic cache lookup latency, and hash-collision false hits, as the number of stored prompts grows."""
+import math
+import random
+from collections import Counter
+
+from benchmarks._harness import measure
+from utils.semantic_cache import SemanticCache, _features
+
+VOCABULARY = [f"term{i}" for i in range(5000)]
+
+
+def _prompt(rng: random.Random, words: int = 6) -> str:
+    return "Topic: " + " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def _false_hit_pct(size: int, rng: random.Random, queries: int = 1000, floor: float = 0.8) -> float:
+    """
+    Share of near-miss lookups (20-word prompt, 4 words replaced) that hit a prompt whose
+    exact, unhashed TF-IDF cosine is below `floor`: hits only hash collisions can explain.
+    """
+    cache = SemanticCache(max_entries=size)
+    stored, df = [], Counter()
+    for i in range(size):
+        words = [rng.choice(VOCABULARY) for _ in range(20)]
+        stored.append(words)
+        df.update(_features(" ".join(words)))
+        cache.add("market_research", {}, "medium", "Topic: " + " ".join(words), f"response {i}")
+
+    def weights(text):
+        return {t: (1 + math.log(n)) * (math.log((1 + size) / (1 + df[t])) + 1) for t, n in _features(text).items()}
+
+    def cosine(a, b):
+        a, b = weights(a), weights(b)
+        dot = sum(w * b.get(t, 0.0) for t, w in a.items())
+        return dot / math.sqrt(sum(w * w for w in a.values()) * sum(w * w for w in b.values()))
+
+    false_hits = 0
+    for _ in range(queries):
+        words = list(rng.choice(stored))
+        for j in range(4):
+            words[j] = rng.choice(VOCABULARY)
+        prompt = "Topic: " + " ".join(words)
+        hit = cache.lookup("market_research", {}, "medium", prompt)
+        if hit is not None and cosine(prompt, hit["prompt"]) < floor:
+            false_hits += 1
+    return false_hits / queries * 100
+
+
+def run(quick: bool = False):
+    sizes = [1_000, 10_000] if quick else [1_000, 10_000, 100_000]
+    rng = random.Random(11)
+    results = {}
+    for size in sizes:
+        cache = SemanticCache(max_entries=size)
+        for i in range(size):
+            cache.add("market_research", {}, "medium", _prompt(rng), f"response {i}")
+        queries = [_prompt(rng) for _ in range(100)]
+        timing = measure(lambda: [cache.lookup("market_research", {}, "medium", q) for q in queries], repeat=5)
+        timing["lookup_ms"] = timing["mean_s"] / len(queries) * 1e3
+        timing["near_miss_false_hit_pct"] = _false_hit_pct(size, rng)
+        results[f"{size}_entries"] = timing
+    return results
@@ -0,0 +1,74 @@
+"""
+Cold-start cost: import time of the app's modules and first-use client construction.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --top 15
+
+Each target is imported in a fresh interpreter under `python -X importtime`, so the
+numbers are what a new server process (or autoscaled pod) pays before its first page.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ["utils.gemini_client", "utils.usage_log", "utils.usage_metrics", "utils.financials",
+           "utils.pitch_helper", "utils.usage_analytics"]
+# Client construction on first use, against the fake backend so no network is involved
+FIRST_USE = ("import time; t = time.perf_counter(); from utils.gemini_client import get_client; "
+             "get_client(); print(time.perf_counter() - t)")
+
+
+def _env():
+    env = dict(os.environ, GEMINI_BACKEND="fake", RESPONSE_CACHE="memory")
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (ROOT, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def parse_importtime(stderr: str):
+    """`-X importtime` lines -> list of (module, self_us, cumulative_us) in import order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile_import(module: str, top: int = 10):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=ROOT, env=_env())
+    if proc.returncode != 0:
+        return {"skipped": proc.stderr.strip().splitlines()[-1]}
+    rows = parse_importtime(proc.stderr)
+    total = next((c for name, _, c in rows if name == module), 0)
+    heaviest = sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+    return {
+        "import_ms": round(total / 1000, 2),
+        "modules_loaded": len(rows),
+        "heaviest_self_ms": {name: round(s / 1000, 2) for name, s, _ in heaviest},
+        "heavy_deps_loaded": sorted({name.split(".")[0] for name, _, _ in rows}
+                                    & {"pandas", "numpy", "pyarrow", "asyncio", "google", "streamlit"}),
+    }
+
+
+def run(top: int = 10, quick: bool = False):
+    results = {module: profile_import(module, top) for module in TARGETS}
+    proc = subprocess.run([sys.executable, "-c", FIRST_USE], capture_output=True, text=True, cwd=ROOT, env=_env())
+    if proc.returncode == 0:
+        results["first_get_client_ms"] = round(float(proc.stdout.strip()) * 1000, 2)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], env=_env())
+    results["bare_interpreter_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=10, help="heaviest modules listed per target")
+    args = parser.parse_args()
+    print(json.dumps(run(args.top), indent=2))
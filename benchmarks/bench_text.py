@@ -0,0 +1,43 @@
+"""text_metrics throughput on large documents, streamed chunks and batches of responses."""
+import random
+
+from benchmarks._harness import measure
+from utils.text_metrics import TextMetricsAccumulator, text_metrics, text_metrics_batch
+
+WORDS = ("Market growth, customer revenue; platform (logistics) AI pricing channel segment risk! "
+         "competitor strategy funding investor retention acquisition scalable margin the and of to").split()
+
+
+def _document(size_bytes: int, seed: int = 3) -> str:
+    rng = random.Random(seed)
+    parts, total = [], 0
+    while total < size_bytes:
+        word = rng.choice(WORDS)
+        parts.append(word)
+        total += len(word) + 1
+    return " ".join(parts)
+
+
+def _streamed(text: str, chunk_size: int = 4096):
+    accumulator = TextMetricsAccumulator()
+    for start in range(0, len(text), chunk_size):
+        accumulator.feed(text[start:start + chunk_size])
+    return accumulator.result()
+
+
+def run(quick: bool = False):
+    sizes = [100_000, 1_000_000] if quick else [100_000, 1_000_000, 5_000_000]
+    results = {}
+    for size in sizes:
+        text = _document(size)
+        for name, fn in (("", lambda: text_metrics(text)),
+                         ("_words_only", lambda: text_metrics(text, max_ngram=1)),
+                         ("_streamed_4KB", lambda: _streamed(text))):
+            timing = measure(fn, repeat=3)
+            timing["mb_per_s"] = size / 1e6 / timing["mean_s"]
+            results[f"{size // 1000}KB{name}"] = timing
+    documents = [_document(3000, seed=i) for i in range(200 if quick else 1000)]
+    timing = measure(lambda: text_metrics_batch(documents), repeat=3)
+    timing["docs_per_s"] = len(documents) / timing["mean_s"]
+    results[f"batch_{len(documents)}x3KB"] = timing
+    return results
@@ -0,0 +1,121 @@
+"""
+Run the benchmark suite and save the results as JSON for comparison between versions.
+
+Run from the repository root:
+    python -m benchmarks.run --label my-branch            # writes benchmarks/results/my-branch.json
+    python -m benchmarks.run --quick --only pipeline text
+    python -m benchmarks.run --compare benchmarks/results/main.json benchmarks/results/my-branch.json
+
+Everything runs against the fake model backend; no API key or network is needed.
+Benchmarks whose optional dependencies are missing are skipped and recorded as such.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import traceback
+from typing import Dict, Any, Iterator, Tuple
+
+SUITE = {
+    "pipeline": "benchmarks.bench_pipeline",
+    "logging": "benchmarks.bench_logging",
+    "text": "benchmarks.bench_text",
+    "index": "benchmarks.bench_index",
+    "forecast": "benchmarks.bench_forecast",
+    "history": "benchmarks.bench_history",
+    "model_pool": "benchmarks.bench_model_pool",
+    "semantic": "benchmarks.bench_semantic",
+    "startup": "benchmarks.bench_startup",
+    "rerun": "benchmarks.bench_rerun",
+}
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_suite(names, quick: bool = False) -> Dict[str, Any]:
+    os.environ.setdefault("GEMINI_BACKEND", "fake")
+    report: Dict[str, Any] = {
+        "meta": {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "quick": quick,
+        },
+        "results": {},
+    }
+    for name in names:
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(SUITE[name])
+            result = module.run(quick=quick)
+        except ImportError as e:
+            result = {"skipped": f"missing dependency: {e.name or e}"}
+        except Exception:
+            result = {"error": traceback.format_exc(limit=3)}
+        report["results"][name] = result
+        print(f"{name:<10} {time.perf_counter() - start:7.2f}s"
+              f"{'  (' + next(iter(result)) + ')' if set(result) & {'skipped', 'error'} else ''}", file=sys.stderr)
+    return report
+
+
+def _timings(node: Any, path: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "mean_s" and isinstance(value, (int, float)):
+                yield path, value
+            else:
+                yield from _timings(value, f"{path}.{key}" if path else key)
+
+
+def compare(old_path: str, new_path: str, threshold_pct: float = 10.0) -> int:
+    """Print per-benchmark mean changes; returns the number of regressions beyond `threshold_pct`."""
+    with open(old_path) as f:
+        old = dict(_timings(json.load(f)["results"]))
+    with open(new_path) as f:
+        new = dict(_timings(json.load(f)["results"]))
+    regressions = 0
+    width = max((len(k) for k in new), default=10)
+    for key in sorted(set(old) & set(new)):
+        before, after = old[key], new[key]
+        change = 100.0 * (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold_pct:
+            flag, regressions = "  REGRESSION", regressions + 1
+        elif change < -threshold_pct:
+            flag = "  faster"
+        print(f"{key:<{width}}  {before * 1e3:10.3f}ms -> {after * 1e3:10.3f}ms  {change:+7.1f}%{flag}")
+    for key in sorted(set(new) - set(old)):
+        print(f"{key:<{width}}  (new)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--label", default=None, help="results file name (default: git revision)")
+    parser.add_argument("--only", nargs="+", choices=list(SUITE), default=list(SUITE))
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, for a fast sanity run")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold_pct=args.threshold) else 0)
+
+    report = run_suite(args.only, quick=args.quick)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = os.path.join(RESULTS_DIR, f"{args.label or report['meta']['revision']}.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(out)
@@ -0,0 +1,17 @@
+import pytest
+
+from utils.backends import FakeBackend
+from utils.gemini_client import SmartGeminiClient
+from utils.resilience import RetryPolicy
+
+
+@pytest.fixture
+def make_client():
+    """SmartGeminiClient on a fixed-latency FakeBackend, with no limiter or caches unless given."""
+
+    def build(latency_s: float = 0.0, **kwargs) -> SmartGeminiClient:
+        backend = kwargs.pop("backend", None) or FakeBackend(latency_median_s=latency_s, latency_sigma=0.0)
+        kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=1, attempt_timeout_s=None))
+        return SmartGeminiClient(backend=backend, **kwargs)
+
+    return build
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from utils.financials import monte_carlo_forecast
+
+
+def _exact_percentiles(initial, growth_mean, growth_sd, churn_mean, churn_sd, months, paths, chunk_size, seed=0):
+    """The same paths monte_carlo_forecast samples, kept in memory for np.percentile."""
+    sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    log_ratios = []
+    for chunk_seed, size in zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes):
+        rng = np.random.default_rng(chunk_seed)
+        growth = rng.normal(growth_mean, growth_sd, (size, months - 1))
+        churn = np.maximum(rng.normal(churn_mean, churn_sd, (size, months - 1)), 0.0)
+        log_ratio = np.zeros((size, months))
+        np.cumsum(np.log(np.maximum(1.0 + growth - churn, 1e-9)), axis=1, out=log_ratio[:, 1:])
+        log_ratios.append(log_ratio)
+    log_ratio = np.concatenate(log_ratios)
+    return {f"p{q}": initial * np.exp(np.percentile(log_ratio, q, axis=0)) for q in (10, 50, 90)}
+
+
+@pytest.mark.parametrize("growth_sd, tolerance", [(0.05, 1e-3), (0.6, 0.05)])
+def test_percentiles_match_exact(growth_sd, tolerance):
+    args = (1000.0, 0.1, growth_sd, 0.02, 0.01, 36, 50_000)
+    forecast = monte_carlo_forecast(*args, chunk_size=10_000)
+    exact = _exact_percentiles(*args, chunk_size=10_000)
+    for column, values in exact.items():
+        # compared in log space: at high volatility the low percentiles are many orders of magnitude small
+        assert np.max(np.abs(np.log(forecast[column]) - np.log(values))) < tolerance, column
@@ -0,0 +1,19 @@
+import time
+
+
+def test_batch_returns_at_deadline_not_after_slowest_call(make_client):
+    client = make_client(latency_s=3.0)
+    jobs = [("startup_idea", f"idea {i}") for i in range(3)]
+    start = time.perf_counter()
+    results = client.ask_gemini_batch(jobs, max_concurrency=3, timeout_s=0.5, use_cache=False)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.5
+    assert all(r["error"] == "no response within 0.5s" for r in results)
+
+
+def test_batch_results_in_job_order(make_client):
+    client = make_client()
+    jobs = [("startup_idea", "fintech"), ("market_research", "logistics")]
+    results = client.ask_gemini_batch(jobs, max_concurrency=2)
+    assert [r["prompt"] for r in results] == ["fintech", "logistics"]
+    assert all(r["error"] is None and r["response"] for r in results)
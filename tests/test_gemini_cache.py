@@ -0,0 +1,23 @@
+from utils.response_cache import ResponseCache
+
+
+def test_same_session_repeat_hits_cache(make_client):
+    client = make_client(cache=ResponseCache())
+    first = client.ask_gemini("fintech for farmers", "startup_idea", session_id="s1")
+    second = client.ask_gemini("fintech for farmers", "startup_idea", session_id="s1")
+    assert second == first
+    assert client.backend.calls == 1
+    assert client.cache.stats["hits"] == 1
+
+
+def test_batch_jobs_share_one_history_snapshot(make_client):
+    client = make_client(cache=ResponseCache())
+    client.ask_gemini("logistics in Kenya", "market_research", session_id="s1")
+    history = client.histories.get("s1").context_block()
+    prompts = []
+    generate = client._generate
+    client._generate = lambda model, smart_prompt, **kw: prompts.append(smart_prompt) or generate(
+        model, smart_prompt, **kw)
+    client.ask_gemini_batch([("startup_idea", "fintech"), ("swot_analysis", "fintech")], session_id="s1")
+    assert len(prompts) == 2
+    assert all(p.startswith(history) for p in prompts)
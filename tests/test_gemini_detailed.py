@@ -0,0 +1,19 @@
+from utils.backends import FakeBackend
+
+
+def test_detailed_returns_text_and_metadata(make_client):
+    client = make_client()
+    result = client.ask_gemini_detailed("Revenue projection analysis", "financial_forecast",
+                                        {"initial": 1000, "months": 12}, use_cache=False)
+    assert result["error"] is None
+    assert result["response"] and result["model"]
+    assert result["prompt_tokens"] > 0 and result["latency_s"] >= 0.0
+
+
+def test_detailed_reports_errors_without_raising(make_client):
+    client = make_client(backend=FakeBackend(latency_median_s=0.0, latency_sigma=0.0, error_rate=1.0))
+    result = client.ask_gemini_detailed("fintech", "startup_idea", use_cache=False)
+    assert result["error"]
+    assert result["model"] is None
+    assert result["response"] == client._error_message(RuntimeError(result["error"]))
+    assert result["attempts"]
@@ -0,0 +1,15 @@
+from utils.rate_limiter import RateLimiter
+
+
+def test_reconcile_credits_only_the_charged_amount_for_oversize_reservations():
+    limiter = RateLimiter({"m": (60, 1000)}, clock=lambda: 0.0)  # frozen clock: no refill
+    limiter.acquire("m", tokens=1500)  # charged a full bucket, 1000
+    limiter.reconcile("m", reserved=1500, used=500)
+    assert limiter._bucket_pair("m")[1].level == 500
+
+
+def test_reconcile_charges_extra_usage():
+    limiter = RateLimiter({"m": (60, 1000)}, clock=lambda: 0.0)
+    limiter.acquire("m", tokens=300)
+    limiter.reconcile("m", reserved=300, used=400)
+    assert limiter._bucket_pair("m")[1].level == 600
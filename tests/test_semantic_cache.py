@@ -0,0 +1,32 @@
+import random
+
+from utils.semantic_cache import SemanticCache
+
+
+def _fill(cache, count, seed=3):
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(400)]
+    for i in range(count):
+        prompt = "Topic: " + " ".join(rng.choice(vocabulary) for _ in range(8))
+        cache.add("market_research", {}, "medium", prompt, f"response {i}")
+
+
+def test_exact_repeat_scores_one_after_frequencies_change():
+    cache = SemanticCache()
+    prompt = "Topic: cold chain logistics for vaccine distribution"
+    cache.add("market_research", {}, "medium", prompt, "stored")
+    _fill(cache, 2000)  # shifts every IDF after the prompt was stored
+
+    hit = cache.lookup("market_research", {}, "medium", prompt)
+
+    assert hit["value"] == "stored"
+    assert hit["similarity"] == 1.0
+
+
+def test_abbreviations_do_not_match():
+    cache = SemanticCache()
+    cache.add("market_research", {}, "medium",
+              "Industry: artificial intelligence for logistics, Region: Southeast Asia", "stored")
+    _fill(cache, 200)
+
+    assert cache.lookup("market_research", {}, "medium", "Industry: logistics AI, Region: SE Asia") is None
@@ -0,0 +1,23 @@
+import time
+
+from utils.rate_limiter import RateLimiter
+from utils.resilience import RetryPolicy
+from utils.tracing import Tracer
+
+
+def test_hedged_attempts_trace_under_the_request(make_client):
+    tracer = Tracer()
+    spans = []
+    tracer.add_hook(spans.append)
+    client = make_client(latency_s=0.2, tracer=tracer, rate_limiter=RateLimiter(),
+                         retry_policy=RetryPolicy(max_attempts=2, attempt_timeout_s=5.0, hedge_after_s=0.02))
+    client.ask_gemini("fintech", "startup_idea", use_cache=False)
+    time.sleep(0.3)  # let the losing attempt finish and end its spans
+
+    roots = [s for s in spans if s.parent_id is None]
+    assert [s.name for s in roots] == ["gemini.request"]
+    assert {s.trace_id for s in spans} == {roots[0].trace_id}
+    network = next(s for s in spans if s.name == "network")
+    attempt_spans = [s for s in spans if s.name in ("rate_limit.wait", "model.get")]
+    assert len(attempt_spans) == 4  # primary and hedge each wait for quota and get a model
+    assert all(s.parent_id == network.span_id for s in attempt_spans)
@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta
+
+from utils.usage_metrics import UsageTimeline
+
+
+def _record(ts, module="Idea Generator", model="gemini-2.0-flash", status="ok", latency=1.0, words=100):
+    return {"timestamp": ts.isoformat(), "module": module, "model": model, "status": status,
+            "latency_s": latency, "response_word_count": words, "prompt_tokens": 200}
+
+
+def test_report_covers_only_the_window():
+    now = datetime(2026, 1, 10, 12, 0)
+    timeline = UsageTimeline()
+    timeline.add(_record(now - timedelta(days=3)))
+    timeline.add(_record(now - timedelta(hours=2), module="SWOT & Risks", status="error", latency=3.0))
+    timeline.add(_record(now - timedelta(hours=1)))
+    report = timeline.report(since=now - timedelta(hours=24), freq="1h")
+    assert report["calls"] == 2
+    assert report["error_rate"] == 0.5
+    assert {row["module"]: row["calls"] for row in report["by_module"]} == {"SWOT & Risks": 1, "Idea Generator": 1}
+    assert report["throughput"]["ok"] == [0, 1] and report["throughput"]["error"] == [1, 0]
+    assert sum(report["sizes"]["calls"]) == 2
+    assert timeline.report()["calls"] == 3
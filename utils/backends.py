@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Any, Callable, Iterator
+
+
+class ModelPool:
+    """Lazily built, thread-safe cache of model handles keyed by model name and generation config."""
+
+    def __init__(self, factory: Callable[[str, Optional[Dict[str, Any]]], Any]):
+        self.factory = factory
+        self._models: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+
+    @staticmethod
+    def _key(model_name: str, generation_config: Optional[Dict[str, Any]]) -> tuple:
+        return model_name, json.dumps(generation_config or {}, sort_keys=True, default=str)
+
+    def get(self, model_name: str, generation_config: Optional[Dict[str, Any]] = None):
+        key = self._key(model_name, generation_config)
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = self._models[key] = self.factory(model_name, generation_config)
+                    self.created += 1
+        return model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+class ModelBackend:
+    """
+    Source of model handles for SmartGeminiClient.
+
+    `get_model` returns an object exposing the google.generativeai call surface:
+    `generate_content(prompt, stream=False, request_options=None)` returning a response
+    with `.text`, or with stream=True an iterable of chunks with `.text`.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.pool = ModelPool(self._create_model)
+
+    def _create_model(self, model_name: str, generation_config: Optional[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def get_model(self, model_name: str, generation_config: Optional[Dict[str, Any]] = None):
+        return self.pool.get(model_name, generation_config)
+
+
+class GeminiBackend(ModelBackend):
+    """The live Gemini API via google.generativeai, imported and configured on first use."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None):
+        super().__init__()
+        self.api_key = api_key
+        self._genai = None
+        self._lock = threading.Lock()
+
+    def _sdk(self):
+        if self._genai is None:
+            with self._lock:
+                if self._genai is None:
+                    import google.generativeai as genai
+                    if self.api_key:
+                        genai.configure(api_key=self.api_key)
+                    self._genai = genai
+        return self._genai
+
+    def _create_model(self, model_name: str, generation_config: Optional[Dict[str, Any]]):
+        genai = self._sdk()
+        if generation_config:
+            return genai.GenerativeModel(model_name, generation_config=generation_config)
+        return genai.GenerativeModel(model_name)
+
+
+# Named like their google.api_core counterparts so utils.resilience classifies them the same way
+class ResourceExhausted(Exception):
+    code = 429
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+class DeadlineExceeded(Exception):
+    code = 504
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    """Deterministic stand-in for a GenerativeModel; see FakeBackend."""
+
+    def __init__(self, backend: "FakeBackend", model_name: str):
+        self.backend = backend
+        self.model_name = model_name
+
+    def generate_content(self, prompt: str, stream: bool = False, request_options: Optional[Dict[str, Any]] = None,
+                         **kwargs):
+        timeout = (request_options or {}).get("timeout")
+        latency, error = self.backend._plan(self.model_name, prompt)
+        text = self.backend.response_text(self.model_name, prompt)
+        if stream:
+            return self._stream(text, latency, error, timeout)
+        self.backend._sleep(min(latency, timeout) if timeout else latency)
+        if timeout and latency > timeout:
+            raise DeadlineExceeded(f"fake {self.model_name} exceeded {timeout:g}s deadline")
+        if error is not None:
+            raise error
+        return FakeResponse(text)
+
+    def _stream(self, text: str, latency: float, error: Optional[Exception], timeout: Optional[float]) -> Iterator[FakeResponse]:
+        backend = self.backend
+        first = latency * backend.ttft_fraction
+        if timeout and first > timeout:
+            backend._sleep(timeout)
+            raise DeadlineExceeded(f"fake {self.model_name} exceeded {timeout:g}s deadline")
+        backend._sleep(first)
+        if error is not None:
+            raise error
+        words = text.split(" ")
+        size = max(1, len(words) // backend.stream_chunks)
+        pieces = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+        gap = (latency - first) / max(len(pieces) - 1, 1)
+        for i, piece in enumerate(pieces):
+            if i:
+                backend._sleep(gap)
+            yield FakeResponse(piece)
+
+
+class FakeBackend(ModelBackend):
+    """
+    Local, deterministic model backend for benchmarks and load tests.
+
+    Latency per call is drawn from a lognormal around `latency_median_s` (or set
+    `latency_sigma=0` for a fixed value); streaming delivers `stream_chunks` chunks with
+    the first after `ttft_fraction` of the latency. `error_rate` injects
+    ServiceUnavailable failures and `rpm_limit` raises ResourceExhausted once a model
+    sees more requests in a rolling minute. Responses are derived from a hash of the
+    prompt, so identical prompts always get identical text. All randomness comes from
+    one seeded generator.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_median_s: float = 0.05, latency_sigma: float = 0.5, ttft_fraction: float = 0.15,
+                 stream_chunks: int = 20, error_rate: float = 0.0, rpm_limit: Optional[int] = None,
+                 response_words: int = 400, seed: int = 0, sleep: Callable[[float], None] = time.sleep):
+        super().__init__()
+        self.latency_median_s = latency_median_s
+        self.latency_sigma = latency_sigma
+        self.ttft_fraction = ttft_fraction
+        self.stream_chunks = stream_chunks
+        self.error_rate = error_rate
+        self.rpm_limit = rpm_limit
+        self.response_words = response_words
+        self.sleep = sleep
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent: Dict[str, deque] = {}
+
+    @classmethod
+    def from_env(cls) -> "FakeBackend":
+        rpm = os.getenv("FAKE_BACKEND_RPM")
+        return cls(
+            latency_median_s=float(os.getenv("FAKE_BACKEND_LATENCY_S", 0.05)),
+            latency_sigma=float(os.getenv("FAKE_BACKEND_LATENCY_SIGMA", 0.5)),
+            error_rate=float(os.getenv("FAKE_BACKEND_ERROR_RATE", 0.0)),
+            rpm_limit=int(rpm) if rpm else None,
+            seed=int(os.getenv("FAKE_BACKEND_SEED", 0)),
+        )
+
+    def _create_model(self, model_name: str, generation_config: Optional[Dict[str, Any]]):
+        return FakeModel(self, model_name)
+
+    def _sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            self.sleep(seconds)
+
+    def _plan(self, model_name: str, prompt: str):
+        """Draw latency and failure for one call."""
+        with self._lock:
+            self.calls += 1
+            if self.latency_sigma > 0:
+                latency = self._rng.lognormvariate(0.0, self.latency_sigma) * self.latency_median_s
+            else:
+                latency = self.latency_median_s
+            if self.rpm_limit is not None:
+                now = time.monotonic()
+                recent = self._recent.setdefault(model_name, deque())
+                while recent and now - recent[0] > 60:
+                    recent.popleft()
+                if len(recent) >= self.rpm_limit:
+                    return latency * 0.05, ResourceExhausted(f"429 fake quota exceeded for {model_name}")
+                recent.append(now)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return latency, ServiceUnavailable(f"503 fake {model_name} unavailable")
+        return latency, None
+
+    def response_text(self, model_name: str, prompt: str) -> str:
+        seed = int.from_bytes(hashlib.sha256((model_name + "\x00" + prompt).encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        vocabulary = _VOCABULARY
+        sentences: List[str] = []
+        words = 0
+        while words < self.response_words:
+            length = rng.randint(8, 20)
+            sentences.append(" ".join(rng.choice(vocabulary) for _ in range(length)).capitalize() + ".")
+            words += length
+        return "**Summary:**\n" + " ".join(sentences)
+
+
+_VOCABULARY = ("market growth customer revenue platform logistics pricing channel segment risk competitor "
+               "strategy funding investor retention acquisition scalable margin product team traction "
+               "churn subscription enterprise onboarding partnership regulation moat expansion pilot").split()
+
+
+_default_backend: Optional[ModelBackend] = None
+_default_lock = threading.Lock()
+
+
+def create_default_backend(api_key: Optional[str] = None) -> ModelBackend:
+    """Process-wide backend chosen by GEMINI_BACKEND ("gemini" by default, or "fake")."""
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            if os.getenv("GEMINI_BACKEND", "gemini").lower() == "fake":
+                _default_backend = FakeBackend.from_env()
+            else:
+                _default_backend = GeminiBackend(api_key)
+        return _default_backend
@@ -0,0 +1,38 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+
+class BackgroundResults:
+    """
+    Process-wide results computed on worker threads and kept by key.
+
+    `submit` starts the work for a key at most once: while a call is running or after it
+    succeeded, every caller gets the same Future. A key whose call raised is started
+    again on the next submit. The oldest keys are dropped beyond `max_entries`.
+    """
+
+    def __init__(self, max_workers: int = 4, max_entries: int = 256, thread_name_prefix: str = "background"):
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._futures: "OrderedDict[Hashable, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._futures.move_to_end(key)
+                return future
+            future = self._futures[key] = self._executor.submit(fn, *args, **kwargs)
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+            return future
+
+    def get(self, key: Hashable) -> Optional[Future]:
+        with self._lock:
+            return self._futures.get(key)
+
+    def __len__(self) -> int:
+        return len(self._futures)
@@ -0,0 +1,90 @@
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Any
+
+from .tokens import estimate_tokens
+
+_TITLE = re.compile(r"^\s*\*\*[^*\n]+\*\*\s*\n")  # report banner added by _format_response
+_MARKDOWN = re.compile(r"[*#>|`_]+|-{3,}")
+_SPACES = re.compile(r"\s+")
+
+
+def summarize_response(response: str, max_chars: int = 240) -> str:
+    """Compact one-line gist of a response: markdown stripped, whitespace collapsed, cut at a word boundary."""
+    text = _SPACES.sub(" ", _MARKDOWN.sub(" ", _TITLE.sub("", response, count=1))).strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars] + "…"
+
+
+class ConversationHistory:
+    """
+    Size-bounded history for one session.
+
+    Keeps at most `max_turns` compact turns and renders only as many of the most recent
+    ones as fit in `token_budget` when building the prompt prefix.
+    """
+
+    def __init__(self, max_turns: int = 6, token_budget: int = 300, summary_chars: int = 240):
+        self.token_budget = token_budget
+        self.summary_chars = summary_chars
+        self.turns: "deque[Dict[str, str]]" = deque(maxlen=max_turns)
+
+    def add(self, task_type: str, prompt: str, response: str) -> None:
+        self.turns.append({
+            "task_type": task_type,
+            "prompt": summarize_response(prompt, 120),
+            "summary": summarize_response(response, self.summary_chars),
+        })
+
+    def context_block(self) -> str:
+        """Prompt prefix describing recent turns, newest kept first when the budget runs out."""
+        lines: List[str] = []
+        used = estimate_tokens("Previous context:\n")
+        for turn in reversed(list(self.turns)):
+            line = f"- [{turn['task_type']}] {turn['prompt']} → {turn['summary']}"
+            cost = estimate_tokens(line)
+            if used + cost > self.token_budget:
+                break
+            lines.append(line)
+            used += cost
+        if not lines:
+            return ""
+        return "Previous context:\n" + "\n".join(reversed(lines)) + "\n\n"
+
+    def clear(self) -> None:
+        self.turns.clear()
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+
+class SessionHistories:
+    """LRU map of session id -> ConversationHistory, capped at `max_sessions`."""
+
+    def __init__(self, max_sessions: int = 1000, **history_options: Any):
+        self.max_sessions = max_sessions
+        self.history_options = history_options
+        self._sessions: "OrderedDict[str, ConversationHistory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: Optional[str]) -> ConversationHistory:
+        key = session_id or "default"
+        with self._lock:
+            history = self._sessions.get(key)
+            if history is None:
+                history = self._sessions[key] = ConversationHistory(**self.history_options)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(key)
+            return history
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
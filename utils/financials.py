@@ -1,10 +1,202 @@
-import pandas as pd
+import functools
+from typing import Dict, Sequence, Union
+
+import numpy as np
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+class ScenarioForecast:
+    """
+    Monthly projections for many scenarios, stored column-wise.
+
+    `params` holds one value per scenario for each input; `revenue`, `new_revenue`,
+    `churned_revenue` and `acquisition_cost` are (scenarios x months) arrays where
+    column 0 is month 1.
+    """
+
+    __slots__ = ("months", "params", "revenue", "new_revenue", "churned_revenue", "acquisition_cost")
+
+    def __init__(self, months: np.ndarray, params: Dict[str, np.ndarray], revenue: np.ndarray,
+                 new_revenue: np.ndarray, churned_revenue: np.ndarray, acquisition_cost: np.ndarray):
+        self.months = months
+        self.params = params
+        self.revenue = revenue
+        self.new_revenue = new_revenue
+        self.churned_revenue = churned_revenue
+        self.acquisition_cost = acquisition_cost
+
+    def __len__(self) -> int:
+        return self.revenue.shape[0]
+
+    def summary(self) -> Dict[str, np.ndarray]:
+        """One row per scenario: its inputs plus end-of-horizon and cumulative figures."""
+        total_revenue = self.revenue.sum(axis=1)
+        total_cac = self.acquisition_cost.sum(axis=1)
+        return {
+            **self.params,
+            "final_revenue": self.revenue[:, -1],
+            "total_revenue": total_revenue,
+            "total_acquisition_cost": total_cac,
+            "net_after_acquisition": total_revenue - total_cac,
+        }
+
+    def frame(self, scenario: int = 0):
+        """Month-by-month table for one scenario (pandas is only needed here)."""
+        import pandas as pd
+        return pd.DataFrame({
+            "Month": self.months,
+            "Projected Revenue": self.revenue[scenario].round(2),
+            "New Revenue": self.new_revenue[scenario].round(2),
+            "Churned Revenue": self.churned_revenue[scenario].round(2),
+            "Acquisition Cost": self.acquisition_cost[scenario].round(2),
+        })
+
+
+def forecast_scenarios(initial_revenue: ArrayLike, growth_rate: ArrayLike, churn_rate: ArrayLike = 0.0,
+                       cac: ArrayLike = 0.0, months: int = 12, dtype=np.float64) -> ScenarioForecast:
+    """
+    Project monthly recurring revenue for every scenario at once.
+
+    Each input is a scalar or a 1-D array (broadcast against the others). Per month,
+    revenue gains `growth_rate` and loses `churn_rate` of the previous month's revenue;
+    `cac` is the acquisition cost per dollar of new monthly revenue. Month 1 is the
+    starting revenue.
+    """
+    arrays = (np.atleast_1d(np.asarray(v, dtype=dtype)) for v in (initial_revenue, growth_rate, churn_rate, cac))
+    initial, growth, churn, cac = (a.ravel() for a in np.broadcast_arrays(*arrays))
+    steps = np.arange(months, dtype=dtype)
+    # revenue[s, m] = initial[s] * (1 + growth[s] - churn[s]) ** m, computed as one broadcast power
+    revenue = initial[:, None] * np.power((1.0 + growth - churn)[:, None], steps[None, :])
+    previous = np.empty_like(revenue)
+    previous[:, 0] = 0.0
+    previous[:, 1:] = revenue[:, :-1]
+    new_revenue = previous * growth[:, None]
+    return ScenarioForecast(
+        months=np.arange(1, months + 1),
+        params={"initial_revenue": initial, "growth_rate": growth, "churn_rate": churn, "cac": cac},
+        revenue=revenue,
+        new_revenue=new_revenue,
+        churned_revenue=previous * churn[:, None],
+        acquisition_cost=new_revenue * cac[:, None],
+    )
+
+
+def scenario_grid(**axes: ArrayLike) -> Dict[str, np.ndarray]:
+    """Cartesian product of parameter values as flat arrays, ready for forecast_scenarios(**grid)."""
+    names = list(axes)
+    values = [np.atleast_1d(np.asarray(axes[name], dtype=float)) for name in names]
+    mesh = np.meshgrid(*values, indexing="ij")
+    return {name: column.ravel() for name, column in zip(names, mesh)}
+
 
 def simple_forecast(initial_revenue: float, growth_rate: float, months: int = 12):
     """Generates a simple revenue forecast over months."""
-    revenues = [initial_revenue * ((1 + growth_rate) ** m) for m in range(months)]
-    df = pd.DataFrame({
-        "Month": list(range(1, months+1)),
-        "Projected Revenue ($)": revenues
-    })
-    return df
+    import pandas as pd
+    forecast = forecast_scenarios(initial_revenue, growth_rate, months=months)
+    return pd.DataFrame({"Month": forecast.months, "Projected Revenue ($)": forecast.revenue[0]})
+
+
+def _simulate_chunk(initial_revenue: float, growth_mean: float, growth_sd: float, churn_mean: float,
+                    churn_sd: float, months: int, bins: int, chunk):
+    """
+    One (seed, size) chunk of paths as per-month histograms of log(revenue / initial).
+
+    Each month's bins span that month's sampled min..max, so no path lands outside them.
+    Returns (lower, upper, cumulative counts at the months x (bins + 1) bin edges, revenue sums).
+    """
+    seed, size = chunk
+    rng = np.random.default_rng(seed)
+    shape = (size, months - 1)
+    growth = rng.normal(growth_mean, growth_sd, shape) if growth_sd else np.full(shape, float(growth_mean))
+    churn = rng.normal(churn_mean, churn_sd, shape) if churn_sd else np.full(shape, float(churn_mean))
+    np.maximum(churn, 0.0, out=churn)
+    factor = 1.0 + growth - churn
+    np.maximum(factor, 1e-9, out=factor)
+    # month 1 is the starting revenue; each later month multiplies in one sampled factor
+    log_ratio = np.zeros((size, months))
+    np.cumsum(np.log(factor), axis=1, out=log_ratio[:, 1:])
+    lower = log_ratio.min(axis=0)
+    upper = np.maximum(log_ratio.max(axis=0), lower + 1e-9)
+    index = ((log_ratio - lower) / ((upper - lower) / bins)).astype(np.int64)
+    np.clip(index, 0, bins - 1, out=index)
+    counts = np.bincount((index + np.arange(months) * bins).ravel(), minlength=months * bins)
+    cumulative = np.zeros((months, bins + 1))
+    np.cumsum(counts.reshape(months, bins), axis=1, out=cumulative[:, 1:])
+    return lower, upper, cumulative, np.exp(log_ratio).sum(axis=0) * initial_revenue
+
+
+def _cumulative_at(edges: np.ndarray, lower: np.ndarray, upper: np.ndarray, cumulative: np.ndarray) -> np.ndarray:
+    """Cumulative counts of per-month histograms on [lower, upper], linear within bins, read at `edges`."""
+    bins = cumulative.shape[1] - 1
+    position = (edges - lower[:, None]) / ((upper - lower) / bins)[:, None]
+    np.clip(position, 0, bins, out=position)
+    index = np.minimum(position.astype(np.int64), bins - 1)
+    fraction = position - index
+    rows = np.arange(len(lower))[:, None]
+    return cumulative[rows, index] * (1.0 - fraction) + cumulative[rows, index + 1] * fraction
+
+
+def _merge_chunks(parts, bins: int):
+    """
+    Fold chunk histograms, in order, into one per-month histogram spanning every chunk's range.
+
+    The merged histogram is re-gridded whenever a chunk widens the range, which happens a
+    few times early on; memory stays one histogram whatever the number of chunks.
+    """
+    lower = upper = merged = totals = None
+    steps = np.linspace(0.0, 1.0, bins + 1)
+    for chunk_lower, chunk_upper, cumulative, chunk_totals in parts:
+        if merged is None:
+            lower, upper, merged, totals = chunk_lower, chunk_upper, cumulative, chunk_totals
+            continue
+        new_lower, new_upper = np.minimum(lower, chunk_lower), np.maximum(upper, chunk_upper)
+        edges = new_lower[:, None] + (new_upper - new_lower)[:, None] * steps
+        if (new_lower < lower).any() or (new_upper > upper).any():
+            merged = _cumulative_at(edges, lower, upper, merged)
+        lower, upper = new_lower, new_upper
+        merged = merged + _cumulative_at(edges, chunk_lower, chunk_upper, cumulative)
+        totals = totals + chunk_totals
+    return lower, upper, merged, totals
+
+
+def monte_carlo_forecast(initial_revenue: float, growth_mean: float, growth_sd: float, churn_mean: float = 0.0,
+                         churn_sd: float = 0.0, months: int = 36, paths: int = 100_000,
+                         percentiles: Sequence[float] = (10, 50, 90), seed: int = 0, chunk_size: int = 20_000,
+                         bins: int = 2048, workers: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Simulate `paths` revenue trajectories with monthly growth and churn drawn from normals.
+
+    Paths are generated `chunk_size` at a time and folded into per-month histograms of
+    log(revenue / initial), so memory stays bounded regardless of `paths`; percentiles are
+    read from the histograms. Each chunk's bins span its own sampled range and chunks are
+    merged onto the union of those ranges, so heavy tails (high volatility, revenue wiped
+    out by a month with churn above growth) are binned rather than clipped. Chunk seeds are
+    derived from `seed` and chunks are merged in order, so results are identical for any
+    `workers` count; `workers > 1` spreads chunks over that many processes.
+
+    Returns columns: "Month", "mean" and one "p<q>" array per requested percentile.
+    """
+    sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    chunks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+    simulate = functools.partial(_simulate_chunk, initial_revenue, growth_mean, growth_sd, churn_mean, churn_sd,
+                                 months, bins)
+    if workers > 1 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            lower, upper, merged, totals = _merge_chunks(pool.map(simulate, chunks), bins)
+    else:
+        lower, upper, merged, totals = _merge_chunks(map(simulate, chunks), bins)
+    counts = np.diff(merged, axis=1)  # fractional once re-gridded
+    cumulative = merged[:, 1:]
+    width = (upper - lower) / bins
+    result = {"Month": np.arange(1, months + 1), "mean": totals / paths}
+    for q in percentiles:
+        target = np.minimum(q / 100.0 * paths, cumulative[:, -1])  # float sums may fall a hair short of paths
+        index = np.argmax(cumulative >= target[:, None], axis=1)
+        below = np.where(index > 0, cumulative[np.arange(months), index - 1], 0)
+        inside = counts[np.arange(months), index]
+        # linear interpolation within the bin holding the target rank
+        fraction = np.clip((target - below) / np.maximum(inside, 1e-12), 0.0, 1.0)
+        result[f"p{q:g}"] = initial_revenue * np.exp(lower + (index + fraction) * width)
+    return result
@@ -1,12 +1,29 @@
 import os
-import json
 import time
-from typing import Dict, List, Optional, Any
-from dotenv import load_dotenv
-import google.generativeai as genai
-
-load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+import itertools
+import functools
+from contextlib import nullcontext
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Any, Sequence
+from .backends import ModelBackend, create_default_backend
+from .response_cache import ResponseCache, create_default_cache, make_cache_key
+from .tokens import estimate_tokens
+from .prompt_templates import PROMPT_TEMPLATES, PromptTooLarge, render_prompt, trim_to_tokens
+from .conversation import SessionHistories
+from .resilience import RetryPolicy, AllAttemptsFailed, call_with_retries
+from .rate_limiter import RateLimiter, INTERACTIVE, BATCH, create_default_limiter
+from .tracing import Tracer, tracer as default_tracer
+from .singleflight import SingleFlight, create_default_single_flight
+
+def load_api_key() -> Optional[str]:
+    """API key from the environment, after loading .env (done on first client use, not at import)."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+
+# Task types whose prompts are self-contained and never get previous-conversation context
+HISTORY_DISABLED_TASKS = frozenset({"financial_forecast"})
 
 # Smart model selection based on task complexity
 MODELS = {
@@ -16,266 +33,55 @@ MODELS = {
     "gemini-2.0-flash": "Latest model, best overall"
 }
 
-if API_KEY:
-    genai.configure(api_key=API_KEY)
+# Models tried, in order, when the selected one is rate limited or keeps failing
+FALLBACK_ORDER = ["gemini-2.0-flash", "gemini-1.5-flash"]
+
+# Output tokens reserved against the TPM limit when generation_config sets no max_output_tokens
+DEFAULT_OUTPUT_TOKENS = 1024
+
+def _chunk_text(response) -> str:
+    try:
+        return getattr(response, "text", "") or ""
+    except ValueError:  # the SDK raises when a response has no text parts (e.g. blocked)
+        return ""
+
+def _used_tokens(response, prompt_tokens: int, text: Optional[str] = None) -> int:
+    """Tokens a finished request consumed: the API's usage metadata, else an estimate."""
+    total = getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+    if total:
+        return int(total)
+    return prompt_tokens + estimate_tokens(_chunk_text(response) if text is None else text)
 
 class SmartGeminiClient:
     """Advanced Gemini client with intelligent prompting and response formatting."""
     
-    def __init__(self):
-        self.conversation_history = []
+    def __init__(self, cache: Optional[ResponseCache] = None, generation_config: Optional[Dict[str, Any]] = None,
+                 backend: Optional[ModelBackend] = None, tracer: Optional[Tracer] = None,
+                 history_token_budget: int = 300, history_disabled_tasks: Optional[set] = None,
+                 retry_policy: Optional[RetryPolicy] = None, rate_limiter: Optional[RateLimiter] = None,
+                 single_flight: Optional[SingleFlight] = None, semantic_cache: Optional[Any] = None,
+                 max_prompt_tokens: Optional[int] = None, oversize: Optional[str] = None):
+        self.histories = SessionHistories(token_budget=history_token_budget)
+        self.history_disabled_tasks = set(HISTORY_DISABLED_TASKS if history_disabled_tasks is None else history_disabled_tasks)
+        self.total_requests = 0
+        self.total_response_chars = 0
+        self.recent_tasks = deque(maxlen=5)
         self.model_usage_stats = {}
-        self.response_templates = self._load_response_templates()
+        self.model_latency_stats = {}
+        self.cache = cache
+        self.generation_config = generation_config or {}
+        self.backend = backend if backend is not None else create_default_backend(load_api_key())
+        self.tracer = tracer if tracer is not None else default_tracer
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy.from_env()
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+        self.semantic_cache = semantic_cache  # utils.semantic_cache.SemanticCache; kept untyped so numpy loads only when enabled
+        # Prompt budget (estimated tokens, 0 disables); oversize input is trimmed, or rejected with oversize="reject"
+        self.max_prompt_tokens = max_prompt_tokens if max_prompt_tokens is not None else int(
+            os.getenv("GEMINI_MAX_PROMPT_TOKENS", 8000))
+        self.oversize = (oversize or os.getenv("GEMINI_OVERSIZE_INPUT", "trim")).lower()
+        self._lock = threading.Lock()
         
-    def _load_response_templates(self) -> Dict[str, str]:
-        """Load professional response templates for different use cases."""
-        return {
-            "startup_idea": """
-**🚀 STARTUP IDEA ANALYSIS**
-
-**Core Concept:**
-{concept}
-
-**Market Opportunity:**
-- **TAM:** {tam}
-- **Target Market:** {target_market}
-- **Problem Solved:** {problem}
-
-**Business Model:**
-- **Revenue Streams:** {revenue}
-- **Key Partners:** {partners}
-- **Competitive Advantage:** {advantage}
-
-**Execution Strategy:**
-1. {step1}
-2. {step2}
-3. {step3}
-
-**Risk Assessment:**
-⚠️ {risks}
-
-**Next Steps:**
-✅ {next_steps}
-            """,
-            
-            "market_research": """
-**📊 MARKET RESEARCH REPORT**
-
-**Executive Summary:**
-{summary}
-
-**Market Size & Growth:**
-- **Total Addressable Market (TAM):** {tam}
-- **Serviceable Addressable Market (SAM):** {sam}
-- **Growth Rate:** {growth_rate}
-- **Market Trends:** {trends}
-
-**Competitive Landscape:**
-| Competitor | Market Share | Strengths | Weaknesses |
-|------------|-------------|-----------|------------|
-{competitors_table}
-
-**Customer Segments:**
-{segments}
-
-**Strategic Recommendations:**
-1. **Immediate Actions:** {immediate}
-2. **Medium-term Strategy:** {medium}
-3. **Long-term Vision:** {long_term}
-
-**Risk Factors:**
-⚠️ {risks}
-
-**Success Metrics:**
-📈 {metrics}
-            """,
-            
-            "business_model": """
-**🏢 BUSINESS MODEL CANVAS**
-
-**Key Partners:**
-{partners}
-
-**Key Activities:**
-{activities}
-
-**Value Propositions:**
-{value_props}
-
-**Customer Relationships:**
-{relationships}
-
-**Customer Segments:**
-{segments}
-
-**Key Resources:**
-{resources}
-
-**Channels:**
-{channels}
-
-**Cost Structure:**
-{costs}
-
-**Revenue Streams:**
-{revenue}
-
-**Business Model Type:** {model_type}
-**Competitive Moat:** {moat}
-            """,
-            
-            "financial_forecast": """
-**💰 FINANCIAL PROJECTION**
-
-**Revenue Forecast:**
-{revenue_forecast}
-
-**Key Assumptions:**
-- **Growth Rate:** {growth_rate}
-- **Customer Acquisition Cost:** {cac}
-- **Lifetime Value:** {ltv}
-- **Churn Rate:** {churn}
-
-**Financial Metrics:**
-| Metric | Year 1 | Year 2 | Year 3 |
-|--------|--------|--------|--------|
-{metrics_table}
-
-**Break-even Analysis:**
-{break_even}
-
-**Funding Requirements:**
-{funding}
-
-**Risk Factors:**
-⚠️ {risks}
-
-**Recommendations:**
-✅ {recommendations}
-            """,
-            
-            "swot_analysis": """
-**🔍 SWOT & RISK ANALYSIS**
-
-**Strengths:**
-{strengths}
-
-**Weaknesses:**
-{weaknesses}
-
-**Opportunities:**
-{opportunities}
-
-**Threats:**
-{threats}
-
-**Strategic Risks:**
-| Risk | Probability | Impact | Mitigation |
-|------|-------------|--------|------------|
-{risks_table}
-
-**Action Items:**
-1. **High Priority:** {high_priority}
-2. **Medium Priority:** {medium_priority}
-3. **Low Priority:** {low_priority}
-
-**Success Indicators:**
-📊 {indicators}
-            """,
-            
-            "pitch_refinement": """
-**🎯 INVESTOR PITCH**
-
-**Problem Statement:**
-{problem}
-
-**Solution:**
-{solution}
-
-**Market Opportunity:**
-{market}
-
-**Business Model:**
-{model}
-
-**Traction & Metrics:**
-{traction}
-
-**Competitive Advantage:**
-{advantage}
-
-**Team:**
-{team}
-
-**Financials:**
-{financials}
-
-**Ask:**
-{ask}
-
-**Call to Action:**
-{cta}
-            """,
-            
-            "investor_qa": """
-**💼 INVESTOR Q&A SIMULATION**
-
-**Your Pitch:**
-{pitch}
-
-**Potential Questions:**
-{q1}
-{q2}
-{q3}
-{q4}
-{q5}
-
-**Recommended Responses:**
-{r1}
-{r2}
-{r3}
-{r4}
-{r5}
-
-**Preparation Tips:**
-💡 {tips}
-
-**Red Flags to Address:**
-⚠️ {red_flags}
-
-**Success Metrics:**
-📈 {success_metrics}
-            """,
-            
-            "branding_kit": """
-**🎨 BRANDING KIT**
-
-**Company Name Options:**
-{names}
-
-**Taglines:**
-{taglines}
-
-**Brand Positioning:**
-{positioning}
-
-**Visual Identity:**
-- **Primary Color:** {primary_color}
-- **Secondary Color:** {secondary_color}
-- **Typography:** {typography}
-- **Logo Concept:** {logo_concept}
-
-**Brand Voice:**
-{voice}
-
-**Messaging Framework:**
-{framework}
-
-**Brand Guidelines:**
-{guidelines}
-            """
-        }
-    
     def _select_optimal_model(self, task_type: str, complexity: str = "medium") -> str:
         """Intelligently select the best model for the task."""
         if complexity == "high" and "gemini-1.5-pro" in MODELS:
@@ -287,212 +93,7 @@ class SmartGeminiClient:
     
     def _create_smart_prompt(self, task_type: str, user_input: str, context: Dict = None) -> str:
         """Create intelligent, context-aware prompts."""
-        
-        base_prompts = {
-            "startup_idea": f"""
-You are an expert startup consultant with 15+ years of experience in venture capital and entrepreneurship. 
-Analyze the following keywords/domain: "{user_input}"
-
-Generate 5 innovative startup ideas with the following structure:
-1. **Core Concept** - One sentence description
-2. **Market Opportunity** - TAM, target market, problem solved
-3. **Business Model** - Revenue streams, key partners, competitive advantage
-4. **Execution Strategy** - 3 concrete steps
-5. **Risk Assessment** - Main challenges
-6. **Next Steps** - Immediate actions
-
-Make each idea:
-- Innovative and disruptive
-- Financially viable
-- Scalable globally
-- Technology-enabled
-- Address real market pain points
-
-Format the response in a professional, investor-ready structure with clear sections and bullet points.
-            """,
-            
-            "market_research": f"""
-You are a senior market research analyst at a top-tier consulting firm.
-Conduct comprehensive market research for: "{user_input}"
-
-Provide analysis covering:
-1. **Executive Summary** - Key findings
-2. **Market Size & Growth** - TAM, SAM, growth rates, trends
-3. **Competitive Landscape** - Top 5 competitors with analysis
-4. **Customer Segments** - Detailed segmentation
-5. **Strategic Recommendations** - Immediate, medium-term, long-term
-6. **Risk Factors** - Market, competitive, regulatory risks
-7. **Success Metrics** - KPIs to track
-
-Use data-driven insights and provide specific, actionable recommendations.
-Format with professional tables, bullet points, and clear sections.
-            """,
-            
-            "business_model": f"""
-You are a business model expert and startup advisor.
-Create a comprehensive Business Model Canvas for: "{user_input}"
-
-Structure the response with these 9 building blocks:
-1. **Key Partners** - Strategic alliances, suppliers
-2. **Key Activities** - Core operations, value creation
-3. **Value Propositions** - Customer benefits, differentiation
-4. **Customer Relationships** - How to acquire and retain customers
-5. **Customer Segments** - Target markets, personas
-6. **Key Resources** - Human, financial, physical, intellectual
-7. **Channels** - Distribution, communication channels
-8. **Cost Structure** - Fixed and variable costs
-9. **Revenue Streams** - Pricing models, revenue sources
-
-Add insights on:
-- Business model type (SaaS, Marketplace, etc.)
-- Competitive moat
-- Scalability factors
-
-Format with clear sections, bullet points, and professional structure.
-            """,
-            
-            "financial_forecast": f"""
-You are a CFO and financial advisor for startups.
-Analyze the financial projection: Initial Revenue: ${context.get('initial', 1000)}, Growth Rate: {context.get('growth', 10)}%, Months: {context.get('months', 12)}
-
-Provide comprehensive financial analysis:
-1. **Revenue Forecast** - Detailed projection analysis
-2. **Key Assumptions** - Growth drivers, market factors
-3. **Financial Metrics** - Unit economics, profitability
-4. **Break-even Analysis** - Timeline and requirements
-5. **Funding Requirements** - Capital needs and timing
-6. **Risk Factors** - Financial risks and mitigations
-7. **Recommendations** - Strategic financial advice
-
-Include specific numbers, percentages, and actionable insights.
-Format with professional tables and clear financial metrics.
-            """,
-            
-            "swot_analysis": f"""
-You are a strategic management consultant.
-Conduct a comprehensive SWOT analysis for: "{user_input}"
-
-Provide detailed analysis in these areas:
-
-**Strengths:**
-- Internal capabilities and advantages
-- Unique resources and competencies
-
-**Weaknesses:**
-- Internal limitations and gaps
-- Areas needing improvement
-
-**Opportunities:**
-- External factors to leverage
-- Market trends and possibilities
-
-**Threats:**
-- External challenges and risks
-- Competitive and market threats
-
-**Strategic Risks:**
-- Probability and impact assessment
-- Mitigation strategies
-
-**Action Items:**
-- Prioritized recommendations
-- Implementation timeline
-
-Format with clear sections, risk matrices, and actionable insights.
-            """,
-            
-            "pitch_refinement": f"""
-You are a pitch coach who has helped 100+ startups raise over $2B in funding.
-Refine this pitch for investors: "{user_input}"
-
-Transform it into a compelling investor pitch with:
-1. **Problem Statement** - Clear pain point
-2. **Solution** - Your unique approach
-3. **Market Opportunity** - Size and growth
-4. **Business Model** - How you make money
-5. **Traction & Metrics** - Key performance indicators
-6. **Competitive Advantage** - Your moat
-7. **Team** - Key personnel and expertise
-8. **Financials** - Revenue, growth, projections
-9. **Ask** - Specific funding request
-10. **Call to Action** - Next steps
-
-Make it:
-- Concise and impactful
-- Data-driven
-- Investor-focused
-- Professional and polished
-
-Format with clear sections and bullet points for easy reading.
-            """,
-            
-            "investor_qa": f"""
-You are a venture capital partner with 20+ years of experience.
-Simulate investor questions for this startup: "{user_input}"
-
-Generate {context.get('rounds', 5)} challenging questions covering:
-- Market validation
-- Competitive positioning
-- Financial projections
-- Team capabilities
-- Execution risks
-- Scalability concerns
-
-For each question, provide:
-- The question (skeptical but fair)
-- Recommended response approach
-- Key points to emphasize
-- Potential follow-up questions
-
-Include:
-- Preparation tips
-- Red flags to address
-- Success metrics for the Q&A
-
-Format with clear Q&A structure and professional insights.
-            """,
-            
-            "branding_kit": f"""
-You are a senior brand strategist at a top branding agency.
-Create a comprehensive branding kit for: "{user_input}"
-
-Generate:
-
-**Company Names (6 options):**
-- Creative and memorable
-- Domain availability considered
-- Cultural sensitivity checked
-
-**Taglines (3 options):**
-- Compelling and concise
-- Brand promise focused
-- Different from competitors
-
-**Brand Positioning:**
-- Core value proposition
-- Target audience
-- Competitive differentiation
-
-**Visual Identity:**
-- Color palette recommendations
-- Typography suggestions
-- Logo concept direction
-
-**Brand Voice:**
-- Personality traits
-- Communication style
-- Tone guidelines
-
-**Messaging Framework:**
-- Key messages
-- Value propositions
-- Brand story
-
-Format with professional structure and clear brand guidelines.
-            """
-        }
-        
-        return base_prompts.get(task_type, user_input)
+        return render_prompt(task_type, user_input, context)
     
     def _format_response(self, task_type: str, raw_response: str, context: Dict = None) -> str:
         """Format raw AI response into professional, structured output."""
@@ -568,7 +169,179 @@ Format with professional structure and clear brand guidelines.
         """Format branding kit into professional structure."""
         return f"**🎨 BRANDING KIT**\n\n{response}"
     
-    def ask_gemini(self, prompt: str, task_type: str = "general", context: Dict = None, complexity: str = "medium") -> str:
+    def _fit_input(self, prompt: str, task_type: str, history: str) -> str:
+        """Trim (or reject) user input that would push the prompt past max_prompt_tokens."""
+        template = PROMPT_TEMPLATES.get(task_type)
+        if self.max_prompt_tokens <= 0 or (template is not None and "user_input" not in template.fields):
+            return prompt
+        budget = self.max_prompt_tokens - estimate_tokens(history) - (template.overhead_tokens if template else 0)
+        input_tokens = estimate_tokens(prompt)
+        if input_tokens <= budget:
+            return prompt
+        if self.oversize == "reject" or budget <= 0:
+            raise PromptTooLarge(f"input is ~{input_tokens} tokens; at most {max(budget, 0)} fit in the "
+                                 f"{self.max_prompt_tokens}-token prompt budget")
+        return trim_to_tokens(prompt, budget)
+    
+    def _prepare_request(self, prompt: str, task_type: str, context: Dict, complexity: str,
+                         session_id: Optional[str] = None, history: Optional[str] = None):
+        """
+        Resolve the model, final prompt, cache key, estimated prompt tokens and cached prompt for a request.
+
+        The cache (and single-flight) key covers the prompt without conversation history, so a
+        repeat hits regardless of what the session has said since. `history` overrides the
+        session's current context block.
+        """
+        with self.tracer.span("prompt.build") as span:
+            # Select optimal model
+            model_name = self._select_optimal_model(task_type, complexity)
+            
+            # This session's recent context, within its token budget
+            if task_type in self.history_disabled_tasks:
+                history = ""
+            elif history is None:
+                history = self.histories.get(session_id).context_block()
+            
+            # Create intelligent prompt, keeping the user's input inside the prompt budget
+            fitted = self._fit_input(prompt, task_type, history)
+            if fitted is not prompt:
+                span.set_attribute("trimmed_input_chars", len(prompt) - len(fitted))
+            cache_prompt = self._create_smart_prompt(task_type, fitted, context)
+            smart_prompt = history + cache_prompt
+            
+            cache_key = make_cache_key(model_name, cache_prompt, self.generation_config)
+            prompt_tokens = estimate_tokens(smart_prompt)
+            span.set_attribute("prompt_chars", len(smart_prompt))
+        
+        root = self.tracer.current_span()
+        if root is not None:
+            root.set_attribute("model", model_name)
+            root.set_attribute("prompt_tokens", prompt_tokens)
+        return model_name, smart_prompt, cache_key, prompt_tokens, cache_prompt
+    
+    def _cache_lookup(self, cache_key: str, use_cache: bool) -> Optional[str]:
+        if self.cache is None or not use_cache:
+            return None
+        with self.tracer.span("cache.lookup") as span:
+            value = self.cache.get(cache_key)
+            span.set_attribute("hit", value is not None)
+        return value
+    
+    def _semantic_lookup(self, prompt: str, task_type: str, context: Dict, complexity: str,
+                         use_cache: bool) -> Optional[Dict[str, Any]]:
+        """Stored response for a near-identical earlier prompt, if semantic caching covers this task."""
+        if self.semantic_cache is None or not use_cache or not self.semantic_cache.enabled(task_type):
+            return None
+        with self.tracer.span("cache.semantic") as span:
+            hit = self.semantic_cache.lookup(task_type, context, complexity, prompt)
+            span.set_attribute("hit", hit is not None)
+            if hit is not None:
+                span.set_attribute("similarity", hit["similarity"])
+        return hit
+    
+    def _semantic_store(self, prompt: str, task_type: str, context: Dict, complexity: str, raw_response: str) -> None:
+        if self.semantic_cache is not None:
+            self.semantic_cache.add(task_type, context, complexity, prompt, raw_response)
+    
+    @staticmethod
+    def _similar_note(hit: Dict[str, Any]) -> str:
+        """Marker shown above a response reused from a similar (not identical) request."""
+        matched = " ".join(hit["prompt"].split())
+        if len(matched) > 120:
+            matched = matched[:117] + "..."
+        return f'> ↺ Similar request: "{matched}" (similarity {hit["similarity"]:.2f})\n\n'
+    
+    def _recheck_cache(self, cache_key: str, model_name: str):
+        """Flight result from the cache, for a leader that waited on another process."""
+        value = self._cache_lookup(cache_key, True)
+        return (value, model_name, []) if value is not None else None
+    
+    def _fetch(self, model_name: str, smart_prompt: str, cache_prompt: str, session_id: Optional[str], priority: str):
+        """Call upstream with retries and fallback; returns (raw text, model that answered, attempts)."""
+        # Generate response, retrying and falling back down the model list on failure
+        with self.tracer.span("network", model=model_name) as network:
+            # wrapped: hedged attempts run on other threads, which must still trace under this span
+            response, model_name, attempts = call_with_retries(
+                self.tracer.wrap(
+                    lambda name, timeout: self._throttled_generate(name, smart_prompt, session_id, priority, timeout)),
+                self._model_chain(model_name), self.retry_policy)
+            network.set_attribute("attempts", len(attempts))
+            network.set_attribute("served_by", model_name)
+        
+        # Extract text
+        with self.tracer.span("extract"):
+            raw_response = response.text if hasattr(response, "text") else str(response)
+        
+        if self.cache is not None and raw_response.strip():
+            self.cache.set(make_cache_key(model_name, cache_prompt, self.generation_config), raw_response)
+        return raw_response, model_name, attempts
+    
+    def _model_chain(self, model_name: str) -> List[str]:
+        """Selected model followed by its fallbacks."""
+        return [model_name] + [m for m in FALLBACK_ORDER if m != model_name]
+    
+    def _generate(self, model_name: str, smart_prompt: str, stream: bool = False, timeout: Optional[float] = None):
+        """Call generate_content with the client's generation settings and an optional per-attempt deadline."""
+        with self.tracer.span("model.get", model=model_name):
+            model = self.backend.get_model(model_name, self.generation_config)
+        kwargs = {"request_options": {"timeout": timeout}} if timeout else {}
+        if stream:
+            return model.generate_content(smart_prompt, stream=True, **kwargs)
+        return model.generate_content(smart_prompt, **kwargs)
+    
+    def _throttled_generate(self, model_name: str, smart_prompt: str, session_id: Optional[str], priority: str,
+                            timeout: Optional[float], stream: bool = False):
+        """Wait for this model's shared quota, then call generate_content."""
+        if self.rate_limiter is None:
+            return self._generate(model_name, smart_prompt, stream=stream, timeout=timeout)
+        # reserve the prompt plus the most the response may use; the charge is corrected afterwards
+        prompt_tokens = estimate_tokens(smart_prompt)
+        reserved = prompt_tokens + int(self.generation_config.get("max_output_tokens") or DEFAULT_OUTPUT_TOKENS)
+        with self.tracer.span("rate_limit.wait", model=model_name, priority=priority) as span:
+            waited = self.rate_limiter.acquire(model_name, reserved, session_id, priority, timeout)
+            span.set_attribute("wait_s", round(waited, 4))
+        try:
+            response = self._generate(model_name, smart_prompt, stream=stream, timeout=timeout)
+        except Exception:
+            self.rate_limiter.reconcile(model_name, reserved, prompt_tokens)
+            raise
+        if stream:
+            return self._reconciled_stream(model_name, response, reserved, prompt_tokens)
+        self.rate_limiter.reconcile(model_name, reserved, _used_tokens(response, prompt_tokens))
+        return response
+    
+    def _reconciled_stream(self, model_name: str, chunks, reserved: int, prompt_tokens: int):
+        """Pass a response stream through, reconciling its token charge once it ends or is abandoned."""
+        last, text = None, []
+        try:
+            for chunk in chunks:
+                last = chunk
+                text.append(_chunk_text(chunk))
+                yield chunk
+        finally:
+            self.rate_limiter.reconcile(model_name, reserved, _used_tokens(last, prompt_tokens, "".join(text)))
+    
+    def _record(self, task_type: str, prompt: str, formatted_response: str, model_name: str,
+                latency_s: Optional[float] = None, session_id: Optional[str] = None) -> None:
+        """Update conversation history and model usage stats after a successful call."""
+        with self._lock:
+            self.histories.get(session_id).add(task_type, prompt, formatted_response)
+            self.total_requests += 1
+            self.total_response_chars += len(formatted_response)
+            self.recent_tasks.append(task_type)
+            self.model_usage_stats[model_name] = self.model_usage_stats.get(model_name, 0) + 1
+            if latency_s is not None:
+                timing = self.model_latency_stats.setdefault(model_name, {"calls": 0, "total_s": 0.0, "max_s": 0.0})
+                timing["calls"] += 1
+                timing["total_s"] += latency_s
+                timing["max_s"] = max(timing["max_s"], latency_s)
+    
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        return f"**❌ ERROR**\n\nAn error occurred while processing your request: {str(error)}\n\nPlease try again or contact support if the issue persists."
+    
+    def ask_gemini(self, prompt: str, task_type: str = "general", context: Dict = None, complexity: str = "medium",
+                   use_cache: bool = True, session_id: Optional[str] = None) -> str:
         """
         Smart Gemini query with intelligent prompting and response formatting.
         
@@ -577,59 +350,403 @@ Format with professional structure and clear brand guidelines.
             task_type: Type of task (startup_idea, market_research, etc.)
             context: Additional context for the task
             complexity: Task complexity (low, medium, high)
+            use_cache: Set to False to bypass the response cache for this call
+            session_id: Conversation whose recent history is used as context
         """
         try:
-            # Select optimal model
-            model_name = self._select_optimal_model(task_type, complexity)
-            
-            # Create intelligent prompt
-            smart_prompt = self._create_smart_prompt(task_type, prompt, context)
+            return self._complete(prompt, task_type, context, complexity, use_cache, session_id)[0]
+        except Exception as e:
+            return self._error_message(e)
+
+    def ask_gemini_detailed(self, prompt: str, task_type: str = "general", context: Dict = None,
+                            complexity: str = "medium", use_cache: bool = True,
+                            session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        ask_gemini with the request's metadata, for callers that log or display more than the text.
+
+        Returns a dict shaped like an ask_gemini_batch result: task_type, prompt, response, model,
+        latency_s, attempts, prompt_tokens and error (None on success). On failure response holds
+        the same error message ask_gemini would return; nothing is raised.
+        """
+        result = {"task_type": task_type, "prompt": prompt, "response": None, "model": None,
+                  "latency_s": 0.0, "attempts": [], "error": None, "prompt_tokens": None}
+        start = time.time()
+        try:
+            response, model_name, attempts, prompt_tokens = self._complete(
+                prompt, task_type, context, complexity, use_cache, session_id)
+            result["response"], result["model"], result["attempts"] = response, model_name, attempts
+            result["prompt_tokens"] = prompt_tokens
+        except Exception as e:
+            result["error"], result["response"] = str(e), self._error_message(e)
+            result["attempts"] = getattr(e, "attempts", [])
+        result["latency_s"] = time.time() - start
+        return result
+
+    def _complete(self, prompt: str, task_type: str, context: Dict, complexity: str, use_cache: bool,
+                  session_id: Optional[str] = None, priority: str = INTERACTIVE, history: Optional[str] = None):
+        """
+        Run one request end to end with retries and model fallback.
+        
+        Returns (formatted response, model that answered, attempt history, estimated prompt
+        tokens); raises on failure. `history` replaces the session's context block (see
+        _prepare_request).
+        """
+        start = time.time()
+        with self.tracer.span("gemini.request", task_type=task_type, stream=False) as root:
+            model_name, smart_prompt, cache_key, prompt_tokens, cache_prompt = self._prepare_request(
+                prompt, task_type, context, complexity, session_id, history)
             
-            # Add conversation context if available
-            if self.conversation_history:
-                context_prompt = f"Previous context: {self.conversation_history[-3:]}\n\n"
-                smart_prompt = context_prompt + smart_prompt
+            # Serve repeat requests from the cache
+            raw_response = self._cache_lookup(cache_key, use_cache)
+            root.set_attribute("cached", raw_response is not None)
             
-            # Generate response
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(smart_prompt)
+            # ...or from a near-identical earlier prompt, where the task allows it
+            similar = None
+            if raw_response is None:
+                similar = self._semantic_lookup(prompt, task_type, context, complexity, use_cache)
+                if similar is not None:
+                    raw_response = similar["value"]
+                    root.set_attribute("similarity", similar["similarity"])
             
-            # Extract text
-            raw_response = response.text if hasattr(response, "text") else str(response)
+            attempts: List[Dict[str, Any]] = []
+            if raw_response is None:
+                requested = model_name
+                fetch = lambda: self._fetch(requested, smart_prompt, cache_prompt, session_id, priority)
+                if self.single_flight is not None and use_cache:
+                    # Identical requests already in flight share one upstream call
+                    (raw_response, model_name, attempts), coalesced = self.single_flight.do(
+                        cache_key, fetch, lambda: self._recheck_cache(cache_key, requested))
+                    root.set_attribute("coalesced", coalesced)
+                    if coalesced:
+                        attempts = []
+                else:
+                    raw_response, model_name, attempts = fetch()
+                    coalesced = False
+                root.set_attribute("model", model_name)
+                if not coalesced:
+                    self._semantic_store(prompt, task_type, context, complexity, raw_response)
             
             # Format response professionally
-            formatted_response = self._format_response(task_type, raw_response, context)
-            
-            # Update conversation history
-            self.conversation_history.append({
-                "task_type": task_type,
-                "prompt": prompt,
-                "response": formatted_response,
-                "timestamp": time.time()
-            })
+            with self.tracer.span("format"):
+                formatted_response = self._format_response(task_type, raw_response, context)
+                if similar is not None:
+                    formatted_response = self._similar_note(similar) + formatted_response
             
-            # Update model usage stats
-            self.model_usage_stats[model_name] = self.model_usage_stats.get(model_name, 0) + 1
-            
-            return formatted_response
-            
-        except Exception as e:
-            error_msg = f"**❌ ERROR**\n\nAn error occurred while processing your request: {str(e)}\n\nPlease try again or contact support if the issue persists."
-            return error_msg
+            with self.tracer.span("history"):
+                self._record(task_type, prompt, formatted_response, model_name, time.time() - start, session_id)
+        
+        return formatted_response, model_name, attempts, prompt_tokens
+    
+    def ask_gemini_stream(self, prompt: str, task_type: str = "general", context: Dict = None,
+                          complexity: str = "medium", use_cache: bool = True,
+                          session_id: Optional[str] = None) -> "GeminiStream":
+        """
+        Streaming variant of ask_gemini.
+        
+        Returns a GeminiStream that yields raw text chunks as the model produces them;
+        once exhausted it carries the formatted response and timings.
+        """
+        return GeminiStream(self, prompt, task_type, context, complexity, use_cache, session_id)
+    
+    async def ask_gemini_batch_async(self, jobs: Sequence[Sequence[Any]], max_concurrency: int = 4,
+                                     timeout_s: Optional[float] = 90.0, use_cache: bool = True,
+                                     session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Run many requests concurrently and return their results in job order.
+        
+        Args:
+            jobs: Sequence of (task_type, prompt, context[, complexity]) tuples
+            max_concurrency: Maximum number of requests in flight at once
+            timeout_s: Per-job deadline, measured from when the job starts running
+            use_cache: Set to False to bypass the response cache for every job
+            session_id: Conversation whose history is used as context and extended by the results
+        
+        Every job sees the session's history as it was when the batch started, so prompts (and
+        cache keys) do not depend on the order in which sibling jobs finish.
+        
+        Each result is a dict with task_type, prompt, response, model, latency_s, attempts,
+        prompt_tokens and error (None on success). A failed or timed-out job never cancels the others.
+        """
+        import asyncio  # deferred: asyncio is the largest import on the single-request path
+        from concurrent.futures import ThreadPoolExecutor
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        loop = asyncio.get_running_loop()
+        # Not the loop's default executor: asyncio.run() joins that one on exit, which would make
+        # the batch wait for calls that already missed their deadline
+        executor = ThreadPoolExecutor(max_workers=max(1, len(jobs)), thread_name_prefix="gemini-batch")
+        history = self.histories.get(session_id).context_block()
+        
+        async def run(job: Sequence[Any]) -> Dict[str, Any]:
+            task_type, prompt = job[0], job[1]
+            context = job[2] if len(job) > 2 else None
+            complexity = job[3] if len(job) > 3 else "medium"
+            result = {"task_type": task_type, "prompt": prompt, "response": None, "model": None,
+                      "latency_s": 0.0, "attempts": [], "error": None, "prompt_tokens": None}
+            async with semaphore:
+                start = time.time()
+                try:
+                    response, model_name, attempts, prompt_tokens = await asyncio.wait_for(
+                        loop.run_in_executor(executor, functools.partial(
+                            self._complete, prompt, task_type, context, complexity, use_cache, session_id, BATCH,
+                            history)),
+                        timeout_s,
+                    )
+                    result["response"], result["model"], result["attempts"] = response, model_name, attempts
+                    result["prompt_tokens"] = prompt_tokens
+                except asyncio.TimeoutError:
+                    error = TimeoutError(f"no response within {timeout_s:g}s")
+                    result["error"], result["response"] = str(error), self._error_message(error)
+                except Exception as e:
+                    result["error"], result["response"] = str(e), self._error_message(e)
+                    result["attempts"] = getattr(e, "attempts", [])
+                result["latency_s"] = time.time() - start
+            return result
+        
+        try:
+            return list(await asyncio.gather(*(run(job) for job in jobs)))
+        finally:
+            # calls that timed out finish in the background; their results are discarded
+            executor.shutdown(wait=False)
+    
+    def ask_gemini_batch(self, jobs: Sequence[Sequence[Any]], max_concurrency: int = 4,
+                         timeout_s: Optional[float] = 90.0, use_cache: bool = True,
+                         session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Blocking wrapper around ask_gemini_batch_async; usable from sync code such as a Streamlit script."""
+        import asyncio
+        coro = self.ask_gemini_batch_async(jobs, max_concurrency, timeout_s, use_cache, session_id)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Already inside an event loop: run the batch on its own loop in a helper thread
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get usage statistics and performance metrics."""
         return {
-            "total_requests": len(self.conversation_history),
+            "total_requests": self.total_requests,
             "model_usage": self.model_usage_stats,
-            "recent_tasks": [conv["task_type"] for conv in self.conversation_history[-5:]],
-            "average_response_length": sum(len(conv["response"]) for conv in self.conversation_history) / max(len(self.conversation_history), 1)
+            "model_latency": {
+                name: {"calls": t["calls"], "mean_s": round(t["total_s"] / t["calls"], 3), "max_s": round(t["max_s"], 3)}
+                for name, t in self.model_latency_stats.items()
+            },
+            "recent_tasks": list(self.recent_tasks),
+            "average_response_length": self.total_response_chars / max(self.total_requests, 1),
+            "active_sessions": len(self.histories),
+            "cache": dict(self.cache.stats) if self.cache is not None else None,
+            "backend": self.backend.name,
+            "pooled_models": len(self.backend.pool),
+            "rate_limiter": self.rate_limiter.summary() if self.rate_limiter is not None else None,
+            "single_flight": dict(self.single_flight.stats) if self.single_flight is not None else None,
+            "semantic_cache": dict(self.semantic_cache.stats) if self.semantic_cache is not None else None
         }
 
-# Global smart client instance
-smart_client = SmartGeminiClient()
-
-def ask_gemini(prompt: str, task_type: str = "general", context: Dict = None, complexity: str = "medium") -> str:
+class GeminiStream:
+    """
+    Iterator over a streamed Gemini response.
+    
+    Iterate (or async-iterate) to receive text chunks. While streaming, `text` holds
+    everything received so far; when the stream ends `response` holds the formatted
+    output and `first_token_s` / `latency_s` the time to first chunk and total time.
+    `prompt_tokens` is the estimated size of the prompt sent (set once the request starts).
+    `similar_to` is set ({"prompt", "similarity"}) when a similar earlier request was reused.
+    """
+    
+    def __init__(self, client: SmartGeminiClient, prompt: str, task_type: str, context: Dict,
+                 complexity: str, use_cache: bool, session_id: Optional[str] = None):
+        self.client = client
+        self.prompt = prompt
+        self.task_type = task_type
+        self.context = context
+        self.complexity = complexity
+        self.use_cache = use_cache
+        self.session_id = session_id
+        self.model_name: Optional[str] = None
+        self.text = ""
+        self.response: Optional[str] = None
+        self.cached = False
+        self.similar_to: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.first_token_s: Optional[float] = None
+        self.latency_s: Optional[float] = None
+        self.prompt_tokens: Optional[int] = None
+        self.attempts: List[Dict[str, Any]] = []
+        self._iterator = None
+    
+    def __iter__(self):
+        if self._iterator is None:
+            self._iterator = self._run()
+        return self._iterator
+    
+    def __next__(self) -> str:
+        return next(iter(self))
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> str:
+        import asyncio
+        sentinel = object()
+        chunk = await asyncio.to_thread(next, iter(self), sentinel)
+        if chunk is sentinel:
+            raise StopAsyncIteration
+        return chunk
+    
+    def _emit(self, chunk: str, start: float) -> str:
+        if self.first_token_s is None:
+            self.first_token_s = time.time() - start
+        self.text += chunk
+        return chunk
+    
+    def _run(self):
+        client = self.client
+        tracer = client.tracer
+        start = time.time()
+        root = tracer.start_span("gemini.request", task_type=self.task_type, stream=True)
+        flight = None
+        leader = True
+        failure = None
+        try:
+            # spans are activated only between yields so they never leak into the consumer's code
+            with tracer.activate(root):
+                self.model_name, smart_prompt, cache_key, self.prompt_tokens, cache_prompt = client._prepare_request(
+                    self.prompt, self.task_type, self.context, self.complexity, self.session_id)
+                cached = client._cache_lookup(cache_key, self.use_cache)
+                if cached is None:
+                    similar = client._semantic_lookup(self.prompt, self.task_type, self.context, self.complexity,
+                                                      self.use_cache)
+                    if similar is not None:
+                        cached = similar["value"]
+                        self.similar_to = {"prompt": similar["prompt"], "similarity": similar["similarity"]}
+                        root.set_attribute("similarity", similar["similarity"])
+            root.set_attribute("cached", cached is not None)
+            
+            if cached is None and client.single_flight is not None and self.use_cache:
+                flight, leader = client.single_flight.begin(cache_key)
+                root.set_attribute("coalesced", not leader)
+            
+            if cached is not None:
+                self.cached = True
+                yield self._emit(cached, start)
+            elif not leader:
+                # an identical request is already streaming: replay its chunks as they arrive
+                for piece in flight.follow(client.single_flight.wait_timeout_s):
+                    yield self._emit(piece, start)
+                text, self.model_name, _ = flight.result
+                if not self.text:
+                    yield self._emit(text, start)
+            else:
+                host_lock = client.single_flight.host_lock(cache_key) if flight is not None else nullcontext(False)
+                with host_lock as contended:
+                    cached = client._cache_lookup(cache_key, True) if contended else None
+                    if cached is not None:
+                        self.cached = True
+                        pieces = iter([cached])
+                    else:
+                        pieces = self._upstream(smart_prompt, cache_prompt, start, root)
+                    for piece in pieces:
+                        if flight is not None:
+                            flight.publish(piece)
+                        yield self._emit(piece, start)
+                if flight is not None:
+                    flight.finish((self.text, self.model_name, self.attempts))
+                if not self.cached:
+                    client._semantic_store(self.prompt, self.task_type, self.context, self.complexity, self.text)
+            
+            with tracer.activate(root):
+                with tracer.span("format"):
+                    self.response = client._format_response(self.task_type, self.text, self.context)
+                    if self.similar_to is not None:
+                        self.response = client._similar_note(self.similar_to) + self.response
+                with tracer.span("history"):
+                    client._record(self.task_type, self.prompt, self.response, self.model_name,
+                                   time.time() - start, self.session_id)
+        except Exception as e:
+            failure = e
+            self.error = str(e)
+            self.response = client._error_message(e)
+            if not self.text:
+                yield self._emit(self.response, start)
+        finally:
+            self.latency_s = time.time() - start
+            if flight is not None and leader:
+                client.single_flight.end(flight, failure)
+            root.set_attribute("first_token_s", self.first_token_s)
+            tracer.end_span(root, failure)
+    
+    def _upstream(self, smart_prompt: str, cache_prompt: str, start: float, root):
+        """Stream from the model with retries up to the first chunk; caches the full text at the end."""
+        client = self.client
+        tracer = client.tracer
+        network = tracer.start_span("network", parent=root, model=self.model_name)
+        failure = None
+        
+        def open_stream(name: str, timeout: Optional[float]):
+            # retries (and hedging) cover everything up to the first chunk
+            iterator = iter(client._throttled_generate(name, smart_prompt, self.session_id, INTERACTIVE,
+                                                       timeout, stream=True))
+            return next(iterator, None), iterator
+        
+        try:
+            with tracer.activate(network):
+                try:
+                    (first, rest), self.model_name, self.attempts = call_with_retries(
+                        tracer.wrap(open_stream), client._model_chain(self.model_name), client.retry_policy)
+                except AllAttemptsFailed as e:
+                    self.attempts = e.attempts
+                    raise
+            network.set_attribute("attempts", len(self.attempts))
+            network.set_attribute("served_by", self.model_name)
+            root.set_attribute("model", self.model_name)
+            chunks = rest if first is None else itertools.chain([first], rest)
+            for chunk in chunks:
+                piece = getattr(chunk, "text", "") or ""
+                if piece:
+                    if self.first_token_s is None:
+                        network.set_attribute("first_byte_s", round(time.time() - start, 4))
+                    yield piece
+            if client.cache is not None and self.text.strip():
+                client.cache.set(make_cache_key(self.model_name, cache_prompt, client.generation_config), self.text)
+        except Exception as e:
+            failure = e
+            raise
+        finally:
+            tracer.end_span(network, failure)
+
+# Process-wide client, built on first use so importing this module stays cheap
+_client: Optional[SmartGeminiClient] = None
+_client_lock = threading.Lock()
+
+def get_client() -> SmartGeminiClient:
+    """The shared SmartGeminiClient, created (with .env, cache, limiter and backend) on first call."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                cache = create_default_cache()
+                semantic_cache = None
+                if os.getenv("SEMANTIC_CACHE", "off").lower() in ("on", "1", "true"):
+                    from .semantic_cache import create_default_semantic_cache
+                    semantic_cache = create_default_semantic_cache()
+                _client = SmartGeminiClient(cache=cache, rate_limiter=create_default_limiter(),
+                                            single_flight=create_default_single_flight(cache),
+                                            semantic_cache=semantic_cache)
+    return _client
+
+def existing_client() -> Optional[SmartGeminiClient]:
+    """The shared client if get_client() has already built it; never builds one."""
+    return _client
+
+def __getattr__(name: str):
+    # `smart_client` used to be built at import time; keep the name working
+    if name == "smart_client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def ask_gemini(prompt: str, task_type: str = "general", context: Dict = None, complexity: str = "medium",
+               use_cache: bool = True, session_id: Optional[str] = None) -> str:
     """
     Enhanced Gemini query function with smart prompting and formatting.
     
@@ -638,9 +755,35 @@ def ask_gemini(prompt: str, task_type: str = "general", context: Dict = None, co
         task_type: Type of task for intelligent prompting
         context: Additional context
         complexity: Task complexity level
+        use_cache: Set to False to force a fresh generation
+        session_id: Conversation whose recent history is used as context
+    """
+    return get_client().ask_gemini(prompt, task_type, context, complexity, use_cache, session_id)
+
+def ask_gemini_stream(prompt: str, task_type: str = "general", context: Dict = None, complexity: str = "medium",
+                      use_cache: bool = True, session_id: Optional[str] = None) -> GeminiStream:
+    """
+    Streaming Gemini query; iterate the result to receive chunks as they arrive.
+    
+    Args:
+        prompt: User input
+        task_type: Type of task for intelligent prompting
+        context: Additional context
+        complexity: Task complexity level
+        use_cache: Set to False to force a fresh generation
+        session_id: Conversation whose recent history is used as context
+    """
+    return get_client().ask_gemini_stream(prompt, task_type, context, complexity, use_cache, session_id)
+
+def ask_gemini_batch(jobs: Sequence[Sequence[Any]], max_concurrency: int = 4, timeout_s: Optional[float] = 90.0,
+                     use_cache: bool = True, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Run several (task_type, prompt, context[, complexity]) jobs concurrently.
+    
+    Results come back in job order; see SmartGeminiClient.ask_gemini_batch_async.
     """
-    return smart_client.ask_gemini(prompt, task_type, context, complexity)
+    return get_client().ask_gemini_batch(jobs, max_concurrency, timeout_s, use_cache, session_id)
 
 def get_ai_stats() -> Dict[str, Any]:
     """Get AI usage statistics and performance metrics."""
-    return smart_client.get_usage_stats()
+    return get_client().get_usage_stats()
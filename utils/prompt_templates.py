@@ -0,0 +1,266 @@
+from string import Formatter
+from typing import Dict, Optional, Any
+
+from .tokens import estimate_tokens
+
+TRUNCATION_MARK = " …[truncated]"
+
+
+class PromptTooLarge(ValueError):
+    """The request would exceed the prompt token budget and trimming is disabled."""
+
+
+class PromptTemplate:
+    """
+    A task's prompt, parsed once when the registry is built.
+
+    The text uses `{user_input}` plus named context fields; every context field needs a
+    default so a missing (or None) context still renders. `overhead_tokens` is the
+    estimated size of the fixed text, used to budget the user's input.
+    """
+
+    __slots__ = ("task_type", "text", "defaults", "fields", "overhead_tokens")
+
+    def __init__(self, task_type: str, text: str, defaults: Optional[Dict[str, Any]] = None):
+        self.task_type = task_type
+        self.text = text
+        self.defaults = dict(defaults or {})
+        self.fields = frozenset(name for _, name, _, _ in Formatter().parse(text) if name)
+        missing = self.fields - {"user_input"} - set(self.defaults)
+        if missing:
+            raise ValueError(f"{task_type} template has no default for {sorted(missing)}")
+        self.overhead_tokens = estimate_tokens("".join(literal for literal, _, _, _ in Formatter().parse(text)))
+
+    def render(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> str:
+        values = {**self.defaults, **context} if context else dict(self.defaults)
+        values["user_input"] = user_input
+        return self.text.format_map(values)
+
+
+# Defaults for context fields, matching what the tabs send when a field is left out
+CONTEXT_DEFAULTS = {
+    "financial_forecast": {"initial": 1000, "growth": 10, "churn": 0, "cac": 0, "months": 12},
+    "investor_qa": {"rounds": 5},
+}
+
+_TEMPLATE_TEXT = {
+    "startup_idea": """
+You are an expert startup consultant with 15+ years of experience in venture capital and entrepreneurship. 
+Analyze the following keywords/domain: "{user_input}"
+
+Generate 5 innovative startup ideas with the following structure:
+1. **Core Concept** - One sentence description
+2. **Market Opportunity** - TAM, target market, problem solved
+3. **Business Model** - Revenue streams, key partners, competitive advantage
+4. **Execution Strategy** - 3 concrete steps
+5. **Risk Assessment** - Main challenges
+6. **Next Steps** - Immediate actions
+
+Make each idea:
+- Innovative and disruptive
+- Financially viable
+- Scalable globally
+- Technology-enabled
+- Address real market pain points
+
+Format the response in a professional, investor-ready structure with clear sections and bullet points.
+            """,
+    "market_research": """
+You are a senior market research analyst at a top-tier consulting firm.
+Conduct comprehensive market research for: "{user_input}"
+
+Provide analysis covering:
+1. **Executive Summary** - Key findings
+2. **Market Size & Growth** - TAM, SAM, growth rates, trends
+3. **Competitive Landscape** - Top 5 competitors with analysis
+4. **Customer Segments** - Detailed segmentation
+5. **Strategic Recommendations** - Immediate, medium-term, long-term
+6. **Risk Factors** - Market, competitive, regulatory risks
+7. **Success Metrics** - KPIs to track
+
+Use data-driven insights and provide specific, actionable recommendations.
+Format with professional tables, bullet points, and clear sections.
+            """,
+    "business_model": """
+You are a business model expert and startup advisor.
+Create a comprehensive Business Model Canvas for: "{user_input}"
+
+Structure the response with these 9 building blocks:
+1. **Key Partners** - Strategic alliances, suppliers
+2. **Key Activities** - Core operations, value creation
+3. **Value Propositions** - Customer benefits, differentiation
+4. **Customer Relationships** - How to acquire and retain customers
+5. **Customer Segments** - Target markets, personas
+6. **Key Resources** - Human, financial, physical, intellectual
+7. **Channels** - Distribution, communication channels
+8. **Cost Structure** - Fixed and variable costs
+9. **Revenue Streams** - Pricing models, revenue sources
+
+Add insights on:
+- Business model type (SaaS, Marketplace, etc.)
+- Competitive moat
+- Scalability factors
+
+Format with clear sections, bullet points, and professional structure.
+            """,
+    "financial_forecast": """
+You are a CFO and financial advisor for startups.
+Analyze the financial projection: Initial Revenue: ${initial}, Growth Rate: {growth}%, Churn: {churn}%, CAC per $1 new MRR: ${cac}, Months: {months}
+
+Provide comprehensive financial analysis:
+1. **Revenue Forecast** - Detailed projection analysis
+2. **Key Assumptions** - Growth drivers, market factors
+3. **Financial Metrics** - Unit economics, profitability
+4. **Break-even Analysis** - Timeline and requirements
+5. **Funding Requirements** - Capital needs and timing
+6. **Risk Factors** - Financial risks and mitigations
+7. **Recommendations** - Strategic financial advice
+
+Include specific numbers, percentages, and actionable insights.
+Format with professional tables and clear financial metrics.
+            """,
+    "swot_analysis": """
+You are a strategic management consultant.
+Conduct a comprehensive SWOT analysis for: "{user_input}"
+
+Provide detailed analysis in these areas:
+
+**Strengths:**
+- Internal capabilities and advantages
+- Unique resources and competencies
+
+**Weaknesses:**
+- Internal limitations and gaps
+- Areas needing improvement
+
+**Opportunities:**
+- External factors to leverage
+- Market trends and possibilities
+
+**Threats:**
+- External challenges and risks
+- Competitive and market threats
+
+**Strategic Risks:**
+- Probability and impact assessment
+- Mitigation strategies
+
+**Action Items:**
+- Prioritized recommendations
+- Implementation timeline
+
+Format with clear sections, risk matrices, and actionable insights.
+            """,
+    "pitch_refinement": """
+You are a pitch coach who has helped 100+ startups raise over $2B in funding.
+Refine this pitch for investors: "{user_input}"
+
+Transform it into a compelling investor pitch with:
+1. **Problem Statement** - Clear pain point
+2. **Solution** - Your unique approach
+3. **Market Opportunity** - Size and growth
+4. **Business Model** - How you make money
+5. **Traction & Metrics** - Key performance indicators
+6. **Competitive Advantage** - Your moat
+7. **Team** - Key personnel and expertise
+8. **Financials** - Revenue, growth, projections
+9. **Ask** - Specific funding request
+10. **Call to Action** - Next steps
+
+Make it:
+- Concise and impactful
+- Data-driven
+- Investor-focused
+- Professional and polished
+
+Format with clear sections and bullet points for easy reading.
+            """,
+    "investor_qa": """
+You are a venture capital partner with 20+ years of experience.
+Simulate investor questions for this startup: "{user_input}"
+
+Generate {rounds} challenging questions covering:
+- Market validation
+- Competitive positioning
+- Financial projections
+- Team capabilities
+- Execution risks
+- Scalability concerns
+
+For each question, provide:
+- The question (skeptical but fair)
+- Recommended response approach
+- Key points to emphasize
+- Potential follow-up questions
+
+Include:
+- Preparation tips
+- Red flags to address
+- Success metrics for the Q&A
+
+Format with clear Q&A structure and professional insights.
+            """,
+    "branding_kit": """
+You are a senior brand strategist at a top branding agency.
+Create a comprehensive branding kit for: "{user_input}"
+
+Generate:
+
+**Company Names (6 options):**
+- Creative and memorable
+- Domain availability considered
+- Cultural sensitivity checked
+
+**Taglines (3 options):**
+- Compelling and concise
+- Brand promise focused
+- Different from competitors
+
+**Brand Positioning:**
+- Core value proposition
+- Target audience
+- Competitive differentiation
+
+**Visual Identity:**
+- Color palette recommendations
+- Typography suggestions
+- Logo concept direction
+
+**Brand Voice:**
+- Personality traits
+- Communication style
+- Tone guidelines
+
+**Messaging Framework:**
+- Key messages
+- Value propositions
+- Brand story
+
+Format with professional structure and clear brand guidelines.
+            """,
+}
+
+PROMPT_TEMPLATES: Dict[str, PromptTemplate] = {
+    task_type: PromptTemplate(task_type, text, CONTEXT_DEFAULTS.get(task_type))
+    for task_type, text in _TEMPLATE_TEXT.items()
+}
+
+
+def render_prompt(task_type: str, user_input: str, context: Optional[Dict[str, Any]] = None) -> str:
+    """Prompt for `task_type`; unknown task types send the user's input as is."""
+    template = PROMPT_TEMPLATES.get(task_type)
+    return template.render(user_input, context) if template is not None else user_input
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` (at a word boundary where possible) so it fits in `max_tokens` estimated tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max(max_tokens - estimate_tokens(TRUNCATION_MARK), 1)
+    cut = len(text) * budget // estimate_tokens(text)
+    while cut > 0 and estimate_tokens(text[:cut]) > budget:
+        cut = cut * 9 // 10
+    space = text.rfind(" ", 0, cut)
+    if space > cut // 2:
+        cut = space
+    return text[:cut].rstrip() + TRUNCATION_MARK
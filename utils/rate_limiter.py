@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)  # served strictly in this order
+
+# (requests per minute, tokens per minute); paid-tier Gemini API quotas
+DEFAULT_LIMITS: Dict[str, Tuple[int, int]] = {
+    "gemini-2.0-flash": (2000, 4_000_000),
+    "gemini-2.0-flash-exp": (10, 4_000_000),
+    "gemini-1.5-flash": (2000, 4_000_000),
+    "gemini-1.5-pro": (1000, 4_000_000),
+}
+FALLBACK_LIMIT = (60, 1_000_000)
+
+
+class QueueTimeout(TimeoutError):
+    """The request waited longer than its deadline for quota."""
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate_per_s`, holding at most `capacity`."""
+
+    def __init__(self, rate_per_s: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate_per_s = rate_per_s
+        self.capacity = capacity
+        self.clock = clock
+        self.level = capacity
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate_per_s)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` could be taken (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # oversize requests wait for a full bucket
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate_per_s
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        """Return `amount` (or charge it, if negative) after the fact."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Waiter:
+    __slots__ = ("model", "tokens", "session", "priority", "enqueued", "granted")
+
+    def __init__(self, model: str, tokens: int, session: str, priority: str, enqueued: float):
+        self.model = model
+        self.tokens = tokens
+        self.session = session
+        self.priority = priority
+        self.enqueued = enqueued
+        self.granted = False
+
+
+class RateLimiter:
+    """
+    Per-model requests-per-minute and tokens-per-minute limiter with a fair queue.
+
+    Waiting requests are ordered by priority (interactive before batch) and, within a
+    priority, round-robin across sessions so one busy session cannot starve the others.
+    Only the first waiter for each model in that order may take quota, which keeps large
+    requests from being overtaken indefinitely by small ones. Callers reserve prompt plus
+    expected output tokens up front and `reconcile` the charge once actual usage is known.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, int]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.clock = clock
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._queues: Dict[str, "OrderedDict[str, deque]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._cond = threading.Condition()
+        from .usage_metrics import LatencyHistogram  # deferred: pulls in the usage-log modules
+        self._wait_hist = {p: LatencyHistogram(min_value=0.0001) for p in PRIORITIES}
+        self.stats = {p: {"granted": 0, "timed_out": 0, "total_wait_s": 0.0, "max_wait_s": 0.0} for p in PRIORITIES}
+
+    def _bucket_pair(self, model: str) -> Tuple[TokenBucket, TokenBucket]:
+        pair = self._buckets.get(model)
+        if pair is None:
+            rpm, tpm = self.limits.get(model, FALLBACK_LIMIT)
+            pair = self._buckets[model] = (TokenBucket(rpm / 60.0, rpm, self.clock),
+                                           TokenBucket(tpm / 60.0, tpm, self.clock))
+        return pair
+
+    def _ordered_waiters(self):
+        for priority in PRIORITIES:
+            sessions = self._queues[priority]
+            depth = 0
+            # round-robin: first waiter of each session, then second of each, ...
+            while True:
+                emitted = False
+                for queue in sessions.values():
+                    if depth < len(queue):
+                        emitted = True
+                        yield queue[depth]
+                if not emitted:
+                    break
+                depth += 1
+
+    def _dispatch(self) -> float:
+        """Grant whatever can run now; returns seconds until the next grant might be possible."""
+        next_check = 1.0
+        blocked_models = set()
+        for waiter in list(self._ordered_waiters()):
+            if waiter.model in blocked_models:
+                continue
+            requests, tokens = self._bucket_pair(waiter.model)
+            wait = max(requests.wait_time(1), tokens.wait_time(waiter.tokens))
+            if wait > 0:
+                blocked_models.add(waiter.model)
+                next_check = min(next_check, wait)
+                continue
+            requests.take(1)
+            tokens.take(waiter.tokens)
+            waiter.granted = True
+            sessions = self._queues[waiter.priority]
+            queue = sessions[waiter.session]
+            queue.remove(waiter)
+            # the session just served goes to the back of the rotation
+            del sessions[waiter.session]
+            if queue:
+                sessions[waiter.session] = queue
+        return next_check
+
+    def acquire(self, model: str, tokens: int = 0, session_id: Optional[str] = None,
+                priority: str = INTERACTIVE, timeout: Optional[float] = None) -> float:
+        """Block until `model` has quota for one request of `tokens` tokens; returns seconds waited."""
+        session = session_id or "default"
+        with self._cond:
+            waiter = _Waiter(model, tokens, session, priority, self.clock())
+            self._queues[priority].setdefault(session, deque()).append(waiter)
+            deadline = waiter.enqueued + timeout if timeout is not None else None
+            while True:
+                next_check = self._dispatch()
+                if waiter.granted:
+                    self._cond.notify_all()
+                    break
+                remaining = deadline - self.clock() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    self._abandon(waiter)
+                    self.stats[priority]["timed_out"] += 1
+                    raise QueueTimeout(f"waited {timeout:g}s for {model} quota")
+                self._cond.wait(next_check if remaining is None else min(next_check, remaining))
+            waited = self.clock() - waiter.enqueued
+            stats = self.stats[priority]
+            stats["granted"] += 1
+            stats["total_wait_s"] += waited
+            stats["max_wait_s"] = max(stats["max_wait_s"], waited)
+            self._wait_hist[priority].add(waited)
+            return waited
+
+    def reconcile(self, model: str, reserved: int, used: int) -> None:
+        """Correct a granted request's token charge from `reserved` to what it actually `used`."""
+        if used == reserved:
+            return
+        with self._cond:
+            tokens = self._bucket_pair(model)[1]
+            # take() charged at most a full bucket, so credit back only what was actually charged
+            tokens.give(min(reserved, tokens.capacity) - used)
+            self._cond.notify_all()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        sessions = self._queues[waiter.priority]
+        queue = sessions.get(waiter.session)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del sessions[waiter.session]
+        self._cond.notify_all()
+
+    def queue_depth(self) -> Dict[str, int]:
+        with self._cond:
+            return {p: sum(len(q) for q in self._queues[p].values()) for p in PRIORITIES}
+
+    def summary(self) -> List[Dict[str, Any]]:
+        depth = self.queue_depth()
+        rows = []
+        for priority in PRIORITIES:
+            stats = self.stats[priority]
+            rows.append({
+                "priority": priority,
+                "queued": depth[priority],
+                "granted": stats["granted"],
+                "timed_out": stats["timed_out"],
+                "mean_wait_s": round(stats["total_wait_s"] / max(stats["granted"], 1), 4),
+                "p50_wait_s": self._wait_hist[priority].percentile(50),
+                "p95_wait_s": self._wait_hist[priority].percentile(95),
+                "max_wait_s": round(stats["max_wait_s"], 4),
+            })
+        return rows
+
+
+def create_default_limiter() -> Optional[RateLimiter]:
+    """Limiter described by GEMINI_RATE_LIMIT (on/off) and GEMINI_RATE_LIMITS (JSON overrides)."""
+    if os.getenv("GEMINI_RATE_LIMIT", "on").lower() in ("off", "0", "false"):
+        return None
+    limits = dict(DEFAULT_LIMITS)
+    overrides = os.getenv("GEMINI_RATE_LIMITS")
+    if overrides:
+        limits.update({model: tuple(value) for model, value in json.loads(overrides).items()})
+    return RateLimiter(limits)
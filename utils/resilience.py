@@ -0,0 +1,187 @@
+import os
+import time
+import random
+import threading
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+# Outcomes recorded per attempt
+OK = "ok"
+RATE_LIMITED = "rate_limited"
+TRANSIENT = "transient"
+UNAVAILABLE = "unavailable"
+FATAL = "fatal"
+
+# google.api_core exception class names, matched by name so the SDK stays optional here
+_RATE_LIMIT_ERRORS = {"ResourceExhausted", "TooManyRequests"}
+_TRANSIENT_ERRORS = {"ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "GatewayTimeout",
+                     "BadGateway", "Aborted", "Unknown", "RetryError", "TimeoutError", "ConnectionError",
+                     "ConnectionResetError", "ReadTimeout"}
+_UNAVAILABLE_ERRORS = {"NotFound"}
+
+
+def classify_error(error: BaseException) -> str:
+    """Map an exception from generate_content to one of the retry outcomes."""
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & _RATE_LIMIT_ERRORS:
+        return RATE_LIMITED
+    if names & _UNAVAILABLE_ERRORS:
+        return UNAVAILABLE
+    if names & _TRANSIENT_ERRORS:
+        return TRANSIENT
+    code = getattr(error, "code", None)
+    code = getattr(code, "value", code)
+    if code == 429:
+        return RATE_LIMITED
+    if code in (500, 502, 503, 504):
+        return TRANSIENT
+    message = str(error).lower()
+    if "429" in message or "quota" in message or "rate limit" in message:
+        return RATE_LIMITED
+    return FATAL
+
+
+class RetryPolicy:
+    """
+    How a request is retried.
+
+    Transient errors retry the same model up to `retries_per_model` times (so up to
+    retries_per_model + 1 attempts on it); rate limits and unavailable models move
+    straight to the next fallback model. Every retry waits a full-jitter exponential
+    backoff. `attempt_timeout_s` is passed to the SDK as the per-attempt deadline; if
+    `hedge_after_s` is set, a second request is started when the first has not answered
+    within that many seconds and the first to succeed wins.
+    """
+
+    def __init__(self, max_attempts: int = 4, retries_per_model: int = 1, base_delay_s: float = 0.5,
+                 max_delay_s: float = 8.0, attempt_timeout_s: Optional[float] = 60.0,
+                 hedge_after_s: Optional[float] = None, fallback: bool = True):
+        self.max_attempts = max_attempts
+        self.retries_per_model = retries_per_model
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.attempt_timeout_s = attempt_timeout_s
+        self.hedge_after_s = hedge_after_s
+        self.fallback = fallback
+
+    def backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * (2 ** retry)))
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        hedge = os.getenv("GEMINI_HEDGE_AFTER_S")
+        return cls(
+            max_attempts=int(os.getenv("GEMINI_MAX_ATTEMPTS", 4)),
+            attempt_timeout_s=float(os.getenv("GEMINI_ATTEMPT_TIMEOUT_S", 60)),
+            hedge_after_s=float(hedge) if hedge else None,
+            fallback=os.getenv("GEMINI_MODEL_FALLBACK", "1") not in ("0", "false", "off"),
+        )
+
+
+class AllAttemptsFailed(Exception):
+    """Raised when every attempt failed; `attempts` holds the per-attempt history."""
+
+    def __init__(self, last_error: BaseException, attempts: List[Dict[str, Any]]):
+        super().__init__(f"{last_error} (after {len(attempts)} attempt{'s' if len(attempts) != 1 else ''}: "
+                         f"{format_attempts(attempts)})")
+        self.last_error = last_error
+        self.attempts = attempts
+
+
+def format_attempts(attempts: List[Dict[str, Any]]) -> str:
+    """Compact form for the usage log, e.g. `gemini-1.5-pro:rate_limited:0.41|gemini-2.0-flash:ok:7.20`."""
+    return "|".join(f"{a['model']}:{a['outcome']}:{a['latency_s']:.2f}" for a in attempts)
+
+
+# Runs only the hedge requests (primaries get their own thread), so it bounds concurrent hedges, not calls;
+# created with the first hedge so importing this module stays cheap
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _get_hedge_pool():
+    global _hedge_pool
+    if _hedge_pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        with _hedge_pool_lock:
+            if _hedge_pool is None:
+                _hedge_pool = ThreadPoolExecutor(max_workers=int(os.getenv("GEMINI_HEDGE_WORKERS", 8)),
+                                                 thread_name_prefix="gemini-hedge")
+    return _hedge_pool
+
+
+def call_with_retries(call: Callable[[str, Optional[float]], Any], models: List[str], policy: RetryPolicy,
+                      sleep: Callable[[float], None] = time.sleep) -> Tuple[Any, str, List[Dict[str, Any]]]:
+    """
+    Run `call(model_name, timeout_s)` under `policy`, walking down `models` on failure.
+
+    Returns (result, model that produced it, attempt history); raises AllAttemptsFailed.
+    """
+    chain = list(models) if policy.fallback else list(models[:1])
+    attempts: List[Dict[str, Any]] = []
+    index, retries_here, last_error = 0, 0, None
+    while len(attempts) < policy.max_attempts and index < len(chain):
+        model_name = chain[index]
+        start = time.time()
+        try:
+            if policy.hedge_after_s is not None:
+                hedge_model = chain[index + 1] if index + 1 < len(chain) else model_name
+                result, model_name, hedged = _hedged(call, model_name, hedge_model, policy)
+                if hedged:
+                    attempts.append({"model": chain[index], "outcome": "hedged", "latency_s": time.time() - start})
+            else:
+                result = call(model_name, policy.attempt_timeout_s)
+            attempts.append({"model": model_name, "outcome": OK, "latency_s": time.time() - start})
+            return result, model_name, attempts
+        except Exception as e:
+            outcome = classify_error(e)
+            attempts.append({"model": model_name, "outcome": outcome, "latency_s": time.time() - start})
+            last_error = e
+            if outcome == FATAL:
+                break
+            retries_here += 1
+            if outcome in (RATE_LIMITED, UNAVAILABLE) or retries_here > policy.retries_per_model:
+                index, retries_here = index + 1, 0
+            if len(attempts) < policy.max_attempts and index < len(chain) and outcome != UNAVAILABLE:
+                sleep(policy.backoff(len(attempts) - 1))
+    raise AllAttemptsFailed(last_error, attempts)
+
+
+def _hedged(call: Callable[[str, Optional[float]], Any], model_name: str, hedge_model: str,
+            policy: RetryPolicy) -> Tuple[Any, str, bool]:
+    """Start `call(model_name)`; if it is still running after hedge_after_s, race it against `call(hedge_model)`."""
+    from concurrent.futures import wait, FIRST_COMPLETED
+    primary = _start_thread(call, model_name, policy.attempt_timeout_s)
+    done, _ = wait([primary], timeout=policy.hedge_after_s)
+    if done:
+        return primary.result(), model_name, False
+    hedge = _get_hedge_pool().submit(call, hedge_model, policy.attempt_timeout_s)
+    futures = {primary: model_name, hedge: hedge_model}
+    pending = set(futures)
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, timeout=policy.attempt_timeout_s, return_when=FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError(f"no response within {policy.attempt_timeout_s:g}s")
+        for future in done:
+            if future.exception() is None:
+                # the slower request keeps running in the background; its result is discarded
+                return future.result(), futures[future], True
+            error = future.exception()
+    raise error
+
+
+def _start_thread(call: Callable[[str, Optional[float]], Any], *args: Any) -> "Future":
+    """`call(*args)` on a thread of its own, as a Future."""
+    from concurrent.futures import Future
+    future = Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(call(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="gemini-primary", daemon=True).start()
+    return future
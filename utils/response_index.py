@@ -0,0 +1,303 @@
+"""
+Local store of every AI response with a keyword index over it.
+
+    python -m utils.response_index search "logistics southeast asia" --module "Idea Generator"
+    python -m utils.response_index compact --max-age-days 180
+
+Segments are merged automatically as they accumulate; the compact command is for
+dropping old responses (--max-age-days), e.g. from a periodic job.
+"""
+import os
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+import argparse
+import threading
+from collections import Counter
+from heapq import nlargest
+from typing import Dict, List, Optional, Any, Iterable
+
+from .text_metrics import keywords
+
+DEFAULT_INDEX_PATH = os.path.join(os.getcwd(), "data", "responses.sqlite")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseIndex:
+    """
+    Every AI response ever produced, stored once and searchable by keyword.
+
+    Responses are zlib-compressed in SQLite and deduplicated by content hash: a repeat
+    only bumps its `seen` count and `last_seen`. The inverted index (keyword -> {doc id:
+    term frequency}, tokenized like text_metrics' keywords) lives in memory and is
+    persisted as immutable segments of `segment_size` documents; documents newer than
+    the last segment are indexed from their rows on open and before each search, which
+    also picks up responses added by other processes. `compact` merges all segments
+    into one and can drop old responses; it also runs automatically whenever writing a
+    segment brings the count to `compact_after` (None disables that).
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, segment_size: int = 500,
+                 compact_after: Optional[int] = 16):
+        self.path = path
+        self.segment_size = segment_size
+        self.compact_after = compact_after
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._modules: Dict[int, str] = {}
+        self._pending: Dict[int, Counter] = {}  # indexed but not yet in a segment
+        self._indexed_upto = 0
+        self._executor = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " id INTEGER PRIMARY KEY,"
+                " hash TEXT NOT NULL UNIQUE,"
+                " module TEXT NOT NULL,"
+                " prompt TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_seen REAL NOT NULL,"
+                " seen INTEGER NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " data BLOB NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                " id INTEGER PRIMARY KEY,"
+                " last_doc INTEGER NOT NULL,"
+                " docs INTEGER NOT NULL,"
+                " data BLOB NOT NULL)"
+            )
+        self._load()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self) -> None:
+        conn = self._conn()
+        with self._lock:
+            self._postings, self._pending, self._indexed_upto = {}, {}, 0
+            self._modules = dict(conn.execute("SELECT id, module FROM responses"))
+            for last_doc, data in conn.execute("SELECT last_doc, data FROM segments ORDER BY id"):
+                for term, flat in json.loads(zlib.decompress(data)).items():
+                    self._postings.setdefault(term, {}).update(zip(flat[::2], flat[1::2]))
+                self._indexed_upto = max(self._indexed_upto, last_doc)
+        self._catch_up(auto_compact=False)
+
+    def add(self, module: str, prompt: str, response: str) -> int:
+        """Store a response (or count a repeat of one already stored); returns its document id."""
+        if not response.strip():
+            return 0
+        now = time.time()
+        raw = response.encode("utf-8")
+        digest = content_hash(response)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO responses (hash, module, prompt, created, last_seen, seen, size, data)"
+                " VALUES (?, ?, ?, ?, ?, 1, ?, ?)"
+                " ON CONFLICT(hash) DO UPDATE SET last_seen = excluded.last_seen, seen = seen + 1",
+                (digest, module, prompt, now, now, len(raw), zlib.compress(raw, 6)),
+            )
+            doc_id = conn.execute("SELECT id FROM responses WHERE hash = ?", (digest,)).fetchone()[0]
+        self._catch_up()
+        return doc_id
+
+    def submit(self, module: str, prompt: str, response: str) -> None:
+        """`add` on a background thread, for callers on the request path."""
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-index")
+        self._executor.submit(self.add, module, prompt, response)
+
+    def _catch_up(self, auto_compact: bool = True) -> None:
+        """Index rows added since the last call (by any process); write a segment once enough are pending."""
+        segments = 0
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT id, module, data FROM responses WHERE id > ? ORDER BY id", (self._indexed_upto,)
+            ).fetchall()
+            for doc_id, module, data in rows:
+                terms = Counter(keywords(zlib.decompress(data).decode("utf-8")))
+                for term, tf in terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+                self._modules[doc_id] = module
+                self._pending[doc_id] = terms
+                self._indexed_upto = doc_id
+            if len(self._pending) >= self.segment_size:
+                segments = self._write_segment()
+        # outside the lock: compact takes it itself
+        if auto_compact and self.compact_after is not None and segments >= self.compact_after:
+            self.compact(min_segments=self.compact_after)
+
+    def _write_segment(self) -> int:
+        """Persist the pending documents as a segment; returns the number of segments now stored."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # another process may already have written a segment covering some of these documents
+            persisted = conn.execute("SELECT COALESCE(MAX(last_doc), 0) FROM segments").fetchone()[0]
+            docs = sorted(doc for doc in self._pending if doc > persisted)
+            if docs:
+                postings: Dict[str, List[int]] = {}
+                for doc in docs:
+                    for term, tf in self._pending[doc].items():
+                        postings.setdefault(term, []).extend((doc, tf))
+                conn.execute("INSERT INTO segments (last_doc, docs, data) VALUES (?, ?, ?)",
+                             (docs[-1], len(docs), zlib.compress(json.dumps(postings).encode("utf-8"))))
+            segments = conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        self._pending = {}
+        return segments
+
+    def search(self, query: str, modules: Optional[Iterable[str]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Responses containing every keyword in `query`, best first.
+
+        Ranked by the summed frequency of the query terms, newest first on ties;
+        `modules` restricts results to those modules.
+        """
+        terms = set(keywords(query))
+        if not terms:
+            return []
+        self._catch_up()
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            if modules is not None:
+                allowed = set(modules)
+                candidates = {doc for doc in candidates if self._modules.get(doc) in allowed}
+            ranked = nlargest(limit, candidates, key=lambda doc: (sum(p[doc] for p in postings), doc))
+        if not ranked:
+            return []
+        rows = self._conn().execute(
+            f"SELECT id, module, prompt, created, last_seen, seen, data FROM responses"
+            f" WHERE id IN ({','.join('?' * len(ranked))})", ranked
+        ).fetchall()
+        found = {row[0]: row for row in rows}
+        results = []
+        for doc in ranked:
+            if doc not in found:  # removed by a compaction in another process
+                continue
+            _, module, prompt, created, last_seen, seen, data = found[doc]
+            results.append({"id": doc, "module": module, "prompt": prompt, "created": created,
+                            "last_seen": last_seen, "seen": seen,
+                            "response": zlib.decompress(data).decode("utf-8")})
+        return results
+
+    def compact(self, max_age_days: Optional[float] = None, min_segments: int = 2) -> Dict[str, int]:
+        """
+        Merge every segment into one, first dropping responses not seen in `max_age_days`.
+
+        Pending documents are included, so afterwards the whole index is one segment.
+        Without `max_age_days`, nothing happens until there are `min_segments` segments.
+        """
+        self._catch_up(auto_compact=False)
+        conn = self._conn()
+        if max_age_days is None and conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0] < min_segments:
+            return {"segments_merged": 0, "responses_removed": 0}
+        with self._lock:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                removed = 0
+                if max_age_days is not None:
+                    removed = conn.execute("DELETE FROM responses WHERE last_seen < ?",
+                                           (time.time() - max_age_days * 86400,)).rowcount
+                live = {doc for (doc,) in conn.execute("SELECT id FROM responses")}
+                merged: Dict[str, Dict[int, int]] = {}
+                segments = 0
+                for (data,) in conn.execute("SELECT data FROM segments"):
+                    segments += 1
+                    for term, flat in json.loads(zlib.decompress(data)).items():
+                        merged.setdefault(term, {}).update(zip(flat[::2], flat[1::2]))
+                for doc, terms in self._pending.items():
+                    for term, tf in terms.items():
+                        merged.setdefault(term, {})[doc] = tf
+                postings = {}
+                for term, docs in merged.items():
+                    flat = [v for doc in sorted(docs) if doc in live for v in (doc, docs[doc])]
+                    if flat:
+                        postings[term] = flat
+                conn.execute("DELETE FROM segments")
+                if postings:
+                    indexed = {doc for flat in postings.values() for doc in flat[::2]}
+                    conn.execute("INSERT INTO segments (last_doc, docs, data) VALUES (?, ?, ?)",
+                                 (self._indexed_upto, len(indexed), zlib.compress(json.dumps(postings).encode("utf-8"))))
+        self._load()
+        return {"segments_merged": segments, "responses_removed": removed}
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        responses, raw, stored, seen = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0), COALESCE(SUM(seen), 0)"
+            " FROM responses").fetchone()
+        segments = conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {"responses": responses, "duplicates_skipped": seen - responses, "segments": segments,
+                "pending": len(self._pending), "terms": len(self._postings),
+                "raw_bytes": raw, "stored_bytes": stored}
+
+    def __len__(self) -> int:
+        return len(self._modules)
+
+
+_default_index: Optional[ResponseIndex] = None
+_default_lock = threading.Lock()
+
+
+def response_index() -> Optional[ResponseIndex]:
+    """Shared index at RESPONSE_INDEX_PATH, or None when RESPONSE_INDEX=off."""
+    global _default_index
+    if os.getenv("RESPONSE_INDEX", "on").lower() in ("off", "0", "false"):
+        return None
+    with _default_lock:
+        if _default_index is None:
+            try:
+                _default_index = ResponseIndex(os.getenv("RESPONSE_INDEX_PATH", DEFAULT_INDEX_PATH))
+            except (sqlite3.Error, OSError):
+                return None
+        return _default_index
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Search and maintain the stored AI responses.")
+    parser.add_argument("--path", default=DEFAULT_INDEX_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    search = sub.add_parser("search", help="find stored responses containing every keyword")
+    search.add_argument("query")
+    search.add_argument("--module", action="append")
+    search.add_argument("--limit", type=int, default=10)
+    compact = sub.add_parser("compact", help="merge index segments, optionally dropping old responses")
+    compact.add_argument("--max-age-days", type=float)
+    compact.add_argument("--min-segments", type=int, default=2)
+    sub.add_parser("stats", help="storage and index sizes")
+    args = parser.parse_args(argv)
+    index = ResponseIndex(args.path)
+    if args.command == "search":
+        for hit in index.search(args.query, args.module, args.limit):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(hit["last_seen"]))
+            print(f"#{hit['id']}  {when}  {hit['module']}  x{hit['seen']}  {hit['prompt'][:70]}")
+    elif args.command == "compact":
+        result = index.compact(args.max_age_days, args.min_segments)
+        print(f"Merged {result['segments_merged']} segments, removed {result['responses_removed']} responses")
+    else:
+        print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
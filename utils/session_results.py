@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+
+DEFAULT_RESULTS_PATH = os.path.join(os.getcwd(), "data", "session_results.sqlite")
+
+
+def result_key(tab: str, inputs: Dict[str, Any]) -> str:
+    """Key for one submission of a tab: the tab plus every input that shapes its output."""
+    payload = json.dumps({"tab": tab, "inputs": inputs}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SessionResultsDB:
+    """Optional on-disk tier, so a session's results survive a page reload or a server restart."""
+
+    def __init__(self, path: str = DEFAULT_RESULTS_PATH, max_per_session: int = 50):
+        self.path = path
+        self.max_per_session = max_per_session
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_results ("
+                " session_id TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " PRIMARY KEY (session_id, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_session_results_created"
+                         " ON session_results(session_id, created)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str) -> List[Dict[str, Any]]:
+        """Entries for `session_id`, oldest first."""
+        rows = self._conn().execute(
+            "SELECT payload FROM session_results WHERE session_id = ? ORDER BY created", (session_id,)
+        ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def save(self, session_id: str, entry: Dict[str, Any]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO session_results (session_id, key, created, payload) VALUES (?, ?, ?, ?)",
+                (session_id, entry["key"], entry["created"], json.dumps(entry, ensure_ascii=False, default=str)),
+            )
+            conn.execute(
+                "DELETE FROM session_results WHERE session_id = ? AND key NOT IN ("
+                " SELECT key FROM session_results WHERE session_id = ? ORDER BY created DESC LIMIT ?)",
+                (session_id, session_id, self.max_per_session),
+            )
+
+
+class SessionResults:
+    """
+    Results produced in one browser session, keyed by `result_key(tab, inputs)`.
+
+    Lives in st.session_state so results survive reruns; with a SessionResultsDB every
+    entry is also written through to disk and reloaded when the session comes back.
+    Re-submitting identical inputs in a tab returns the stored entry instead of a new call.
+    """
+
+    def __init__(self, session_id: str, max_entries: int = 50, disk: Optional[SessionResultsDB] = None):
+        self.session_id = session_id
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        if disk is not None:
+            try:
+                for entry in disk.load(session_id)[-max_entries:]:
+                    self._entries[entry["key"]] = entry
+            except sqlite3.Error:
+                self.disk = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(key)
+
+    def put(self, tab: str, inputs: Dict[str, Any], prompt: str, response: Any, **details: Any) -> Dict[str, Any]:
+        """Store a result; `details` carries display metadata such as model, latency_s and ttft_s."""
+        key = result_key(tab, inputs)
+        entry = {"key": key, "tab": tab, "inputs": inputs, "prompt": prompt, "response": response,
+                 "created": time.time(), **details}
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if self.disk is not None:
+            try:
+                self.disk.save(self.session_id, entry)
+            except sqlite3.Error:
+                pass  # the in-session copy is enough to keep the UI working
+        return entry
+
+    def touch(self, key: str) -> Optional[Dict[str, Any]]:
+        """Mark an entry as the tab's most recent result (used when it is re-submitted)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def latest(self, tab: str) -> Optional[Dict[str, Any]]:
+        for entry in reversed(self._entries.values()):
+            if entry["tab"] == tab:
+                return entry
+        return None
+
+    def history(self) -> List[Dict[str, Any]]:
+        """All stored entries, newest first."""
+        return list(reversed(self._entries.values()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_db: Optional[SessionResultsDB] = None
+_default_lock = threading.Lock()
+
+
+def session_results_db() -> Optional[SessionResultsDB]:
+    """Shared disk tier when SESSION_RESULTS=disk (path from SESSION_RESULTS_PATH), else None."""
+    global _default_db
+    if os.getenv("SESSION_RESULTS", "memory").lower() != "disk":
+        return None
+    with _default_lock:
+        if _default_db is None:
+            try:
+                _default_db = SessionResultsDB(os.getenv("SESSION_RESULTS_PATH", DEFAULT_RESULTS_PATH))
+            except (sqlite3.Error, OSError):
+                return None
+        return _default_db
@@ -0,0 +1,179 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Callable, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalescing stays in-process
+    fcntl = None
+
+DEFAULT_LOCK_DIR = os.path.join(os.getcwd(), "data", "singleflight")
+
+
+class Flight:
+    """
+    One upstream call in progress, shared by every caller that asked for the same key.
+
+    The leader publishes text chunks as they arrive and finishes with a result or an
+    error; followers replay the chunks (streaming) or wait for the outcome.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.chunks: List[str] = []
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        self.followers = 0
+        self._cond = threading.Condition()
+
+    def publish(self, chunk: str) -> None:
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            if self.finished:
+                return
+            self.result, self.error, self.finished = result, error, True
+            self._cond.notify_all()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def follow(self, timeout: Optional[float] = None) -> Iterator[str]:
+        """Yield every chunk, including ones published before joining; raises the leader's error."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.finished:
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"coalesced request still running after {timeout:g}s")
+                    self._cond.wait(remaining)
+                pending = self.chunks[index:]
+                finished = self.finished
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index >= len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        for _ in self.follow(timeout):
+            pass
+        return self.result
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical requests into one upstream call.
+
+    Within a process, the first caller for a key becomes the leader and later callers
+    follow its Flight until it finishes. With `lock_dir` set, leaders in different
+    processes also serialize on a per-key file lock; a leader that had to wait for the
+    lock re-checks the shared store (the on-disk response cache) before calling upstream.
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None, wait_timeout_s: float = 300.0):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.wait_timeout_s = wait_timeout_s
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "followers": 0, "cross_process_waits": 0}
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def begin(self, key: str) -> Tuple[Flight, bool]:
+        """Join the flight for `key`; returns (flight, True) if the caller must lead it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self.stats["followers"] += 1
+                return flight, False
+            flight = self._flights[key] = Flight(key)
+            self.stats["leaders"] += 1
+            return flight, True
+
+    def end(self, flight: Flight, error: Optional[BaseException] = None) -> None:
+        """Leader is done: release followers (with `error` if it never finished) and retire the key."""
+        if not flight.finished:
+            flight.finish(error=error or RuntimeError("request ended before producing a result"))
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    @contextmanager
+    def host_lock(self, key: str):
+        """Exclusive per-key lock shared by processes using the same lock_dir; yields True if it was contended."""
+        if not self.lock_dir:
+            yield False
+            return
+        path = os.path.join(self.lock_dir, key[:40] + ".lock")
+        with open(path, "a") as handle:
+            contended = False
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                contended = True
+                self.stats["cross_process_waits"] += 1
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield contended
+            finally:
+                try:
+                    # a process still waiting on the old file re-checks the store once it gets the lock
+                    os.unlink(path)
+                except OSError:
+                    pass
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def do(self, key: str, fn: Callable[[], Any], recheck: Optional[Callable[[], Any]] = None) -> Tuple[Any, bool]:
+        """
+        Run `fn` once for all concurrent callers of `key`; returns (result, shared).
+
+        `recheck` is consulted after waiting on another process and may return a result
+        (not None) to skip the call. The leader's exception is raised in every caller.
+        """
+        flight, leader = self.begin(key)
+        if not leader:
+            return flight.wait(self.wait_timeout_s), True
+        try:
+            with self.host_lock(key) as contended:
+                result = recheck() if contended and recheck is not None else None
+                if result is None:
+                    result = fn()
+            flight.finish(result)
+            return result, False
+        except BaseException as e:
+            flight.finish(error=e)
+            raise
+        finally:
+            self.end(flight)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+def create_default_single_flight(cache: Any = None) -> Optional[SingleFlight]:
+    """
+    Coalescing described by GEMINI_SINGLEFLIGHT: "process" (default), "host" or "off".
+
+    "host" also coalesces across worker processes and needs the on-disk response cache,
+    which is where waiting processes pick up the leader's result.
+    """
+    mode = os.getenv("GEMINI_SINGLEFLIGHT", "process").lower()
+    if mode in ("off", "0", "false", "none"):
+        return None
+    if mode == "host" and getattr(cache, "disk", None) is not None:
+        return SingleFlight(lock_dir=os.getenv("GEMINI_SINGLEFLIGHT_DIR", DEFAULT_LOCK_DIR))
+    return SingleFlight()
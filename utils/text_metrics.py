@@ -0,0 +1,93 @@
+import string
+from collections import Counter
+from heapq import nlargest
+from itertools import islice, repeat
+from operator import itemgetter
+from typing import Dict, Iterable, List, Any
+
+STOPWORDS = {
+    "the","and","to","of","a","in","for","is","on","that","with","as","are","it","be","by","or","from",
+    "this","an","at","we","our","you","your","will","can","has","have"
+}
+
+def _words(text: str) -> List[str]:
+    """Whitespace tokens, lowercased, with surrounding punctuation stripped; punctuation-only tokens dropped."""
+    # split, strip and filter all run in C; lowercasing the whole text first gives the same tokens
+    return list(filter(None, map(str.strip, text.lower().split(), repeat(string.punctuation))))
+
+def keywords(text: str) -> List[str]:
+    """Keyword tokens of `text` in order: the words counted by top_keywords."""
+    return [w for w in _words(text) if len(w) > 2 and w not in STOPWORDS]
+
+class TextMetricsAccumulator:
+    """
+    text_metrics over text that arrives in chunks, e.g. a streamed response.
+
+    Chunks may split a word anywhere: the unfinished token at the end of a chunk is held
+    back until the next one. `result()` can be called at any point and reflects
+    everything fed so far. Phrases are n-grams of adjacent words (2..max_ngram) made
+    only of keywords.
+    """
+
+    def __init__(self, max_ngram: int = 2):
+        self.max_ngram = max_ngram
+        self.word_count = 0
+        self.counts: Counter = Counter()
+        self.ngrams: Dict[int, Counter] = {n: Counter() for n in range(2, max_ngram + 1)}
+        self._tail: List[str] = []  # last max_ngram - 1 words, for n-grams spanning chunks
+        self._carry = ""
+
+    def feed(self, chunk: str) -> "TextMetricsAccumulator":
+        text = self._carry + chunk
+        if not text or text[-1].isspace():
+            self._carry = ""
+        else:
+            parts = text.rsplit(None, 1)
+            text, self._carry = ("", parts[0]) if len(parts) == 1 else parts
+        self._add(_words(text))
+        return self
+
+    def _add(self, words: List[str]) -> None:
+        self.word_count += len(words)
+        self.counts.update(words)
+        if self.max_ngram >= 2 and words:
+            sequence = self._tail + words
+            for n, counts in self.ngrams.items():
+                # n-grams ending in this batch: start n - 1 words before its first word
+                start = max(len(self._tail) - (n - 1), 0)
+                counts.update(zip(*(islice(sequence, start + i, None) for i in range(n))))
+            self._tail = sequence[-(self.max_ngram - 1):]
+
+    def result(self, top_n: int = 10) -> Dict[str, Any]:
+        if self._carry:
+            pending = TextMetricsAccumulator(self.max_ngram)
+            pending.word_count, pending.counts, pending.ngrams = self.word_count, self.counts.copy(), {
+                n: counts.copy() for n, counts in self.ngrams.items()}
+            pending._tail = self._tail
+            pending._add(_words(self._carry))
+            return pending.result(top_n)
+        # filtering the distinct entries keeps first-occurrence order, so ties rank as before
+        keywords = {w: c for w, c in self.counts.items() if len(w) > 2 and w not in STOPWORDS}
+        is_phrase = set(keywords).issuperset
+        phrases = (item for counts in self.ngrams.values() for item in counts.items() if is_phrase(item[0]))
+        top_phrases = nlargest(top_n, phrases, key=itemgetter(1))
+        return {
+            "word_count": self.word_count,
+            "unique_words": len(self.counts),
+            "reading_time_min": round(self.word_count / 200, 2),  # ~200 wpm
+            "top_keywords": nlargest(top_n, keywords.items(), key=itemgetter(1)),
+            "top_phrases": [(" ".join(g), c) for g, c in top_phrases],
+        }
+
+def text_metrics(text: str, max_ngram: int = 2):
+    """Word count, unique words, reading time, top keywords and top keyword phrases for `text`."""
+    return TextMetricsAccumulator(max_ngram).feed(text).result()
+
+def text_metrics_batch(texts: Iterable[str], max_ngram: int = 2, workers: int = 1,
+                       chunksize: int = 64) -> List[Dict[str, Any]]:
+    """text_metrics for every document, in order; `workers > 1` spreads them over that many processes."""
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(text_metrics, texts, repeat(max_ngram), chunksize=chunksize))
+    return [text_metrics(text, max_ngram) for text in texts]
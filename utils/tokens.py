@@ -0,0 +1,25 @@
+import re
+
+# Letter runs (a word, or a run of CJK characters), digits and punctuation runs, scanned in C
+_WORDS = re.compile(r"[^\W\d_]+")
+_DIGITS = re.compile(r"\d")
+_SYMBOLS = re.compile(r"[^\w\s]+")
+_WIDE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local estimate of a Gemini-style (SentencePiece) token count, without a tokenizer.
+
+    Common words are one token and longer ones split roughly every four extra letters;
+    each digit and each run of punctuation is a token; CJK characters count one each.
+    """
+    if not text:
+        return 0
+    words = _WORDS.findall(text)
+    letters = sum(map(len, words))
+    tokens = len(words) + max(0, letters - 6 * len(words)) // 4
+    tokens += len(_DIGITS.findall(text)) + len(_SYMBOLS.findall(text))
+    if not text.isascii():
+        tokens += len(_WIDE.findall(text))
+    return max(1, tokens)
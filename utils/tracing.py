@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Callable
+
+
+class Span:
+    """One timed phase of a request; ids and timestamps follow the OpenTelemetry data model."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "OK"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_s(self) -> Optional[float]:
+        return (self.end_ns - self.start_ns) / 1e9 if self.end_ns is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class Tracer:
+    """
+    Minimal span tracer.
+
+    Hooks registered with `add_hook` receive every finished Span. With no hooks the
+    overhead is a couple of object allocations per phase.
+    """
+
+    def __init__(self):
+        self._hooks: List[Callable[[Span], None]] = []
+        self._local = threading.local()
+
+    def add_hook(self, hook: Callable[[Span], None]) -> None:
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[Span], None]) -> None:
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current_span(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        """Start a span without making it current; pair with `end_span`. Use across generator yields."""
+        parent = parent or self.current_span()
+        trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        return Span(name, trace_id, parent.span_id if parent else None, attributes)
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None) -> None:
+        if span.end_ns is not None:
+            return
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.status = "ERROR"
+            span.attributes["error"] = str(error)
+        for hook in list(self._hooks):
+            try:
+                hook(span)
+            except Exception:
+                pass
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes):
+        """Time a block; nested `span` calls in the same thread become children."""
+        span = self.start_span(name, parent, **attributes)
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, e)
+            raise
+        finally:
+            stack.pop()
+            self.end_span(span)
+
+    @contextmanager
+    def activate(self, span: Span):
+        """Make an already started span current for the block without ending it."""
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            stack.pop()
+
+    def wrap(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Bind `fn` to the current span: whichever thread calls the result, spans it opens
+        become children of that span instead of new roots. Use for work handed to other threads.
+        """
+        parent = self.current_span()
+        if parent is None:
+            return fn
+
+        def run(*args, **kwargs):
+            with self.activate(parent):
+                return fn(*args, **kwargs)
+
+        return run
+
+
+class JsonlSpanExporter:
+    """Hook that appends finished spans as OpenTelemetry-style JSON lines to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def __call__(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+# Process-wide tracer used by SmartGeminiClient
+tracer = Tracer()
+
+if os.getenv("GEMINI_TRACE_FILE"):
+    tracer.add_hook(JsonlSpanExporter(os.environ["GEMINI_TRACE_FILE"]))
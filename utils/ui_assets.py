@@ -0,0 +1,29 @@
+import os
+import re
+import html
+from functools import lru_cache
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+_COMMENTS = re.compile(r"/\*.*?\*/", re.S)
+_SPACES = re.compile(r"\s+")
+_AROUND_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and insignificant whitespace; enough for our hand-written stylesheet."""
+    css = _SPACES.sub(" ", _COMMENTS.sub("", css))
+    return _AROUND_PUNCTUATION.sub(r"\1", css).replace(";}", "}").strip()
+
+
+@lru_cache(maxsize=None)
+def style_tag(name: str = "theme.css") -> str:
+    """`<style>` block for a stylesheet in static/, read and minified once per process."""
+    with open(os.path.join(STATIC_DIR, name), encoding="utf-8") as f:
+        return f"<style>{minify_css(f.read())}</style>"
+
+
+def response_header_html(status: str) -> str:
+    """Header above an AI response; all styling lives in theme.css (.ai-response-header)."""
+    return ('<div class="ai-response-header"><div class="ai-status-dot"></div><h3>🤖 AI Response</h3>'
+            f'<div class="ai-status">{html.escape(status)}</div></div>')
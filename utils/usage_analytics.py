@@ -0,0 +1,107 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .usage_log import usage_backend
+
+# Everything except the prompt text, which analytics never need
+ANALYTICS_COLUMNS = ["timestamp", "module", "response_word_count", "latency_s", "ttft_s", "model", "status",
+                     "prompt_tokens"]
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def log_signature(path: str, backend: Optional[str] = None) -> Tuple:
+    """Cheap fingerprint of the usage log; changes whenever new rows are written."""
+    backend = backend or usage_backend()
+    if backend == "parquet":
+        from .usage_store import ParquetUsageStore
+        files = ParquetUsageStore(path).files()
+        return len(files), files[-1] if files else None
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return 0, None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def load_usage_frame(path: str, since: Optional[datetime] = None, backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load the analytics columns of the usage log, optionally only rows at or after `since`.
+
+    The parquet backend prunes partitions by date; the CSV backend skips parsing the prompt column.
+    """
+    backend = backend or usage_backend()
+    if backend == "parquet":
+        from .usage_store import ParquetUsageStore
+        store = ParquetUsageStore(path)
+        df = store.query(start=since.date() if since else None, columns=ANALYTICS_COLUMNS).to_pandas()
+    else:
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=ANALYTICS_COLUMNS)
+        df = pd.read_csv(path, usecols=lambda c: c in ANALYTICS_COLUMNS)
+    df = df.reindex(columns=ANALYTICS_COLUMNS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    for column in ("latency_s", "ttft_s", "response_word_count", "prompt_tokens"):
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    df["model"] = df["model"].fillna("unknown")
+    # rows written before the status column existed were only logged on success
+    df["status"] = df["status"].fillna("ok")
+    if since is not None:
+        df = df[df["timestamp"] >= since]
+    return df.dropna(subset=["timestamp"])
+
+
+def window_start(hours: Optional[float]) -> Optional[datetime]:
+    return datetime.now() - timedelta(hours=hours) if hours else None
+
+
+def latency_percentiles(df: pd.DataFrame, by: Sequence[str] = ("module",)) -> pd.DataFrame:
+    """Calls, error rate, mean and p50/p90/p99 latency and mean prompt tokens per group."""
+    by = list(by)
+    if df.empty:
+        return pd.DataFrame(columns=by + ["calls", "error_rate", "mean_s", "p50_s", "p90_s", "p99_s", "max_s",
+                                          "mean_prompt_tokens"])
+    grouped = df.groupby(by, dropna=False)
+    quantiles = grouped["latency_s"].quantile(list(PERCENTILES)).unstack()
+    quantiles.columns = [f"p{int(q * 100)}_s" for q in PERCENTILES]
+    summary = pd.DataFrame({
+        "calls": grouped.size(),
+        "error_rate": grouped["status"].agg(lambda s: (s == "error").mean()),
+        "mean_s": grouped["latency_s"].mean(),
+    }).join(quantiles)
+    summary["max_s"] = grouped["latency_s"].max()
+    # rows logged before prompt_tokens existed are left out of the mean
+    summary["mean_prompt_tokens"] = grouped["prompt_tokens"].mean()
+    return summary.round(3).sort_values("calls", ascending=False).reset_index()
+
+
+def latency_timeseries(df: pd.DataFrame, freq: str = "1h") -> pd.DataFrame:
+    """Mean and p50/p90/p99 latency per time bucket."""
+    if df.empty:
+        return pd.DataFrame(columns=["mean_s", "p50_s", "p90_s", "p99_s"])
+    resampled = df.set_index("timestamp")["latency_s"].resample(freq)
+    series = resampled.quantile(list(PERCENTILES)).unstack()
+    series.columns = [f"p{int(q * 100)}_s" for q in PERCENTILES]
+    series.insert(0, "mean_s", resampled.mean())
+    return series.dropna(how="all")
+
+
+def throughput(df: pd.DataFrame, freq: str = "1h") -> pd.DataFrame:
+    """Successful and failed calls per time bucket."""
+    if df.empty:
+        return pd.DataFrame(columns=["ok", "error"])
+    counts = df.set_index("timestamp").groupby([pd.Grouper(freq=freq), "status"]).size().unstack(fill_value=0)
+    return counts.reindex(columns=["ok", "error"], fill_value=0)
+
+
+def response_size_distribution(df: pd.DataFrame, bins: int = 20) -> pd.DataFrame:
+    """Histogram of response word counts."""
+    words = df["response_word_count"].dropna().to_numpy()
+    if not len(words):
+        return pd.DataFrame(columns=["calls"])
+    counts, edges = np.histogram(words, bins=bins)
+    labels: List[str] = [f"{int(lo)}-{int(hi)}" for lo, hi in zip(edges[:-1], edges[1:])]
+    return pd.DataFrame({"calls": counts}, index=pd.Index(labels, name="words"))
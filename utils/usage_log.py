@@ -0,0 +1,215 @@
+import os
+import csv
+import io
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable
+
+from .resilience import format_attempts
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+USAGE_COLUMNS = ["timestamp", "module", "prompt", "response_word_count", "latency_s", "ttft_s", "model", "status",
+                 "attempts", "prompt_tokens"]
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False):
+    """Advisory lock on `<path>.lock`, held across processes on POSIX."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a") as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def upgrade_schema(path: str, columns: List[str]) -> None:
+    """Rewrite a log whose header differs from `columns`, keeping matching fields. Caller holds the lock."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header == columns:
+            return
+        rows = list(reader)
+    index = {name: i for i, name in enumerate(header or [])}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([row[index[c]] if c in index and index[c] < len(row) else "" for c in columns])
+    os.replace(tmp_path, path)
+
+
+class CsvSink:
+    """Appends batches to a CSV file under an exclusive file lock."""
+
+    def __init__(self, path: str, columns: Optional[List[str]] = None):
+        self.path = path
+        self.columns = list(columns or USAGE_COLUMNS)
+        self._schema_checked = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in records:
+            writer.writerow(["" if record.get(c) is None else record.get(c) for c in self.columns])
+        with file_lock(self.path):
+            exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+            if exists and not self._schema_checked:
+                upgrade_schema(self.path, self.columns)
+            self._schema_checked = True
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                if not exists:
+                    csv.writer(f).writerow(self.columns)
+                f.write(buffer.getvalue())
+
+
+class UsageLogWriter:
+    """
+    Buffered, append-only writer for usage records.
+
+    `write` only enqueues; a daemon thread drains the queue and hands whole batches to
+    the sink (CSV by default), which appends them under an exclusive file lock so
+    concurrent sessions and processes never interleave rows. Batches flush when
+    `batch_size` records are pending, every `flush_interval_s`, on `flush()`, and at
+    interpreter exit.
+    """
+
+    def __init__(self, path: str, columns: Optional[List[str]] = None, batch_size: int = 64,
+                 flush_interval_s: float = 1.0, max_queue: int = 10000, sink: Any = None):
+        self.path = path
+        self.sink = sink if sink is not None else CsvSink(path, columns)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="usage-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add_listener(self, callback: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """Call `callback(records)` on the writer thread after each batch is persisted."""
+        self._listeners.append(callback)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Enqueue a record; never blocks. Records are dropped (and counted) if the queue is full."""
+        if self._stopped:
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything enqueued so far has been written."""
+        if self._stopped or not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)  # FIFO: processed after every record enqueued before it
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        if self._stopped:
+            return
+        self.flush()
+        self._stopped = True
+
+    def _run(self) -> None:
+        pending: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if isinstance(item, threading.Event):
+                if pending:
+                    self._write_batch(pending)
+                    pending = []
+                item.set()
+                continue
+            if item is not None:
+                pending.append(item)
+            now = time.monotonic()
+            if pending and (len(pending) >= self.batch_size or now >= deadline):
+                self._write_batch(pending)
+                pending = []
+            if now >= deadline:
+                deadline = now + self.flush_interval_s
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        try:
+            self.sink.write(records)
+        except Exception:  # e.g. a schema or conversion error; the writer thread must survive it
+            self.dropped += len(records)
+            return
+        self.written += len(records)
+        for callback in self._listeners:
+            try:
+                callback(records)
+            except Exception:
+                pass
+
+
+_writers: Dict[str, UsageLogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def usage_backend() -> str:
+    """Configured storage backend for the usage log: "csv" (default) or "parquet"."""
+    return os.getenv("USAGE_LOG_BACKEND", "csv").lower()
+
+
+def get_usage_writer(path: str, backend: Optional[str] = None) -> UsageLogWriter:
+    """
+    Process-wide writer for `path`, shared by every Streamlit session.
+
+    With the parquet backend `path` is the root directory of the partitioned store.
+    """
+    path = os.path.abspath(path)
+    backend = backend or usage_backend()
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            sink = None
+            if backend == "parquet":
+                from .usage_store import ParquetUsageStore
+                sink = ParquetUsageStore(path)
+            writer = _writers[path] = UsageLogWriter(path, sink=sink)
+        return writer
+
+
+def make_record(module: str, prompt: str, response: str, latency_s: float, ttft_s: Optional[float] = None,
+                model: Optional[str] = None, error: Optional[str] = None,
+                attempts: Optional[List[Dict[str, Any]]] = None, prompt_tokens: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "module": module,
+        "prompt": prompt,
+        "response_word_count": len(response.split()),
+        "latency_s": round(latency_s, 3),
+        "ttft_s": round(ttft_s, 3) if ttft_s is not None else None,
+        "model": model,
+        "status": "error" if error else "ok",
+        "attempts": format_attempts(attempts) if attempts else None,
+        "prompt_tokens": prompt_tokens,
+    }
@@ -0,0 +1,395 @@
+import os
+import io
+import csv
+import math
+import threading
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+from .usage_log import file_lock, usage_backend
+
+
+class LatencyHistogram:
+    """
+    Fixed log-spaced histogram for streaming percentile estimates.
+
+    Buckets grow by `factor`, so any reported percentile is within (factor - 1) / 2
+    of the true value; memory is constant regardless of how many samples are added.
+    """
+
+    def __init__(self, min_value: float = 0.001, max_value: float = 3600.0, factor: float = 1.05):
+        self.min_value = min_value
+        self.factor = factor
+        self._log_factor = math.log(factor)
+        self.buckets = [0] * (int(math.log(max_value / min_value) / self._log_factor) + 2)
+        self.count = 0
+
+    def index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return min(int(math.log(value / self.min_value) / self._log_factor) + 1, len(self.buckets) - 1)
+
+    def add(self, value: float) -> None:
+        self.buckets[self.index(value)] += 1
+        self.count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        return self.percentile_of(enumerate(self.buckets), self.count, q)
+
+    def percentile_of(self, counts: Iterable[Tuple[int, int]], total: int, q: float) -> Optional[float]:
+        """Percentile of (bucket index, count) pairs in index order, e.g. a sparse copy of `buckets`."""
+        if not total:
+            return None
+        rank = max(1, math.ceil(total * q / 100.0))
+        seen = 0
+        for index, n in counts:
+            seen += n
+            if seen >= rank:
+                if index == 0:
+                    return self.min_value
+                # geometric midpoint of the bucket
+                return round(self.min_value * self.factor ** (index - 0.5), 3)
+        return None
+
+
+class ModuleStats:
+    """Running aggregates for one module (or for all modules)."""
+
+    def __init__(self):
+        self.count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency = LatencyHistogram()
+        self.words_sum = 0
+        self.words_min: Optional[int] = None
+        self.words_max: Optional[int] = None
+
+    def add(self, latency_s: Optional[float], words: Optional[int]) -> None:
+        self.count += 1
+        if latency_s is not None:
+            self.latency_sum += latency_s
+            self.latency_max = max(self.latency_max, latency_s)
+            self.latency.add(latency_s)
+        if words is not None:
+            self.words_sum += words
+            self.words_min = words if self.words_min is None else min(self.words_min, words)
+            self.words_max = words if self.words_max is None else max(self.words_max, words)
+
+    def summary(self) -> Dict[str, Any]:
+        timed = max(self.latency.count, 1)
+        return {
+            "calls": self.count,
+            "mean_latency_s": round(self.latency_sum / timed, 3) if self.latency.count else None,
+            "p50_latency_s": self.latency.percentile(50),
+            "p90_latency_s": self.latency.percentile(90),
+            "p99_latency_s": self.latency.percentile(99),
+            "max_latency_s": round(self.latency_max, 3) if self.latency.count else None,
+            "mean_words": round(self.words_sum / max(self.count, 1), 1),
+            "min_words": self.words_min,
+            "max_words": self.words_max,
+        }
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    try:
+        return datetime.fromisoformat(str(value)) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+class _Cell:
+    """Aggregates for one (module, model) pair within one timeline bucket."""
+
+    __slots__ = ("calls", "errors", "latency", "latency_sum", "latency_max", "tokens_sum", "tokens_count")
+
+    def __init__(self):
+        self.calls = self.errors = self.tokens_count = 0
+        self.latency: Counter = Counter()  # sparse LatencyHistogram buckets
+        self.latency_sum = self.latency_max = 0.0
+        self.tokens_sum = 0.0
+
+
+# Time buckets the Performance tab offers; the timeline's own resolution is the smallest
+FREQUENCIES_S = {"15min": 900, "1h": 3600, "6h": 6 * 3600, "1D": 24 * 3600}
+PERCENTILES = (50, 90, 99)
+_EPOCH = datetime(1970, 1, 1)
+
+
+class UsageTimeline:
+    """
+    The usage log folded into 15-minute buckets, for windowed reports that never re-read it.
+
+    Each bucket keeps, per (module, model), call and error counts, latency sums, maxima and
+    a sparse log-spaced histogram (percentiles within LatencyHistogram's accuracy), prompt
+    token sums, and the bucket's response word counts. A report over any window merges
+    the buckets it covers; windows and time buckets are aligned to 15 minutes.
+    """
+
+    resolution_s = FREQUENCIES_S["15min"]
+
+    def __init__(self):
+        self.scale = LatencyHistogram()
+        self.buckets: Dict[int, Dict[Tuple[str, str], _Cell]] = {}
+        self.words: Dict[int, Counter] = {}
+
+    def _bucket(self, ts: datetime) -> int:
+        # naive local timestamps, as logged; day buckets start at local midnight
+        return int((ts - _EPOCH).total_seconds()) // self.resolution_s * self.resolution_s
+
+    def add(self, record: Dict[str, Any]) -> None:
+        ts = _to_datetime(record.get("timestamp"))
+        if ts is None:
+            return
+        start = self._bucket(ts)
+        key = (record.get("module") or "unknown", record.get("model") or "unknown")
+        cells = self.buckets.setdefault(start, {})
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = _Cell()
+        cell.calls += 1
+        # rows written before the status column existed were only logged on success
+        cell.errors += record.get("status") == "error"
+        latency = _to_float(record.get("latency_s"))
+        if latency is not None:
+            cell.latency[self.scale.index(latency)] += 1
+            cell.latency_sum += latency
+            cell.latency_max = max(cell.latency_max, latency)
+        tokens = _to_float(record.get("prompt_tokens"))
+        if tokens is not None:
+            cell.tokens_sum += tokens
+            cell.tokens_count += 1
+        words = _to_float(record.get("response_word_count"))
+        if words is not None:
+            self.words.setdefault(start, Counter())[int(words)] += 1
+
+    def _summary(self, cells: Iterable[_Cell]) -> Dict[str, Any]:
+        calls = errors = tokens_count = 0
+        latency: Counter = Counter()
+        latency_sum = latency_max = tokens_sum = 0.0
+        for cell in cells:
+            calls += cell.calls
+            errors += cell.errors
+            latency.update(cell.latency)
+            latency_sum += cell.latency_sum
+            latency_max = max(latency_max, cell.latency_max)
+            tokens_sum += cell.tokens_sum
+            tokens_count += cell.tokens_count
+        timed = sum(latency.values())
+        ordered = sorted(latency.items())
+        summary = {"calls": calls, "error_rate": round(errors / calls, 3) if calls else 0.0,
+                   "mean_s": round(latency_sum / timed, 3) if timed else None}
+        summary.update({f"p{q}_s": self.scale.percentile_of(ordered, timed, q) for q in PERCENTILES})
+        summary["max_s"] = round(latency_max, 3) if timed else None
+        # rows logged before prompt_tokens existed are left out of the mean
+        summary["mean_prompt_tokens"] = round(tokens_sum / tokens_count, 1) if tokens_count else None
+        return summary
+
+    def report(self, since: Optional[datetime] = None, freq: str = "1h", size_bins: int = 20) -> Dict[str, Any]:
+        """
+        Everything the Performance tab shows for calls at or after `since`.
+
+        Returns calls, error_rate, overall (one summary row), by_module and by_model
+        (summary rows, busiest first), timeseries and throughput (columns with a "time"
+        column, one row per `freq` bucket) and sizes (a `size_bins`-bin histogram of
+        response word counts).
+        """
+        first = None if since is None else self._bucket(since)
+        starts = sorted(start for start in self.buckets if first is None or start >= first)
+        step = FREQUENCIES_S[freq]
+        overall: List[_Cell] = []
+        groups: Dict[str, Dict[str, List[_Cell]]] = {"module": {}, "model": {}}
+        periods: Dict[int, List[_Cell]] = {}
+        for start in starts:
+            period = periods.setdefault(start // step * step, [])
+            for (module, model), cell in self.buckets[start].items():
+                overall.append(cell)
+                period.append(cell)
+                groups["module"].setdefault(module, []).append(cell)
+                groups["model"].setdefault(model, []).append(cell)
+        summary = self._summary(overall)
+        grouped = {
+            name: sorted(({name: key, **self._summary(cells)} for key, cells in members.items()),
+                         key=lambda row: row["calls"], reverse=True)
+            for name, members in groups.items()
+        }
+        timeseries: Dict[str, List[Any]] = {"time": [], "mean_s": [], **{f"p{q}_s": [] for q in PERCENTILES}}
+        throughput: Dict[str, List[Any]] = {"time": [], "ok": [], "error": []}
+        for period, cells in sorted(periods.items()):
+            when = _EPOCH + timedelta(seconds=period)
+            errors = sum(cell.errors for cell in cells)
+            throughput["time"].append(when)
+            throughput["ok"].append(sum(cell.calls for cell in cells) - errors)
+            throughput["error"].append(errors)
+            row = self._summary(cells)
+            if row["mean_s"] is not None:
+                for column in timeseries:
+                    timeseries[column].append(when if column == "time" else row[column])
+        return {
+            "calls": summary["calls"],
+            "error_rate": summary["error_rate"],
+            "overall": summary,
+            "by_module": grouped["module"],
+            "by_model": grouped["model"],
+            "timeseries": timeseries,
+            "throughput": throughput,
+            "sizes": self._size_histogram(starts, size_bins),
+        }
+
+    def _size_histogram(self, starts: List[int], bins: int) -> Dict[str, List[Any]]:
+        words: Counter = Counter()
+        for start in starts:
+            words.update(self.words.get(start, ()))
+        if not words:
+            return {"words": [], "calls": []}
+        low, high = min(words), max(words)
+        width = (high - low) / bins or 1
+        counts = [0] * bins
+        for value, n in words.items():
+            counts[min(int((value - low) / width), bins - 1)] += n
+        labels = [f"{int(low + i * width)}-{int(low + (i + 1) * width)}" for i in range(bins)]
+        return {"words": labels, "calls": counts}
+
+
+class UsageMetrics:
+    """
+    Incrementally maintained view of the usage log.
+
+    `refresh()` reads only the bytes appended since the previous call (under the same
+    lock the writer uses, so it always stops on a record boundary) and folds them into
+    running totals; `tail()` returns the last N records without touching the file and
+    `report()` gives windowed aggregates from the same pass (see UsageTimeline).
+    """
+
+    def __init__(self, path: str, tail_size: int = 50):
+        self.path = path
+        self.overall = ModuleStats()
+        self.modules: Dict[str, ModuleStats] = {}
+        self.recent: "deque[Dict[str, Any]]" = deque(maxlen=tail_size)
+        self.timeline = UsageTimeline()
+        self._header: Optional[List[str]] = None
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _reset(self) -> None:
+        self.overall = ModuleStats()
+        self.modules = {}
+        self.recent.clear()
+        self.timeline = UsageTimeline()
+        self._header = None
+        self._offset = 0
+
+    def add_records(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            latency = _to_float(record.get("latency_s"))
+            words = _to_float(record.get("response_word_count"))
+            words = int(words) if words is not None else None
+            module = record.get("module") or "unknown"
+            self.overall.add(latency, words)
+            stats = self.modules.get(module)
+            if stats is None:
+                stats = self.modules[module] = ModuleStats()
+            stats.add(latency, words)
+            self.timeline.add(record)
+            self.recent.append(record)
+
+    def refresh(self) -> None:
+        """Fold in any rows appended to the log since the last refresh."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                return
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # file was replaced (schema upgrade, rotation) or truncated: rebuild
+                self._reset()
+                self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return
+            with file_lock(self.path, shared=True):
+                with open(self.path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            self._offset += len(data)
+            reader = csv.reader(io.StringIO(data.decode("utf-8", errors="replace"), newline=""))
+            if self._header is None:
+                self._header = next(reader, None)
+                if self._header is None:
+                    return
+            header = self._header
+            self.add_records(dict(zip(header, row)) for row in reader if row)
+
+    def tail(self, n: int = 10) -> List[Dict[str, Any]]:
+        if n <= 0:
+            return []
+        return list(self.recent)[-n:]
+
+    def summary(self) -> Dict[str, Any]:
+        return self.overall.summary()
+
+    def report(self, since: Optional[datetime] = None, freq: str = "1h") -> Dict[str, Any]:
+        with self._lock:
+            return self.timeline.report(since, freq)
+
+    def by_module(self) -> List[Dict[str, Any]]:
+        return [dict(module=name, **stats.summary()) for name, stats in sorted(self.modules.items())]
+
+
+class ParquetUsageMetrics(UsageMetrics):
+    """
+    UsageMetrics over the partitioned Parquet store.
+
+    `refresh()` reads only part files it has not seen yet, projecting away the prompt
+    column; if a seen file disappears (compaction) the aggregates are rebuilt.
+    """
+
+    AGGREGATE_COLUMNS = ["timestamp", "module", "response_word_count", "latency_s", "model", "status",
+                         "prompt_tokens"]
+
+    def __init__(self, root: str, tail_size: int = 50):
+        super().__init__(root, tail_size)
+        from .usage_store import ParquetUsageStore
+        self.store = ParquetUsageStore(root)
+        self._seen: set = set()
+
+    def refresh(self) -> None:
+        with self._lock, file_lock(self.store._lock_path, shared=True):
+            files = self.store.files()
+            if not self._seen.issubset(files):
+                self._reset()
+                self._seen = set()
+            new_files = [f for f in files if f not in self._seen]
+            if not new_files:
+                return
+            table = self.store.read_files(new_files, self.AGGREGATE_COLUMNS)
+            self.add_records(table.to_pylist())
+            self._seen.update(new_files)
+
+    def tail(self, n: int = 10) -> List[Dict[str, Any]]:
+        return self.store.tail(n)
+
+
+_metrics: Dict[str, UsageMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def get_usage_metrics(path: str, backend: Optional[str] = None) -> UsageMetrics:
+    """Process-wide metrics view for `path`, shared by every Streamlit session."""
+    path = os.path.abspath(path)
+    backend = backend or usage_backend()
+    with _metrics_lock:
+        metrics = _metrics.get(path)
+        if metrics is None:
+            metrics = _metrics[path] = ParquetUsageMetrics(path) if backend == "parquet" else UsageMetrics(path)
+        return metrics
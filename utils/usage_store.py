@@ -0,0 +1,258 @@
+"""
+Date-partitioned Parquet storage for the usage log.
+
+Layout: <root>/date=YYYY-MM-DD/part-<epoch_us>-<pid>.parquet. Every writer flush
+produces a new part file (rotation); `compact` merges a day's parts into one file.
+Writers compact on their own: a partition is merged once it reaches `compact_after`
+parts, and when writes move on to a new day the earlier days this writer touched are
+merged, so finished days end up as a single file. The CLI command is only needed for
+stores written by older versions or with `compact_after=None`.
+Queries go through pyarrow.dataset, so date filters prune whole partitions and
+module filters are pushed down to row-group statistics.
+
+    python -m utils.usage_store migrate data/usage_logs.csv data/usage
+    python -m utils.usage_store compact data/usage
+"""
+import os
+import glob
+import time
+import argparse
+from datetime import date, datetime
+from typing import Dict, List, Optional, Any, Iterable, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, only needed for USAGE_LOG_BACKEND=parquet
+    pa = None
+
+from .usage_log import USAGE_COLUMNS, file_lock
+
+DEFAULT_STORE_PATH = os.path.join(os.getcwd(), "data", "usage")
+
+# Columns not listed here are stored as strings
+COLUMN_TYPES = {
+    "timestamp": "timestamp",
+    "response_word_count": "int64",
+    "prompt_tokens": "int64",
+    "latency_s": "float64",
+    "ttft_s": "float64",
+}
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("The parquet usage-log backend requires pyarrow (pip install pyarrow).")
+
+
+def _arrow_type(name: str):
+    kind = COLUMN_TYPES.get(name, "string")
+    if kind == "timestamp":
+        return pa.timestamp("us")
+    return pa.type_for_alias(kind)
+
+
+def usage_schema(columns: Optional[Sequence[str]] = None):
+    _require_pyarrow()
+    return pa.schema([pa.field(c, _arrow_type(c)) for c in (columns or USAGE_COLUMNS)])
+
+
+def _coerce(name: str, value: Any) -> Any:
+    if value is None or value == "":
+        return None
+    kind = COLUMN_TYPES.get(name, "string")
+    if kind == "timestamp":
+        return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    if kind == "int64":
+        return int(float(value))
+    if kind == "float64":
+        return float(value)
+    return str(value)
+
+
+class ParquetUsageStore:
+    """Usage-log sink and query engine backed by date-partitioned Parquet files."""
+
+    def __init__(self, root: str = DEFAULT_STORE_PATH, columns: Optional[Sequence[str]] = None,
+                 compact_after: Optional[int] = 32):
+        _require_pyarrow()
+        self.root = root
+        self.columns = list(columns or USAGE_COLUMNS)
+        self.schema = usage_schema(self.columns)
+        self.compact_after = compact_after
+        self._days_written: set = set()  # days this writer added parts to since their last compaction
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(self.root, "_store")
+
+    def _partition_dir(self, day: str) -> str:
+        return os.path.join(self.root, f"date={day}")
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        """Write one part file per day touched by `records`, then compact as described above."""
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            ts = _coerce("timestamp", record.get("timestamp")) or datetime.now()
+            by_day.setdefault(ts.date().isoformat(), []).append(record)
+        with file_lock(self._lock_path, shared=True):
+            for day, rows in by_day.items():
+                table = pa.table(
+                    {c: pa.array([_coerce(c, r.get(c)) for r in rows], type=self.schema.field(c).type) for c in self.columns},
+                    schema=self.schema,
+                )
+                self._write_part(day, table)
+        if self.compact_after is not None:
+            self._auto_compact(by_day)
+
+    def _auto_compact(self, days: Iterable[str]) -> None:
+        self._days_written.update(days)
+        latest = max(self._days_written)
+        due = {day for day in self._days_written if day < latest}
+        due.update(day for day in self._days_written
+                   if len(glob.glob(os.path.join(self._partition_dir(day), "*.parquet"))) >= self.compact_after)
+        if due:
+            self.compact(min_files=2, days=due)
+            self._days_written -= due - {latest}
+
+    def _write_part(self, day: str, table, prefix: str = "part") -> str:
+        directory = self._partition_dir(day)
+        os.makedirs(directory, exist_ok=True)
+        name = f"{prefix}-{int(time.time() * 1e6)}-{os.getpid()}.parquet"
+        tmp_path = os.path.join(directory, "." + name + ".tmp")
+        pq.write_table(table, tmp_path, compression="zstd")
+        final_path = os.path.join(directory, name)
+        os.replace(tmp_path, final_path)  # readers never see partial files
+        return final_path
+
+    def files(self, start: Optional[date] = None, end: Optional[date] = None) -> List[str]:
+        """Part files in date order, optionally restricted to an inclusive date range."""
+        result = []
+        for directory in sorted(glob.glob(os.path.join(self.root, "date=*"))):
+            day = date.fromisoformat(os.path.basename(directory)[len("date="):])
+            if (start and day < start) or (end and day > end):
+                continue
+            result.extend(sorted(glob.glob(os.path.join(directory, "*.parquet"))))
+        return result
+
+    def dataset(self):
+        partitioning = ds.partitioning(pa.schema([pa.field("date", pa.string())]), flavor="hive")
+        schema = self.schema.append(pa.field("date", pa.string()))
+        # in-flight ".*.tmp" files and the "_store.lock" file are skipped by the default ignore_prefixes
+        return ds.dataset(self.root, format="parquet", partitioning=partitioning, schema=schema)
+
+    def query(self, start: Optional[date] = None, end: Optional[date] = None,
+              modules: Optional[Iterable[str]] = None, columns: Optional[Sequence[str]] = None):
+        """
+        Load matching rows as a pyarrow Table.
+
+        `start`/`end` (inclusive) prune partitions; `modules` is pushed down as a row filter;
+        `columns` projects so that e.g. the prompt text is never read for latency analytics.
+        """
+        expression = None
+
+        def both(a, b):
+            return b if a is None else a & b
+
+        if start is not None:
+            expression = both(expression, ds.field("date") >= start.isoformat())
+        if end is not None:
+            expression = both(expression, ds.field("date") <= end.isoformat())
+        if modules is not None:
+            expression = both(expression, ds.field("module").isin(list(modules)))
+        return self.dataset().to_table(columns=list(columns) if columns else self.columns, filter=expression)
+
+    def read_files(self, paths: Sequence[str], columns: Optional[Sequence[str]] = None):
+        """Read specific part files (conformed to the current schema), e.g. the ones added since a refresh."""
+        tables = [_conform(pq.read_table(p), self.schema) for p in paths]
+        table = pa.concat_tables(tables) if tables else self.schema.empty_table()
+        return table.select(list(columns)) if columns else table
+
+    def tail(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Most recent `n` records, reading part files newest-first until enough rows are found."""
+        tables, rows = [], 0
+        for path in reversed(self.files()):
+            table = _conform(pq.read_table(path), self.schema)
+            tables.append(table)
+            rows += len(table)
+            if rows >= n:
+                break
+        if not tables:
+            return []
+        merged = pa.concat_tables(tables).sort_by("timestamp")
+        return merged.slice(max(0, len(merged) - n)).to_pylist()
+
+    def compact(self, min_files: int = 4, days: Optional[Iterable[str]] = None) -> int:
+        """
+        Merge each partition that has at least `min_files` parts into one file; returns partitions compacted.
+
+        `days` (YYYY-MM-DD strings) restricts compaction to those partitions.
+        """
+        compacted = 0
+        with file_lock(self._lock_path):
+            if days is None:
+                directories = sorted(glob.glob(os.path.join(self.root, "date=*")))
+            else:
+                directories = [self._partition_dir(day) for day in sorted(days)]
+            for directory in directories:
+                parts = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+                if len(parts) < min_files:
+                    continue
+                tables = [_conform(pq.read_table(p), self.schema) for p in parts]
+                merged = pa.concat_tables(tables).sort_by("timestamp")
+                self._write_part(os.path.basename(directory)[len("date="):], merged, prefix="compacted")
+                for p in parts:
+                    os.remove(p)
+                compacted += 1
+        return compacted
+
+
+def _conform(table, schema):
+    """Add missing columns as nulls and drop unknown ones so older parts merge with newer ones."""
+    arrays = [table.column(f.name).cast(f.type) if f.name in table.column_names else pa.nulls(len(table), f.type)
+              for f in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def migrate_csv(csv_path: str, root: str = DEFAULT_STORE_PATH, batch_rows: int = 50000) -> int:
+    """Copy an existing CSV usage log into the partitioned store; returns rows migrated."""
+    store = ParquetUsageStore(root, compact_after=None)  # compacted once at the end
+    convert = pa_csv.ConvertOptions(column_types={c: pa.string() for c in store.columns})
+    reader = pa_csv.open_csv(csv_path, read_options=pa_csv.ReadOptions(block_size=1 << 24),
+                             convert_options=convert)
+    total = 0
+    pending: List[Dict[str, Any]] = []
+    for batch in reader:
+        pending.extend(batch.to_pylist())
+        if len(pending) >= batch_rows:
+            store.write(pending)
+            total += len(pending)
+            pending = []
+    if pending:
+        store.write(pending)
+        total += len(pending)
+    store.compact(min_files=2)
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the partitioned usage-log store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="import an existing usage_logs.csv")
+    migrate.add_argument("csv_path")
+    migrate.add_argument("root", nargs="?", default=DEFAULT_STORE_PATH)
+    compact = sub.add_parser("compact", help="merge small part files")
+    compact.add_argument("root", nargs="?", default=DEFAULT_STORE_PATH)
+    compact.add_argument("--min-files", type=int, default=4)
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        print(f"Migrated {migrate_csv(args.csv_path, args.root)} rows into {args.root}")
+    else:
+        print(f"Compacted {ParquetUsageStore(args.root).compact(args.min_files)} partitions")
+
+
+if __name__ == "__main__":
+    main()